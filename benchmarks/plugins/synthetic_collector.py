@@ -0,0 +1,53 @@
+"""Synthetic collectors for benchmarks.
+
+Behaviour is read from environment variables on every run, so a benchmark can
+change it between runs without reloading the module:
+
+- ``HARVESTER_BENCH_COLLECTORS``: number of collectors to define (read at import, default 4)
+- ``HARVESTER_BENCH_LATENCY``: seconds each run sleeps (default 0)
+- ``HARVESTER_BENCH_PAYLOAD_BYTES``: approximate size of each run's data (default 1024)
+- ``HARVESTER_BENCH_FAILURE_RATE``: probability in [0, 1] that a run fails (default 0)
+
+Collectors are named ``synthetic-0`` .. ``synthetic-<N-1>``.
+"""
+import os
+import random
+import time
+
+from dwellir_harvester.collector_base import GenericCollector
+
+# Roughly the serialized size of one peer entry below
+PEER_BYTES = 64
+
+
+class SyntheticCollector(GenericCollector):
+    NAME = "synthetic"
+    VERSION = "0.0.1"
+
+    @classmethod
+    def create(cls, **kwargs):
+        return cls(**kwargs)
+
+    def collect(self):
+        latency = float(os.environ.get("HARVESTER_BENCH_LATENCY", 0))
+        payload_bytes = int(os.environ.get("HARVESTER_BENCH_PAYLOAD_BYTES", 1024))
+        failure_rate = float(os.environ.get("HARVESTER_BENCH_FAILURE_RATE", 0))
+
+        if latency:
+            time.sleep(latency)
+        if failure_rate and random.random() < failure_rate:
+            raise RuntimeError("synthetic failure")
+        return {
+            "metadata": self._get_metadata(),
+            "data": {
+                "peers": [
+                    {"id": f"peer-{i:08d}", "address": f"10.0.{i % 256}.{i % 250}:30333", "best": i}
+                    for i in range(max(1, payload_bytes // PEER_BYTES))
+                ],
+            },
+        }
+
+
+for _index in range(int(os.environ.get("HARVESTER_BENCH_COLLECTORS", 4))):
+    _name = f"SyntheticCollector{_index}"
+    globals()[_name] = type(_name, (SyntheticCollector,), {"NAME": f"synthetic-{_index}"})
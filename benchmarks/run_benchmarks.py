@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the harvester app.
+
+Runs everything locally against the synthetic collectors in
+``benchmarks/plugins`` (no network, no chain nodes) and writes the results as
+JSON, so two runs can be compared with ``--compare``.
+
+Suites:
+
+- ``cycle``: wall time of one daemon ``run_collectors()`` pass
+- ``http``: ``/metadata`` throughput and latency percentiles under concurrent keep-alive clients
+- ``serialization``: snapshot serialization/compression and schema validation cost by payload size
+- ``cold_start``: ``dwellir-harvester collect`` wall time in a fresh interpreter
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick --suite http
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json
+"""
+import argparse
+import copy
+import http.client
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+PLUGIN_DIR = os.path.join(ROOT, "benchmarks", "plugins")
+EXAMPLE_PLUGIN_DIR = os.path.join(ROOT, "examples", "plugins")
+if os.path.isdir(SRC) and SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+SUITES = ["cycle", "http", "serialization", "cold_start"]
+
+# Settings per mode; --quick keeps a full run to a couple of seconds
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "full": {
+        "collectors": 8,
+        "latency": 0.05,
+        "payload_bytes": 16384,
+        "failure_rate": 0.1,
+        "cycles": 10,
+        "clients": 16,
+        "requests_per_client": 200,
+        "payload_sizes": [1024, 16384, 262144, 1048576],
+        "serialization_rounds": 20,
+        "cold_start_runs": 5,
+    },
+    "quick": {
+        "collectors": 4,
+        "latency": 0.005,
+        "payload_bytes": 1024,
+        "failure_rate": 0.1,
+        "cycles": 2,
+        "clients": 2,
+        "requests_per_client": 10,
+        "payload_sizes": [1024, 16384],
+        "serialization_rounds": 2,
+        "cold_start_runs": 1,
+    },
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Min/mean/percentiles/max of a list of durations, in milliseconds."""
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "min_ms": round(min(ms), 3) if ms else 0.0,
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def timed(fn: Callable[[], Any], rounds: int) -> List[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+SYNTHETIC_ENV = (
+    "HARVESTER_BENCH_COLLECTORS",
+    "HARVESTER_BENCH_LATENCY",
+    "HARVESTER_BENCH_PAYLOAD_BYTES",
+    "HARVESTER_BENCH_FAILURE_RATE",
+)
+
+
+def configure_synthetic(settings: Dict[str, Any]):
+    """Export the synthetic collector settings; collectors read them on every run."""
+    os.environ["HARVESTER_BENCH_COLLECTORS"] = str(settings["collectors"])
+    os.environ["HARVESTER_BENCH_LATENCY"] = str(settings["latency"])
+    os.environ["HARVESTER_BENCH_PAYLOAD_BYTES"] = str(settings["payload_bytes"])
+    os.environ["HARVESTER_BENCH_FAILURE_RATE"] = str(settings["failure_rate"])
+
+
+def synthetic_names(settings: Dict[str, Any]) -> List[str]:
+    return [f"synthetic-{i}" for i in range(settings["collectors"])]
+
+
+def make_daemon(settings: Dict[str, Any], workdir: str, **overrides):
+    from dwellir_harvester_app.daemon import CollectorDaemon
+
+    config = {
+        'collectors': synthetic_names(settings),
+        'collector_paths': [PLUGIN_DIR],
+        'output_file': os.path.join(workdir, "harvested-data.json"),
+        'max_workers': settings["collectors"],
+        'collector_timeout': max(5.0, settings["latency"] * 20),
+    }
+    config.update(overrides)
+    daemon = CollectorDaemon(config)
+    # One worker per collector, so a cycle costs about one collector latency
+    assert daemon.scheduler.max_workers == config['max_workers'], "benchmark daemon has the wrong pool size"
+    return daemon
+
+
+def bench_cycle(settings: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """Wall time of a full collection pass, against the ideal of one collector latency."""
+    daemon = make_daemon(settings, workdir)
+    try:
+        daemon.run_collectors()  # warm-up: imports, schema compile, first write
+        samples = timed(daemon.run_collectors, settings["cycles"])
+    finally:
+        daemon.scheduler.stop()
+    return {
+        "collectors": settings["collectors"],
+        "latency_ms": settings["latency"] * 1000,
+        "failure_rate": settings["failure_rate"],
+        "payload_bytes": settings["payload_bytes"],
+        "cycle": summarize(samples),
+    }
+
+
+def _client(port: int, path: str, headers: Dict[str, str], count: int, out: List[float], errors: List[str]):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status not in (200, 304):
+                    errors.append(f"HTTP {response.status}")
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(str(e))
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                continue
+            out.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+
+
+def bench_http(settings: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """``/metadata`` throughput and latency with concurrent keep-alive clients."""
+    daemon = make_daemon(settings, workdir, max_connections=settings["clients"] * 2)
+    daemon.run_collectors()
+    httpd = daemon._make_server(("127.0.0.1", 0))
+    daemon.httpd = httpd
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+
+    results: Dict[str, Any] = {
+        "clients": settings["clients"],
+        "requests_per_client": settings["requests_per_client"],
+        "snapshot_bytes": len(daemon.snapshot.body),
+    }
+    variants = {
+        "identity": {},
+        "gzip": {"Accept-Encoding": "gzip"},
+        "conditional": {"If-None-Match": daemon.snapshot.etag},
+    }
+    try:
+        for variant, headers in variants.items():
+            samples: List[float] = []
+            errors: List[str] = []
+            threads = [
+                threading.Thread(
+                    target=_client,
+                    args=(port, "/metadata", headers, settings["requests_per_client"], samples, errors),
+                )
+                for _ in range(settings["clients"])
+            ]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            entry = summarize(samples)
+            entry["requests_per_second"] = round(len(samples) / elapsed, 1) if elapsed else 0.0
+            entry["errors"] = len(errors)
+            results[variant] = entry
+    finally:
+        daemon.stop()
+    return results
+
+
+def bench_serialization(settings: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """Serialization, compression and validation cost as the payload grows."""
+    from dwellir_harvester.core import bundled_schema_path
+
+    from dwellir_harvester_app.harvest import build_snapshot, collect_section
+    from dwellir_harvester_app.registry import CollectorRegistry
+    from dwellir_harvester_app.snapshot import Snapshot, encode_body
+    from dwellir_harvester_app.validation import SchemaValidator
+
+    registry = CollectorRegistry([PLUGIN_DIR])
+    registry.load()
+    names = synthetic_names(settings)
+    schema_path = str(bundled_schema_path())
+    rounds = settings["serialization_rounds"]
+    previous_payload = os.environ.get("HARVESTER_BENCH_PAYLOAD_BYTES")
+
+    results = []
+    try:
+        for size in settings["payload_sizes"]:
+            os.environ["HARVESTER_BENCH_PAYLOAD_BYTES"] = str(size)
+            os.environ["HARVESTER_BENCH_FAILURE_RATE"] = "0"
+            os.environ["HARVESTER_BENCH_LATENCY"] = "0"
+            sections = {name: collect_section(name, registry=registry) for name in names}
+            result = build_snapshot(names, sections, validate=False)
+            snapshot = Snapshot(result)
+            validator = SchemaValidator(schema_path)
+
+            def full_validate():
+                # Fresh section objects, so nothing is skipped as unchanged
+                document = dict(result)
+                document["collectors"] = {k: copy.copy(v) for k, v in result["collectors"].items()}
+                validator.validate(document)
+
+            results.append({
+                "payload_bytes": size,
+                "snapshot_bytes": len(snapshot.body),
+                "serialize_compact": summarize(timed(lambda: Snapshot(result), rounds)),
+                "serialize_indent": summarize(timed(lambda: json.dumps(result, indent=2), rounds)),
+                "gzip": summarize(timed(lambda: encode_body(snapshot.body, "gzip"), rounds)),
+                "validate_full": summarize(timed(full_validate, rounds)),
+                "validate_unchanged": summarize(timed(lambda: validator.validate(result), rounds)),
+            })
+    finally:
+        if previous_payload is not None:
+            os.environ["HARVESTER_BENCH_PAYLOAD_BYTES"] = previous_payload
+        configure_synthetic(settings)
+    return {"sizes": results}
+
+
+COLD_START_SCRIPT = (
+    "import sys, time; start = time.perf_counter()\n"
+    "from dwellir_harvester_app.cli import main\n"
+    "imported = time.perf_counter()\n"
+    "code = main(sys.argv[1:])\n"
+    "print('BENCH', imported - start, time.perf_counter() - imported, file=sys.stderr)\n"
+    "sys.exit(code)\n"
+)
+
+
+def bench_cold_start(settings: Dict[str, Any], workdir: str) -> Dict[str, Any]:
+    """``collect`` in a fresh interpreter: total wall time, import time and run time."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [SRC, env.get("PYTHONPATH", "")] if p)
+    env["HARVESTER_INDEX_PATH"] = os.path.join(workdir, "collector-index.json")
+    output = os.path.join(workdir, "cold-start.json")
+    commands = {
+        "null": ["collect", "null"],
+        "sample_plugin": ["collect", "sample_plugin", "--collector-path", EXAMPLE_PLUGIN_DIR],
+    }
+
+    results: Dict[str, Any] = {}
+    for label, argv in commands.items():
+        wall: List[float] = []
+        imports: List[float] = []
+        runs: List[float] = []
+        errors: List[str] = []
+        # The first run builds the collector index and is not counted
+        for run_index in range(settings["cold_start_runs"] + 1):
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-c", COLD_START_SCRIPT] + argv + ["--output", output],
+                env=env, cwd=workdir, capture_output=True, text=True,
+            )
+            if run_index == 0:
+                continue
+            wall.append(time.perf_counter() - start)
+            if proc.returncode != 0:
+                errors.append(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}")
+            for line in proc.stderr.splitlines():
+                if line.startswith("BENCH "):
+                    _, imported, ran = line.split()
+                    imports.append(float(imported))
+                    runs.append(float(ran))
+        results[label] = {
+            "wall": summarize(wall),
+            "import": summarize(imports),
+            "run": summarize(runs),
+            "errors": errors,
+        }
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any], str], Dict[str, Any]]] = {
+    "cycle": bench_cycle,
+    "http": bench_http,
+    "serialization": bench_serialization,
+    "cold_start": bench_cold_start,
+}
+
+
+def environment_info() -> Dict[str, Any]:
+    from dwellir_harvester_app.harvest import harvester_version
+
+    info = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "harvester_version": harvester_version(),
+    }
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["git_commit"] = None
+    return info
+
+
+def run(suites: List[str], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the selected suites and return the JSON-serializable report.
+
+    The synthetic collector settings are exported for the run and the previous
+    environment is restored afterwards.
+    """
+    previous_env = {name: os.environ.get(name) for name in SYNTHETIC_ENV}
+    configure_synthetic(settings)
+    report: Dict[str, Any] = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment_info(),
+        "settings": settings,
+        "results": {},
+    }
+    try:
+        with tempfile.TemporaryDirectory(prefix="harvester-bench-") as workdir:
+            for suite in suites:
+                start = time.perf_counter()
+                report["results"][suite] = BENCHMARKS[suite](settings, workdir)
+                report["results"][suite]["suite_seconds"] = round(time.perf_counter() - start, 3)
+    finally:
+        for name, value in previous_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return report
+
+
+def _flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """``{"a": {"b": 1}}`` -> ``{"a.b": 1}``; lists are keyed by payload size or index."""
+    flat: Dict[str, float] = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}{key}."))
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            key = item.get("payload_bytes", i) if isinstance(item, dict) else i
+            flat.update(_flatten(item, f"{prefix}{key}."))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix.rstrip(".")] = value
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Lines comparing the ``*_ms`` and ``requests_per_second`` figures of two reports."""
+    old = _flatten(baseline.get("results", {}))
+    new = _flatten(current.get("results", {}))
+    lines = []
+    for key in sorted(set(old) & set(new)):
+        if not (key.endswith("_ms") or key.endswith("requests_per_second")):
+            continue
+        if not old[key]:
+            continue
+        change = (new[key] - old[key]) / old[key] * 100
+        lines.append(f"{key:70s} {old[key]:12.3f} -> {new[key]:12.3f} ({change:+.1f}%)")
+    return lines
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the harvester app.")
+    parser.add_argument("--suite", action="append", choices=SUITES, dest="suites",
+                        help="Suite to run (can be repeated; default: all).")
+    parser.add_argument("--quick", action="store_true", help="Small, fast settings (smoke test).")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file (default: stdout).")
+    parser.add_argument("--compare", metavar="REPORT", help="Compare against an earlier JSON report.")
+    parser.add_argument("--collectors", type=int, help="Number of synthetic collectors.")
+    parser.add_argument("--latency", type=float, help="Synthetic collector latency in seconds.")
+    parser.add_argument("--payload-bytes", type=int, help="Approximate payload size per collector.")
+    parser.add_argument("--failure-rate", type=float, help="Probability that a synthetic run fails.")
+    parser.add_argument("--clients", type=int, help="Concurrent HTTP clients.")
+    parser.add_argument("--requests", type=int, dest="requests_per_client", help="Requests per HTTP client.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    settings = dict(PROFILES["quick" if args.quick else "full"])
+    for key in ("collectors", "latency", "payload_bytes", "failure_rate", "clients", "requests_per_client"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+
+    # Synthetic failures are expected; keep their error logs out of the report output
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.ERROR)
+    try:
+        report = run(args.suites or SUITES, settings)
+    finally:
+        logging.disable(previous_disable)
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(body + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(body)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for line in compare(baseline, report):
+            print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
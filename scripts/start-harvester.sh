@@ -8,6 +8,7 @@ PORT=${PORT:-18080}
 INTERVAL=${INTERVAL:-300}
 COLLECTORS=${COLLECTORS:-"host"}
 VALIDATE=${VALIDATE:-"true"}
+CONFIG_FILE=${CONFIG_FILE:-}
 
 # Create data directory if it doesn't exist
 mkdir -p "$DATA_DIR"
@@ -15,6 +16,11 @@ mkdir -p "$DATA_DIR"
 # Set up environment
 export PYTHONPATH="${PYTHONPATH}:$(pwd)/src"
 
+# A config file carries all options; the variables above would override it
+if [ -n "$CONFIG_FILE" ]; then
+    exec python3 -m dwellir_harvester_app.daemon --config "$CONFIG_FILE"
+fi
+
 # Start the daemon
 exec python3 -m dwellir_harvester_app.daemon \
     --host 0.0.0.0 \
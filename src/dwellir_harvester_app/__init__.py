@@ -1,8 +1,13 @@
-from importlib.metadata import PackageNotFoundError, version
+__all__ = ["cli", "daemon"]
 
-try:
-    __version__ = version("dwellir-harvester")
-except PackageNotFoundError:
-    __version__ = "0.0.0"
 
-__all__ = ["cli", "daemon"]
+def __getattr__(name):
+    # Resolved on first use: importlib.metadata is slow to import and the CLI rarely needs it
+    if name == "__version__":
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            return version("dwellir-harvester")
+        except PackageNotFoundError:
+            return "0.0.0"
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
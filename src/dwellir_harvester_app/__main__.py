@@ -1,9 +1,10 @@
 import sys
 
-from dwellir_harvester_app.cli import build_parser, main as cli_main
-
 
 def main() -> int:
+    # Imported here so `python -m dwellir_harvester_app` pays only for what it runs
+    from dwellir_harvester_app.cli import build_parser, main as cli_main
+
     # Show help if no arguments are provided
     if len(sys.argv) == 1:
         parser = build_parser()
@@ -0,0 +1,415 @@
+"""Fan-in scraping of many harvester daemons.
+
+``dwellir-harvester aggregate`` polls the ``/metadata`` endpoint of every
+daemon in a fleet and serves one merged, indexed view of them over HTTP.
+
+Each round scrapes all daemons concurrently from a thread pool. Every daemon
+keeps one keep-alive connection and the ETag of its last document, so a
+daemon whose snapshot did not change answers ``304 Not Modified`` with no
+body, and a changed one sends its document gzip-compressed. A daemon that
+does not answer within its timeout is reported as failing; its last good
+document stays in the view. After a round the view is rebuilt once together
+with its indexes (collector -> daemons, collector and client version ->
+daemons), so a filtered ``/fleet`` request is a few set lookups and its
+response is cached until the next round.
+"""
+import gzip
+import http.client
+import json
+import logging
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .auth import TokenIndex
+from .config import read_config_file
+from .history import flatten
+from .server import HarvesterHTTPServer
+from .snapshot import Snapshot, dumps_compact, etag_matches, negotiate_encoding
+
+log = logging.getLogger("dwellir-harvester")
+
+DEFAULT_PORT = 18090
+SCRAPE_STATUSES = ["ok", "error", "pending"]
+# Distinct filtered /fleet responses cached per round
+MAX_CACHED_QUERIES = 256
+
+
+class FleetTarget:
+    """One daemon of the fleet and the state of its last scrape."""
+
+    def __init__(self, name: str, url: str, token: Optional[str] = None, timeout: float = 5.0):
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Daemon {name} needs an http(s) URL, got {url}")
+        self.name = name
+        self.url = url
+        self.host: str = parts.hostname
+        self.token = token
+        self.timeout = timeout
+        self._parts = parts
+        # A bare host:port means the daemon's aggregated /metadata view
+        self.path = (parts.path if parts.path not in ("", "/") else "/metadata") + (f"?{parts.query}" if parts.query else "")
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self.document: Optional[Dict[str, Any]] = None
+        self.etag: Optional[str] = None
+        self.snapshot_version: Optional[int] = None
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.scraped_at: Optional[str] = None
+        self.duration = 0.0
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _connection(self) -> Tuple[http.client.HTTPConnection, bool]:
+        reused = self._conn is not None
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._parts.scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(self.host, self._parts.port, timeout=self.timeout)
+        return self._conn, reused
+
+    def _get(self, headers: Dict[str, str]) -> Tuple[http.client.HTTPResponse, bytes]:
+        for attempt in range(2):
+            conn, reused = self._connection()
+            try:
+                conn.request("GET", self.path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except (BrokenPipeError, ConnectionResetError):
+                # RemoteDisconnected included: the daemon closed the idle
+                # keep-alive connection, so retry once on a new one
+                self.close()
+                if not reused or attempt:
+                    raise
+            except BaseException:
+                self.close()
+                raise
+        if resp.will_close:
+            self.close()
+        return resp, body
+
+    def scrape(self):
+        """GET the daemon's document, conditionally on the last ETag; failures are recorded, not raised."""
+        headers = {"Accept-Encoding": "gzip", "User-Agent": "dwellir-harvester-aggregate"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if self.etag and self.document is not None:
+            headers["If-None-Match"] = self.etag
+        started = time.monotonic()
+        try:
+            resp, body = self._get(headers)
+            if resp.status == 200:
+                if resp.getheader("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                document = json.loads(body)
+                if not isinstance(document, dict):
+                    raise ValueError("document is not a JSON object")
+                self.document = document
+                self.etag = resp.getheader("ETag")
+            elif resp.status != 304:
+                raise ValueError(f"HTTP {resp.status}")
+            version = resp.getheader("X-Snapshot-Version")
+            self.snapshot_version = int(version) if version and version.isdigit() else None
+            self.status, self.error = "ok", None
+        except (OSError, http.client.HTTPException, socket.timeout, ValueError) as e:
+            self.status, self.error = "error", str(e) or type(e).__name__
+            log.debug(f"Scraping {self.name} ({self.url}) failed: {self.error}")
+        self.duration = time.monotonic() - started
+        self.scraped_at = datetime.now(timezone.utc).isoformat()
+
+
+def client_version(section: Dict[str, Any]) -> Optional[str]:
+    """The first ``client_version`` leaf in a collector section's data, e.g. ``workload.client_version``."""
+    for path, value in flatten(section.get("data")):
+        if path.rpartition(".")[2] == "client_version" and value is not None and not isinstance(value, (dict, list)):
+            return str(value)
+    return None
+
+
+def parse_daemons(values: Optional[Iterable[str]], option: str = "--daemon") -> Dict[str, str]:
+    """Parse repeated ``NAME=URL`` options into ``{name: url}``. Raises ValueError."""
+    daemons: Dict[str, str] = {}
+    for value in values or []:
+        name, sep, url = str(value).partition("=")
+        if not sep or not name.strip() or not url.strip():
+            raise ValueError(f"Invalid {option} '{value}', expected NAME=URL")
+        daemons[name.strip()] = url.strip()
+    return daemons
+
+
+def read_fleet_file(path: str) -> Dict[str, Dict[str, Any]]:
+    """Read the ``daemons`` mapping of a YAML, TOML or JSON fleet file. Raises ValueError.
+
+    Each daemon maps to its URL or to ``{url, token, timeout}``.
+    """
+    daemons = read_config_file(path).get("daemons")
+    if not isinstance(daemons, dict):
+        raise ValueError(f"Fleet file {path} must contain a 'daemons' mapping")
+    fleet: Dict[str, Dict[str, Any]] = {}
+    for name, spec in daemons.items():
+        if isinstance(spec, str):
+            spec = {"url": spec}
+        if not isinstance(spec, dict) or not isinstance(spec.get("url"), str):
+            raise ValueError(f"Fleet file {path}: daemon '{name}' needs a url")
+        timeout = spec.get("timeout")
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise ValueError(f"Fleet file {path}: daemon '{name}' timeout must be a positive number")
+        fleet[str(name)] = {key: spec[key] for key in ("url", "token", "timeout") if spec.get(key) is not None}
+    return fleet
+
+
+class Aggregator:
+    """Scrapes a fleet of daemons in rounds and answers filtered queries on the merged view."""
+
+    def __init__(self, targets: Iterable[FleetTarget], concurrency: int = 64):
+        self.targets: Dict[str, FleetTarget] = {target.name: target for target in targets}
+        self.concurrency = max(1, concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="scrape")
+        self.lock = threading.Lock()
+        self.round = 0
+        self.round_duration = 0.0
+        self.scraped_at: Optional[str] = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_collector: Dict[str, Set[str]] = {}
+        self._by_version: Dict[Tuple[str, str], Set[str]] = {}
+        self._queries: Dict[Tuple, Snapshot] = {}
+        self._index: Optional[Snapshot] = None
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for target in self.targets.values():
+            target.close()
+
+    def scrape(self) -> None:
+        """Scrape every daemon once, concurrently, then rebuild the view and its indexes."""
+        started = time.monotonic()
+        list(self._executor.map(FleetTarget.scrape, self.targets.values()))
+        duration = time.monotonic() - started
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        by_collector: Dict[str, Set[str]] = {}
+        by_version: Dict[Tuple[str, str], Set[str]] = {}
+        versions: Dict[str, Dict[str, List[str]]] = {}
+        for name, target in self.targets.items():
+            document = target.document or {}
+            collectors = document.get("collectors") or {}
+            entries[name] = {
+                "url": target.url,
+                "status": target.status,
+                "error": target.error,
+                "scraped_at": target.scraped_at,
+                "duration_seconds": round(target.duration, 6),
+                "snapshot_version": target.snapshot_version,
+                "host": document.get("host"),
+                "collectors": collectors,
+            }
+            for collector, section in collectors.items():
+                by_collector.setdefault(collector, set()).add(name)
+                version = client_version(section) if isinstance(section, dict) else None
+                if version is not None:
+                    by_version.setdefault((collector, version), set()).add(name)
+                    versions.setdefault(collector, {}).setdefault(version, []).append(name)
+
+        statuses = {status: sum(1 for t in self.targets.values() if t.status == status) for status in SCRAPE_STATUSES}
+        index = {
+            "round": self.round + 1,
+            "daemons": len(entries),
+            "status": statuses,
+            "collectors": {
+                collector: {"daemons": sorted(names), "versions": {v: sorted(n) for v, n in sorted(versions.get(collector, {}).items())}}
+                for collector, names in sorted(by_collector.items())
+            },
+        }
+        with self.lock:
+            self.round += 1
+            self.round_duration = duration
+            self.scraped_at = datetime.now(timezone.utc).isoformat()
+            self._entries, self._by_collector, self._by_version = entries, by_collector, by_version
+            self._queries = {}
+            self._index = Snapshot(index, version=self.round)
+        log.info(f"Scraped {len(entries)} daemons in {duration:.2f}s "
+                 f"({statuses['ok']} ok, {statuses['error']} failing)")
+
+    def index(self) -> Optional[Snapshot]:
+        with self.lock:
+            return self._index
+
+    def query(
+        self,
+        collectors: Optional[Set[str]] = None,
+        versions: Optional[Set[str]] = None,
+        statuses: Optional[Set[str]] = None,
+        daemons: Optional[Set[str]] = None,
+        summary: bool = False,
+    ) -> Snapshot:
+        """The fleet view filtered to daemons matching every given filter.
+
+        ``collectors`` keeps daemons running any of them and trims each
+        document to those sections; ``versions`` keeps daemons whose client
+        version (of one of ``collectors``, if given) is one of them. With
+        ``summary`` the documents are left out.
+        """
+        key = tuple(frozenset(f) if f is not None else None for f in (collectors, versions, statuses, daemons)) + (summary,)
+        with self.lock:
+            cached = self._queries.get(key)
+            if cached is not None:
+                return cached
+            round_, entries = self.round, self._entries
+            by_collector, by_version = self._by_collector, self._by_version
+            scraped_at, duration = self.scraped_at, self.round_duration
+
+        names = set(entries) if daemons is None else daemons & set(entries)
+        if collectors is not None:
+            names &= set().union(*(by_collector.get(c, set()) for c in collectors))
+        if versions is not None:
+            names &= set().union(*(found for (c, v), found in by_version.items()
+                                   if v in versions and (collectors is None or c in collectors)))
+        if statuses is not None:
+            names = {name for name in names if entries[name]["status"] in statuses}
+
+        view: Dict[str, Any] = {}
+        for name in sorted(names):
+            entry = entries[name]
+            if summary:
+                entry = {k: v for k, v in entry.items() if k not in ("host", "collectors")}
+            elif collectors is not None:
+                entry = dict(entry, collectors={c: s for c, s in entry["collectors"].items() if c in collectors})
+            view[name] = entry
+        snapshot = Snapshot({
+            "round": round_,
+            "scraped_at": scraped_at,
+            "round_duration_seconds": round(duration, 6),
+            "daemons": view,
+        }, version=round_)
+        with self.lock:
+            if self.round == round_:
+                if len(self._queries) >= MAX_CACHED_QUERIES:
+                    self._queries.clear()
+                self._queries[key] = snapshot
+        return snapshot
+
+
+def _parse_set(values: Optional[List[str]]) -> Optional[Set[str]]:
+    """Parse repeated/comma-separated query values; None means no filter."""
+    if not values:
+        return None
+    return {item.strip() for value in values for item in value.split(",") if item.strip()}
+
+
+def make_handler(aggregator: Aggregator, auth_tokens: Optional[TokenIndex] = None):
+    """HTTP handler serving ``/fleet``, ``/fleet/index`` and ``/healthz``."""
+
+    class AggregateHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            if path != "/healthz" and auth_tokens is not None and len(auth_tokens):
+                header = self.headers.get("Authorization") or ""
+                token = header.split(" ", 1)[1].strip() if header.lower().startswith("bearer ") else self.headers.get("X-Auth-Token")
+                entry = auth_tokens.lookup(token.strip()) if token else None
+                if entry is None or not entry.enabled:
+                    self._send_json(401, {"error": "unauthorized"})
+                    return
+
+            if path == "/fleet":
+                params = parse_qs(query)
+                summary = params.get("summary", ["false"])[0].lower() in ("1", "true", "yes")
+                self._send_snapshot(aggregator.query(
+                    collectors=_parse_set(params.get("collector")),
+                    versions=_parse_set(params.get("version")),
+                    statuses=_parse_set(params.get("status")),
+                    daemons=_parse_set(params.get("daemon")),
+                    summary=summary,
+                ))
+            elif path == "/fleet/index":
+                index = aggregator.index()
+                if index is None:
+                    self._send_json(503, {"error": "no scrape round has finished yet"})
+                else:
+                    self._send_snapshot(index)
+            elif path == "/healthz":
+                self._send_json(200, {"status": "ok", "round": aggregator.round, "daemons": len(aggregator.targets)})
+            else:
+                self._send_json(404, {"error": "not found", "endpoints": ["/fleet", "/fleet/index", "/healthz"]})
+
+        def _send_json(self, status_code: int, payload: Dict[str, Any]):
+            self._send_body(status_code, dumps_compact(payload), {})
+
+        def _send_body(self, status_code: int, body: bytes, headers: Dict[str, str]):
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "no-cache")
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_snapshot(self, snapshot: Snapshot):
+            headers = {"ETag": snapshot.etag, "Vary": "Accept-Encoding", "X-Fleet-Round": str(snapshot.version)}
+            if etag_matches(self.headers.get("If-None-Match"), snapshot.etag):
+                self.send_response(304)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                return
+            encoding = negotiate_encoding(self.headers.get("Accept-Encoding"), list(snapshot.encodings))
+            if encoding != "identity":
+                headers["Content-Encoding"] = encoding
+            self._send_body(200, snapshot.encoded(encoding), headers)
+
+        def log_message(self, fmt, *args):
+            log.debug(f"{self.address_string()} - {fmt % args}")
+
+    return AggregateHandler
+
+
+def run_aggregator(args) -> int:
+    """Run ``dwellir-harvester aggregate`` until interrupted."""
+    try:
+        fleet = read_fleet_file(args.fleet) if args.fleet else {}
+        for name, url in parse_daemons(args.daemons).items():
+            fleet[name] = {"url": url}
+        targets = [
+            FleetTarget(name, spec["url"], token=spec.get("token", args.token), timeout=spec.get("timeout", args.timeout))
+            for name, spec in fleet.items()
+        ]
+    except ValueError as e:
+        log.error(str(e))
+        return 1
+    if not targets:
+        log.error("No daemons to scrape; pass --daemon NAME=URL or --fleet FILE")
+        return 1
+
+    aggregator = Aggregator(targets, concurrency=args.concurrency)
+    auth_tokens = TokenIndex({"token": token} for token in args.auth_tokens)
+    httpd = HarvesterHTTPServer((args.host, args.port), make_handler(aggregator, auth_tokens),
+                                max_connections=args.max_connections)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    threading.Thread(target=httpd.serve_forever, name="http", daemon=True).start()
+    log.info(f"Aggregating {len(targets)} daemons every {args.interval}s; serving on http://{args.host}:{args.port}/fleet")
+    try:
+        while not stopped.is_set():
+            started = time.monotonic()
+            aggregator.scrape()
+            stopped.wait(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
+        httpd.drain()
+        httpd.server_close()
+        aggregator.close()
+    return 0
@@ -0,0 +1,112 @@
+"""Bearer token lookup for the daemon.
+
+Tokens are kept only as HMAC-SHA256 digests under a key generated per
+process, in a dict. A presented token is digested once and looked up, so the
+cost of a request does not grow with the number of tokens. Because the key is
+secret, the dict lookup's timing reveals nothing about stored tokens.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+from typing import Any, Dict, Iterable, List, Optional
+
+log = logging.getLogger("dwellir-harvester")
+
+UNLABELED = "unlabeled"
+
+
+class TokenEntry:
+    """What a token grants: its label, whether it is enabled, and its label's rate limit."""
+
+    __slots__ = ("label", "enabled", "rate_limit", "burst")
+
+    def __init__(self, label: Optional[str], enabled: bool = True,
+                 rate_limit: Optional[float] = None, burst: Optional[float] = None):
+        self.label = label
+        self.enabled = enabled
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else rate_limit
+
+    @property
+    def key(self) -> str:
+        """Label used for per-label metrics and rate limits."""
+        return self.label or UNLABELED
+
+
+class TokenIndex:
+    """Digest -> ``TokenEntry`` map; an empty index means auth is disabled."""
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self._key = secrets.token_bytes(32)
+        self._entries: Dict[bytes, TokenEntry] = {}
+        for entry in entries:
+            # The first entry of a duplicated token wins, as in a linear scan
+            self._entries.setdefault(self._digest(str(entry["token"])), TokenEntry(
+                entry.get("label"),
+                bool(entry.get("enabled", True)),
+                entry.get("rate_limit"),
+                entry.get("burst"),
+            ))
+
+    def _digest(self, token: str) -> bytes:
+        return hmac.new(self._key, token.encode("utf-8"), hashlib.sha256).digest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, token: str) -> Optional[TokenEntry]:
+        return self._entries.get(self._digest(token))
+
+    def labels(self) -> List[str]:
+        return sorted({entry.key for entry in self._entries.values()})
+
+
+def _number(entry: Dict[str, Any], key: str, path: str) -> Optional[float]:
+    value = entry.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"Token entry {entry.get('label')!r} in {path}: {key} must be a positive number")
+    return float(value)
+
+
+def read_token_file(path: str) -> List[Dict[str, Any]]:
+    """Read a JSON or YAML list of ``{token, label, enabled, rate_limit, burst}`` entries.
+
+    Entries without a token are skipped. Raises ValueError if the file is
+    missing, unparsable or not a list.
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"Auth token file {path} does not exist")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+    except OSError as e:
+        raise ValueError(f"Failed to read auth token file {path}: {e}") from None
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        try:
+            import yaml  # type: ignore
+            parsed = yaml.safe_load(raw)
+        except Exception as e:
+            raise ValueError(f"Failed to parse auth token file {path}: {e}") from None
+    if not isinstance(parsed, list):
+        raise ValueError(f"Auth token file {path} must be a list of objects")
+
+    entries = []
+    for entry in parsed:
+        if not isinstance(entry, dict) or "token" not in entry:
+            log.warning(f"Skipping invalid token entry in {path}")
+            continue
+        entries.append({
+            "token": str(entry["token"]),
+            "label": entry.get("label"),
+            "enabled": bool(entry.get("enabled", True)),
+            "rate_limit": _number(entry, "rate_limit", path),
+            "burst": _number(entry, "burst", path),
+        })
+    return entries
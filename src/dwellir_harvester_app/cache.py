@@ -0,0 +1,95 @@
+"""Per-collector result cache for the daemon.
+
+Each collector's last good section is kept with the time it was collected.
+Within the collector's TTL a scheduled run reuses it instead of collecting
+again. When a refresh fails or times out, the last good section keeps being
+served, marked stale and annotated with its age.
+"""
+import copy
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class CacheEntry:
+    """The last good section of a collector."""
+
+    def __init__(self, section: Dict[str, Any], age: float = 0):
+        self.section = section
+        self.collected_at = time.monotonic() - age
+        # Set by ResultCache.expire: still the fallback, but no longer fresh
+        self.expired = False
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.collected_at
+
+
+def is_failed(section: Dict[str, Any]) -> bool:
+    return section.get("meta", {}).get("status") == "failed"
+
+
+class ResultCache:
+    """Last good result per collector, with a per-collector TTL."""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 0):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def ttl(self, name: str) -> float:
+        return self.ttls.get(name, self.default_ttl)
+
+    def fresh(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the cached section if it is younger than the collector's TTL."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and not entry.expired and entry.age < self.ttl(name):
+                return entry.section
+        return None
+
+    def holds(self, name: str, section: Dict[str, Any]) -> bool:
+        """Whether ``section`` is the one cached for ``name``, i.e. it was served from the cache."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry is not None and entry.section is section
+
+    def expire(self, name: str):
+        """Make the next run collect again, e.g. for an on-demand refresh; the section stays the fallback."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.expired = True
+
+    def seed(self, name: str, section: Dict[str, Any], age: float):
+        """Cache a section collected ``age`` seconds ago, e.g. one restored from disk."""
+        with self._lock:
+            self._entries[name] = CacheEntry(section, age)
+
+    def resolve(self, name: str, section: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a run's section and return the section that should be published.
+
+        A successful section is stored and returned as is. A failed one is
+        replaced by a copy of the last good section marked ``stale`` with its
+        ``age_seconds`` and the refresh errors; with nothing cached the failure
+        itself is returned.
+        """
+        with self._lock:
+            if not is_failed(section):
+                entry = self._entries.get(name)
+                # A section served from the cache keeps its original age
+                if entry is None or entry.section is not section:
+                    self._entries[name] = CacheEntry(section)
+                return section
+            entry = self._entries.get(name)
+            if entry is None:
+                return section
+            stale = copy.copy(entry.section)
+            stale["meta"] = dict(entry.section.get("meta", {}))
+            stale["meta"].update({
+                "stale": True,
+                "age_seconds": round(entry.age, 1),
+                "refresh_errors": section.get("meta", {}).get("errors", []),
+            })
+            return stale
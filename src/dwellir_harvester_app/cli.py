@@ -8,7 +8,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Optional
 
-from dwellir_harvester.core import bundled_schema_path, collect_all, load_collectors, run_collector
+# The lib, jsonschema and the collectors are imported inside main() once the
+# arguments are parsed, so --help and usage errors return without loading them
 
 def setup_logging(debug=False):
     """Configure logging with the specified debug level."""
@@ -91,6 +92,112 @@ def build_parser() -> argparse.ArgumentParser:
         default=[],
         help="Additional paths to search for collectors (can be repeated). Also honors HARVESTER_COLLECTOR_PATHS."
     )
+    collect_parser.add_argument(
+        "--format",
+        choices=["json", "ndjson"],
+        default="json",
+        help="Output format: one indented JSON document (default), or NDJSON with one line per "
+             "collector written as it finishes, followed by a harvester envelope line."
+    )
+    collect_parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=4,
+        help="Number of collectors to run concurrently (default: 4)."
+    )
+    collect_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds after which a running collector is abandoned and reported as timed out (default: no limit)."
+    )
+    collect_parser.add_argument(
+        "--collector-timeout",
+        action="append",
+        dest="collector_timeouts",
+        default=[],
+        metavar="NAME=SECONDS",
+        help="Per-collector timeout override (can be repeated)."
+    )
+    collect_parser.add_argument(
+        "--no-index",
+        action="store_false",
+        dest="use_index",
+        help="Ignore the cached collector index and run full collector discovery (the index is rebuilt). "
+             "The index location can be set with HARVESTER_INDEX_PATH."
+    )
+
+    # 'aggregate' command
+    aggregate_parser = subparsers.add_parser(
+        "aggregate",
+        help="Scrape many harvester daemons concurrently and serve one merged fleet view."
+    )
+    aggregate_parser.add_argument(
+        "--daemon",
+        action="append",
+        dest="daemons",
+        default=[],
+        metavar="NAME=URL",
+        help="A daemon to scrape, e.g. node-1=http://10.0.0.5:18080 (can be repeated). "
+             "A URL without a path scrapes /metadata."
+    )
+    aggregate_parser.add_argument(
+        "--fleet",
+        default=None,
+        help="YAML, TOML or JSON file with a 'daemons' mapping of NAME to a URL or to {url, token, timeout}."
+    )
+    aggregate_parser.add_argument(
+        "--token",
+        default=os.environ.get("AGGREGATE_DAEMON_TOKEN"),
+        help="Bearer token sent to the daemons unless the fleet file sets one (default: AGGREGATE_DAEMON_TOKEN)."
+    )
+    aggregate_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="Seconds to wait for a daemon before its scrape counts as failed (default: 5)."
+    )
+    aggregate_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=64,
+        help="Daemons scraped at the same time (default: 64)."
+    )
+    aggregate_parser.add_argument(
+        "--interval",
+        type=float,
+        default=30.0,
+        help="Seconds between the starts of scrape rounds (default: 30)."
+    )
+    aggregate_parser.add_argument(
+        "--host",
+        default="0.0.0.0",
+        help="Address to serve the fleet view on (default: 0.0.0.0)."
+    )
+    aggregate_parser.add_argument(
+        "--port",
+        type=int,
+        default=18090,
+        help="Port to serve the fleet view on (default: 18090)."
+    )
+    aggregate_parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=64,
+        help="Maximum concurrent HTTP connections to the fleet view (default: 64)."
+    )
+    aggregate_parser.add_argument(
+        "--auth-token",
+        action="append",
+        dest="auth_tokens",
+        default=[t for t in [os.environ.get("AGGREGATE_AUTH_TOKEN")] if t],
+        help="Require this bearer token on /fleet requests (can be repeated; default: AGGREGATE_AUTH_TOKEN)."
+    )
+    aggregate_parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Enable debug output."
+    )
     
     return parser
 
@@ -104,10 +211,28 @@ def main(args: Optional[List[str]] = None) -> int:
 
     parser = build_parser()
     parsed_args = parser.parse_args(args)
+    if parsed_args.cmd == "collect":
+        if parsed_args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        if parsed_args.timeout is not None and parsed_args.timeout <= 0:
+            parser.error("--timeout must be positive")
+        from dwellir_harvester_app.scheduler import parse_overrides
+        try:
+            parsed_args.collector_timeouts = parse_overrides(parsed_args.collector_timeouts, "--collector-timeout")
+        except ValueError as e:
+            parser.error(str(e))
+    elif parsed_args.cmd == "aggregate":
+        if parsed_args.concurrency < 1:
+            parser.error("--concurrency must be at least 1")
+        if parsed_args.timeout <= 0 or parsed_args.interval <= 0:
+            parser.error("--timeout and --interval must be positive")
 
     # Configure logging
     log = setup_logging(debug=parsed_args.debug)
     log.debug("CLI main() started")
+    if parsed_args.cmd == "aggregate":
+        from dwellir_harvester_app.aggregate import run_aggregator
+        return run_aggregator(parsed_args)
     if parsed_args.cmd == "collect":
         start_time = datetime.now(timezone.utc)
         
@@ -117,26 +242,34 @@ def main(args: Optional[List[str]] = None) -> int:
         log.debug(f"Parsed arguments: {vars(parsed_args)}")
         
         try:
+            from dwellir_harvester.core import bundled_schema_path
+
+            from dwellir_harvester_app.collector_index import resolve_collectors
+            from dwellir_harvester_app.harvest import build_snapshot, collect_section, timeout_section
+            from dwellir_harvester_app.ndjson import stream_harvest
+            from dwellir_harvester_app.persist import atomic_write_bytes, atomic_writer
+            from dwellir_harvester_app.scheduler import run_batch
+
             # Get the schema path (use bundled schema if not specified)
             schema_path = parsed_args.schema or str(bundled_schema_path())
             
             log.debug(f"Using schema path: {schema_path}")
-            log.debug("Loading all available collectors...")
-            
-            # Load all available collectors
-            all_collectors = load_collectors(plugin_paths=parsed_args.collector_paths)
-            
-            log.debug(f"Found {len(all_collectors)} total collectors")
             log.debug(f"Requested collectors: {parsed_args.collectors}")
             
+            # Resolve only the requested collectors, from the index when it is current
+            available = resolve_collectors(
+                parsed_args.collectors,
+                parsed_args.collector_paths,
+                use_index=getattr(parsed_args, 'use_index', True),
+            )
+            
             # Filter to only the requested collectors
             collectors = []
             for name in parsed_args.collectors:
-                if name not in all_collectors:
+                if name not in available:
                     log.warning(f"Unknown collector '{name}', skipping")
-                    log.debug(f"Available collectors: {list(all_collectors.keys())}")
                     continue
-                collectors.append(all_collectors[name])
+                collectors.append(available[name])
             
             if not collectors:
                 log.error("No valid collectors specified")
@@ -146,13 +279,47 @@ def main(args: Optional[List[str]] = None) -> int:
             log.debug(f"Running {len(collectors)} collectors: {[c.NAME for c in collectors]}")
             log.debug(f"Validation is {'enabled' if parsed_args.validate else 'disabled'}")
             
-            # Run the collectors
-            result = collect_all(
-                [c.NAME for c in collectors],
+            # Run the collectors concurrently; overrunning ones are abandoned and reported as timed out
+            names = [c.NAME for c in collectors]
+            batch_options = {
+                "max_workers": parsed_args.jobs,
+                "timeouts": parsed_args.collector_timeouts,
+                "default_timeout": parsed_args.timeout,
+                "on_timeout": lambda name, timeout, elapsed: timeout_section(
+                    name, timeout, elapsed, version=getattr(available[name], "VERSION", None)
+                ),
+            }
+
+            def run_job(name):
+                return collect_section(name, schema_path, debug=parsed_args.debug, collector_cls=available[name])
+
+            if parsed_args.format == "ndjson":
+                # Each section is written as soon as its collector finishes
+                ndjson_options = dict(
+                    schema_path=schema_path,
+                    validate=getattr(parsed_args, 'validate', True),
+                    debug=parsed_args.debug,
+                    **batch_options,
+                )
+                if parsed_args.output:
+                    try:
+                        with atomic_writer(str(parsed_args.output)) as out:
+                            stream_harvest(out, names, run_job, **ndjson_options)
+                        log.info(f"Results written to {parsed_args.output}")
+                    except OSError as e:
+                        log.error(f"Error writing to {parsed_args.output}: {str(e)}", exc_info=parsed_args.debug)
+                        return 1
+                else:
+                    stream_harvest(sys.stdout.buffer, names, run_job, **ndjson_options)
+                return 0
+
+            sections = run_batch(names, run_job, **batch_options)
+            result = build_snapshot(
+                names,
+                sections,
                 schema_path=schema_path,
                 validate=getattr(parsed_args, 'validate', True),  # Use getattr for backward compatibility
                 debug=parsed_args.debug,
-                plugin_paths=parsed_args.collector_paths
             )
             
             # Output the result
@@ -161,7 +328,7 @@ def main(args: Optional[List[str]] = None) -> int:
             if parsed_args.output:
                 log.debug(f"Writing results to {parsed_args.output}")
                 try:
-                    parsed_args.output.write_text(output)
+                    atomic_write_bytes(str(parsed_args.output), output.encode('utf-8'))
                     log.info(f"Results written to {parsed_args.output}")
                     log.debug(f"Successfully wrote {len(output)} bytes to {parsed_args.output}")
                 except Exception as e:
@@ -0,0 +1,146 @@
+"""Persisted collector-name index for fast CLI runs.
+
+Full discovery imports every built-in collector module, every entry point and
+every module under the plugin paths just to find the few collectors a one-shot
+``collect`` asked for. The index remembers which module and class provide each
+collector NAME, so later runs import only those. It is rebuilt whenever the app
+or lib version, the plugin modules (by mtime) or the installed packages change.
+"""
+import importlib
+import json
+import logging
+import os
+import sys
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
+
+from .registry import CollectorRegistry, plugin_search_paths, scan_plugin_modules
+
+if TYPE_CHECKING:
+    from dwellir_harvester.collector_base import CollectorBase
+
+log = logging.getLogger("dwellir-harvester")
+
+INDEX_FORMAT = 1
+SITE_DIRS = ("site-packages", "dist-packages")
+
+
+def index_path() -> str:
+    """Location of the index: ``HARVESTER_INDEX_PATH`` or the user cache directory."""
+    path = os.environ.get("HARVESTER_INDEX_PATH")
+    if path:
+        return path
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "dwellir-harvester", "collector-index.json")
+
+
+def _package_version(name: str) -> Optional[str]:
+    import importlib.metadata
+
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def index_fingerprint(plugin_paths: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Everything that can change which class provides a collector name.
+
+    The mtimes of the site-packages directories stand in for the installed
+    packages: installing or removing a distribution (and so its entry points)
+    touches its site-packages directory.
+    """
+    paths = plugin_search_paths(plugin_paths)
+    site_mtimes = {}
+    for entry in sys.path:
+        if os.path.basename(entry.rstrip(os.sep)) in SITE_DIRS and os.path.isdir(entry):
+            site_mtimes[entry] = os.stat(entry).st_mtime
+    return {
+        "format": INDEX_FORMAT,
+        "app_version": _package_version("dwellir-harvester"),
+        "lib_version": _package_version("dwellir-harvester-lib"),
+        "python": list(sys.version_info[:2]),
+        "plugin_paths": [os.path.abspath(p) for p in paths],
+        "plugin_modules": {name: list(entry) for name, entry in scan_plugin_modules(paths).items()},
+        "site_packages": site_mtimes,
+    }
+
+
+def load_index(path: str, fingerprint: Dict[str, Any]) -> Optional[Dict[str, Dict[str, str]]]:
+    """Return the index entries at ``path`` if they were built for ``fingerprint``."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.debug(f"Ignoring unreadable collector index {path}: {e}")
+        return None
+    if not isinstance(document, dict) or document.get("fingerprint") != fingerprint:
+        log.debug(f"Collector index {path} is out of date")
+        return None
+    entries = document.get("collectors")
+    return entries if isinstance(entries, dict) else None
+
+
+def save_index(path: str, fingerprint: Dict[str, Any], collectors: Dict[str, type]):
+    """Write the index for ``collectors``; failures are logged and otherwise ignored."""
+    from .persist import atomic_write_bytes
+
+    document = {
+        "fingerprint": fingerprint,
+        "collectors": {
+            name: {"module": cls.__module__, "class": cls.__qualname__}
+            for name, cls in sorted(collectors.items())
+        },
+    }
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        atomic_write_bytes(path, json.dumps(document, indent=2).encode("utf-8"), fsync="none")
+    except OSError as e:
+        log.debug(f"Could not write collector index {path}: {e}")
+
+
+def _import_entry(name: str, entry: Dict[str, str]) -> Optional[Type["CollectorBase"]]:
+    try:
+        obj: Any = importlib.import_module(entry["module"])
+        for attr in entry["class"].split("."):
+            obj = getattr(obj, attr)
+    except Exception as e:
+        log.debug(f"Index entry for {name} is unusable: {e}")
+        return None
+    if not isinstance(obj, type) or getattr(obj, "NAME", None) != name:
+        return None
+    return obj
+
+
+def resolve_collectors(
+    names: List[str],
+    plugin_paths: Optional[List[str]] = None,
+    use_index: bool = True,
+    path: Optional[str] = None,
+) -> Dict[str, Type["CollectorBase"]]:
+    """Return ``{name: collector class}`` for the requested names that exist.
+
+    Served from the index when it is current and knows every name, importing
+    only the modules of those collectors. Otherwise runs full discovery and
+    rewrites the index.
+    """
+    path = path or index_path()
+    fingerprint = index_fingerprint(plugin_paths)
+
+    if use_index:
+        entries = load_index(path, fingerprint)
+        if entries is not None and all(name in entries for name in names):
+            # Plugin modules import as top-level modules, as in full discovery
+            for plugin_path in plugin_search_paths(plugin_paths):
+                if plugin_path not in sys.path:
+                    sys.path.append(plugin_path)
+            imported = {name: _import_entry(name, entries[name]) for name in names}
+            resolved = {name: cls for name, cls in imported.items() if cls is not None}
+            if len(resolved) == len(imported):
+                log.debug(f"Resolved {len(resolved)} collector(s) from index {path}")
+                return resolved
+
+    all_collectors = CollectorRegistry(plugin_paths).load()
+    save_index(path, fingerprint, all_collectors)
+    return {name: all_collectors[name] for name in names if name in all_collectors}
@@ -0,0 +1,177 @@
+"""Daemon configuration files.
+
+``--config PATH`` reads daemon options from a YAML, TOML or JSON file, chosen
+by extension. Top-level keys are the daemon's long options, with dashes or
+underscores (``max-connections``, ``collector_timeout``); options given on the
+command line win over the file. ``collectors`` may be a mapping of per-collector
+settings instead of a list, and so may the ``collectors`` of a target::
+
+    collectors:
+      host: {}
+      polkadot:
+        interval: 60
+        timeout: 20
+        ttl: 120
+        memory_limit: 512     # MiB, with isolation: process
+        params: {rpc_url: "http://127.0.0.1:9944"}
+    targets:
+      relay:
+        collectors:
+          polkadot: {interval: 30, params: {rpc_url: "http://127.0.0.1:9945"}}
+
+Per-collector settings become the same ``collector_intervals`` /
+``collector_timeouts`` / ``collector_ttls`` / ``collector_memory_limits`` /
+``collector_cpu_limits`` entries the command-line overrides produce, keyed
+``target/collector`` for target collectors.
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .targets import job_key
+
+CONFIG_FORMATS = {".yaml": "yaml", ".yml": "yaml", ".toml": "toml", ".json": "json"}
+# Per-collector setting -> config key of the override dict it feeds
+COLLECTOR_SETTINGS = {
+    "interval": "collector_intervals",
+    "timeout": "collector_timeouts",
+    "ttl": "collector_ttls",
+    "memory_limit": "collector_memory_limits",
+    "cpu_limit": "collector_cpu_limits",
+}
+OVERRIDE_KEYS = tuple(COLLECTOR_SETTINGS.values())
+
+
+def _parse_yaml(raw: str) -> Any:
+    try:
+        import yaml  # type: ignore
+    except ImportError:
+        raise ValueError("YAML config files need PyYAML (pip install pyyaml)") from None
+    try:
+        return yaml.safe_load(raw)
+    except yaml.YAMLError as e:
+        raise ValueError(str(e)) from None
+
+
+def _parse_toml(raw: str) -> Any:
+    try:
+        import tomllib  # type: ignore
+    except ImportError:
+        try:
+            import tomli as tomllib  # type: ignore
+        except ImportError:
+            raise ValueError("TOML config files need Python 3.11 or tomli (pip install tomli)") from None
+    return tomllib.loads(raw)
+
+
+def read_config_file(path: str) -> Dict[str, Any]:
+    """Parse a config file into a dict with ``_``-normalized top-level keys. Raises ValueError."""
+    kind = CONFIG_FORMATS.get(os.path.splitext(path)[1].lower())
+    if kind is None:
+        raise ValueError(f"Config file {path} must end in one of {', '.join(sorted(CONFIG_FORMATS))}")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+    except OSError as e:
+        raise ValueError(f"Cannot read config file {path}: {e}") from None
+    try:
+        if kind == "yaml":
+            document = _parse_yaml(raw)
+        elif kind == "toml":
+            document = _parse_toml(raw)
+        else:
+            document = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid config file {path}: {e}") from None
+    if document is None:
+        return {}
+    if not isinstance(document, dict):
+        raise ValueError(f"Config file {path} must contain a mapping of options")
+    return {str(key).replace("-", "_"): value for key, value in document.items()}
+
+
+def _expand_collectors(spec: Any, target: Any = None) -> Tuple[List[str], Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Split a list or mapping of collectors into ``(names, overrides, params)``."""
+    where = f"target '{target}'" if target else "collectors"
+    if isinstance(spec, str):
+        spec = [spec]
+    if isinstance(spec, list):
+        return [str(name) for name in spec], {}, {}
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where} must be a list of names or a mapping of per-collector settings")
+
+    overrides: Dict[str, Dict[str, Any]] = {key: {} for key in OVERRIDE_KEYS}
+    params: Dict[str, Dict[str, Any]] = {}
+    for name, settings in spec.items():
+        settings = settings or {}
+        if not isinstance(settings, dict):
+            raise ValueError(f"Settings of collector '{name}' in {where} must be a mapping")
+        unknown = set(settings) - set(COLLECTOR_SETTINGS) - {"params"}
+        if unknown:
+            raise ValueError(f"Unknown setting(s) {sorted(unknown)} for collector '{name}' in {where}")
+        for setting, key in COLLECTOR_SETTINGS.items():
+            if setting in settings:
+                overrides[key][job_key(target, name)] = settings[setting]
+        if settings.get("params"):
+            if not isinstance(settings["params"], dict):
+                raise ValueError(f"params of collector '{name}' in {where} must be a mapping")
+            params[name] = dict(settings["params"])
+    return [str(name) for name in spec], overrides, params
+
+
+def expand_config(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten per-collector settings of a parsed config file. Raises ValueError.
+
+    Returns the file's options with ``collectors`` as a list of names,
+    the per-collector override dicts (``collector_intervals`` and the rest of
+    ``OVERRIDE_KEYS``) as ``{job key: number}``, ``collector_params`` as ``{collector: kwargs}`` and
+    ``targets`` as ``{name: {"collectors": [...], "params": {...}}}``.
+    """
+    values = dict(values)
+    overrides: Dict[str, Dict[str, Any]] = {}
+    for key in OVERRIDE_KEYS:
+        given = values.pop(key, None) or {}
+        if not isinstance(given, dict):
+            raise ValueError(f"{key} must be a mapping of collector name to numbers")
+        overrides[key] = dict(given)
+
+    def merge(extra: Dict[str, Dict[str, Any]]):
+        for key, entries in extra.items():
+            overrides[key].update(entries)
+
+    params = values.get("collector_params") or {}
+    if not isinstance(params, dict) or not all(isinstance(kwargs, dict) for kwargs in params.values()):
+        raise ValueError("collector_params must map collector names to mappings of parameters")
+    if "collectors" in values:
+        values["collectors"], extra, params_from_settings = _expand_collectors(values["collectors"])
+        merge(extra)
+        params = {**params, **params_from_settings}
+    if params:
+        values["collector_params"] = params
+
+    if "targets" in values:
+        targets = {}
+        if not isinstance(values["targets"], dict):
+            raise ValueError("targets must be a mapping of target name to its collectors")
+        for name, spec in values["targets"].items():
+            if not isinstance(spec, dict):
+                spec = {"collectors": spec}
+            collectors, extra, target_params = _expand_collectors(spec.get("collectors", []), name)
+            merge(extra)
+            target_params = {**(spec.get("params") or {}), **target_params}
+            targets[name] = {"collectors": collectors, "params": target_params}
+        values["targets"] = targets
+
+    for key, entries in overrides.items():
+        if entries:
+            try:
+                values[key] = {name: float(seconds) for name, seconds in entries.items()}
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} values must be numbers") from None
+    return values
+
+
+def load_config_file(path: str, aliases: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Read and expand a config file, renaming keys through ``aliases`` first. Raises ValueError."""
+    values = read_config_file(path)
+    return expand_config({(aliases or {}).get(key, key): value for key, value in values.items()})
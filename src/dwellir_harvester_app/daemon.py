@@ -2,17 +2,47 @@
 import os
 import sys
 import json
+import math
 import time
 import logging
 import threading
 import argparse
-import hmac
-from pathlib import Path
+import signal
+from collections import deque
+from urllib.parse import parse_qs
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Callable, Dict, Any, Optional, List, Set, Tuple
 
 # Import core functionality from the package
-from dwellir_harvester.core import collect_all, bundled_schema_path
+from dwellir_harvester.core import bundled_schema_path
+
+from dwellir_harvester_app.auth import TokenIndex, read_token_file
+from dwellir_harvester_app.cache import ResultCache
+from dwellir_harvester_app.coalesce import SingleFlight
+from dwellir_harvester_app.config import OVERRIDE_KEYS, load_config_file
+from dwellir_harvester_app.delta import PatchNotRepresentable, merge_patch
+from dwellir_harvester_app.harvest import build_snapshot, collect_section, snapshot_sections
+from dwellir_harvester_app.history import DEFAULT_LIMIT, HistoryStore, parse_time
+from dwellir_harvester_app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, HarvesterMetrics
+from dwellir_harvester_app.ndjson import CONTENT_TYPE as NDJSON_CONTENT_TYPE, document_lines, update_lines
+from dwellir_harvester_app.ratelimit import RateLimiter, parse_rate_limits
+from dwellir_harvester_app.persist import FSYNC_MODES, OUTPUT_FORMATS, OutputWriter, load_output
+from dwellir_harvester_app.projection import MAX_PROJECTIONS, Projection, compile_projection
+from dwellir_harvester_app.push import PUSH_MODES, Pusher, Spool, check_push_url
+from dwellir_harvester_app.registry import CollectorRegistry
+from dwellir_harvester_app.scheduler import CollectorJob, CollectorScheduler, parse_overrides
+from dwellir_harvester_app.server import SERVER_MODES, HarvesterHTTPServer
+from dwellir_harvester_app.snapshot import Snapshot, available_encodings, dumps_compact, encode_body, etag_matches, negotiate_encoding
+from dwellir_harvester_app.stream import SnapshotNotifier, format_event, stream_update, stream_view
+from dwellir_harvester_app.targets import (
+    load_targets,
+    parse_target_params,
+    parse_targets,
+    split_job_key,
+    target_view,
+)
+from dwellir_harvester_app.validation import get_validator
+from dwellir_harvester_app.workers import ISOLATION_MODES, MIB, WorkerPool
 
 # Configure logging
 def setup_logging(debug=False):
@@ -50,66 +80,181 @@ def setup_logging(debug=False):
 # Initialize logging with default level (will be updated in main)
 log = logging.getLogger("dwellir-harvester")
 
+# Paths served by the daemon
+ROUTES = [
+    "/metadata", "/metadata/changes", "/metadata/stream", "/metadata/ndjson",
+    "/collectors", "/history", "/metrics", "/healthz", "/collect",
+]
+
+# Failed authentications allowed per client IP (rate per second, burst) unless
+# --rate-limit unauthorized=RATE[/BURST] says otherwise
+AUTH_FAILURE_LIMIT = (1.0, 10.0)
+
+# Largest POST body read (and discarded); POST /collect takes its options in the query
+MAX_POST_BODY = 65536
+
+# Config keys whose change means rescheduling the collector jobs
+JOB_KEYS = {
+    'collectors', 'targets', 'interval', 'collector_intervals',
+    'collector_timeout', 'collector_timeouts', 'collector_params',
+}
+OUTPUT_KEYS = {'output_file', 'output_format', 'fsync', 'output_refresh'}
+HISTORY_KEYS = {'history_file', 'history_max_bytes'}
+PUSH_KEYS = {
+    'push_url', 'push_token', 'push_mode', 'push_batch_size', 'push_delay', 'push_encoding',
+    'push_spool', 'push_spool_max_bytes', 'push_timeout', 'push_max_backoff',
+}
+# Config keys whose change means a new worker process pool
+WORKER_KEYS = {
+    'isolation', 'worker_max_runs', 'worker_max_rss', 'max_workers',
+    'collector_paths', 'plugin_watch_interval',
+}
+# The listening socket is not replaced on reload
+RESTART_KEYS = {'host', 'port', 'server_mode'}
+
 class CollectorDaemon:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.latest_results: Dict[str, Any] = {}
+        # Versions are seeded from the start time so they keep increasing across
+        # restarts and a client's old version never matches a new process' ring.
+        self.snapshot = Snapshot(self.latest_results, version=time.time_ns() // 1_000_000)
+        self.recent_snapshots: deque = deque([self.snapshot], maxlen=max(1, config.get('delta_history', 32)))
+        self._publish_lock = threading.Lock()
+        self.notifier = SnapshotNotifier(self.snapshot.version)
+        self.sections: Dict[str, Dict[str, Any]] = {}
+        # Jobs still served from the snapshot restored at startup
+        self.restored: Set[str] = set()
+        self.restored_from: Optional[Tuple[str, float]] = None  # (path, mtime)
         self.lock = threading.Lock()
         self.running = False
-        self.worker_thread: Optional[threading.Thread] = None
         self.httpd: Optional[HTTPServer] = None
-        self.output_file = config.get('output_file', '/var/lib/dwellir-harvester/harvested-data.json')
+        # Returns a fresh config dict for reload(); set by main() when a config file is used
+        self.config_loader: Optional[Callable[[], Dict[str, Any]]] = None
+        self._reload_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.metrics = HarvesterMetrics()
+        self.rate_limiter = RateLimiter()
+        self.coalescer = SingleFlight()
         self.auth_tokens = self._load_auth_tokens(config)
         self.collector_paths = config.get('collector_paths', [])
+        self.targets = load_targets(config.get('targets'))
+        self.job_names = self._job_names(config)
+        self.registry = CollectorRegistry(
+            self.collector_paths,
+            watch_interval=config.get('plugin_watch_interval', 10),
+        )
+        available = self.registry.load()
+        for name in dict.fromkeys(split_job_key(key)[1] for key in self.job_names):
+            if name not in available:
+                log.warning(f"Unknown collector '{name}'; it will be reported as failed")
+        self.cache = ResultCache(
+            self._per_job(config.get('collector_ttls')),
+            default_ttl=config.get('cache_ttl', 0),
+        )
+        self.scheduler = CollectorScheduler(
+            self._build_jobs(config),
+            run_job=self._collect_one,
+            on_result=self._on_section,
+            max_workers=config.get('max_workers', 4),
+            jitter=config.get('jitter', 0.1),
+            on_timeout=self._on_timeout,
+            on_run=self._record_run,
+        )
+        self.workers: Optional[WorkerPool] = None
+        self._configure_workers(config)
         
+        self._configure_output(config)
+        self.history: Optional[HistoryStore] = None
+        self._configure_history(config)
+        self.pusher: Optional[Pusher] = None
+        self._configure_push(config)
+
+    def _build_history(self, config: Dict[str, Any]) -> Optional[HistoryStore]:
+        path = config.get('history_file')
+        if not path:
+            return None
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        return HistoryStore(path, max_bytes=config.get('history_max_bytes', 64 * 1024 * 1024))
+
+    def _install_history(self, history: Optional[HistoryStore]):
+        old, self.history = self.history, history
+        if old is not None:
+            old.close()
+
+    def _configure_history(self, config: Dict[str, Any]):
+        self._install_history(self._build_history(config))
+
+    def _build_pusher(self, config: Dict[str, Any]) -> Optional[Pusher]:
+        """A pusher for ``push_url``, not yet started. Raises ValueError for an invalid push config."""
+        url = config.get('push_url')
+        if not url:
+            return None
+        return Pusher(
+            url,
+            Spool(config.get('push_spool'), max_bytes=config.get('push_spool_max_bytes', 64 * 1024 * 1024)),
+            mode=config.get('push_mode', 'delta'),
+            batch_size=config.get('push_batch_size', 50),
+            batch_delay=config.get('push_delay', 5.0),
+            encoding=config.get('push_encoding', 'gzip'),
+            token=config.get('push_token') or os.environ.get('DAEMON_PUSH_TOKEN'),
+            timeout=config.get('push_timeout', 10.0),
+            max_backoff=config.get('push_max_backoff', 300.0),
+            on_records=lambda result, count: self.metrics.push_records.inc(count, result=result),
+        )
+
+    def _install_pusher(self, pusher: Optional[Pusher]):
+        """Start ``pusher`` in place of any previous one."""
+        old, self.pusher = self.pusher, pusher
+        if old is not None:
+            old.stop()
+        if pusher is not None:
+            pusher.start()
+            log.info(f"Pushing snapshots to {pusher.url}")
+
+    def _configure_push(self, config: Dict[str, Any]):
+        """Start sending publishes to ``push_url``, replacing any previous pusher.
+
+        Raises ValueError for an invalid push config.
+        """
+        self._install_pusher(self._build_pusher(config))
+
+    def _build_output(self, config: Dict[str, Any]) -> Tuple[str, Optional[OutputWriter]]:
+        output_file = config.get('output_file', '/var/lib/dwellir-harvester/harvested-data.json')
+        writer = None
+
         # Ensure output directory exists
-        if self.output_file:
-            output_dir = os.path.dirname(self.output_file)
+        if output_file:
+            output_dir = os.path.dirname(output_file)
             os.makedirs(output_dir, exist_ok=True)
+            writer = OutputWriter(
+                output_file,
+                fsync=config.get('fsync', 'file'),
+                output_format=config.get('output_format', 'indent'),
+                refresh=config.get('output_refresh', 3600),
+            )
+        return output_file, writer
 
-    def _load_auth_tokens(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _configure_output(self, config: Dict[str, Any]):
+        self.output_file, self.writer = self._build_output(config)
+
+    def _token_file(self, config: Dict[str, Any]) -> Optional[str]:
+        return config.get("auth_token_file") or os.environ.get("DAEMON_AUTH_TOKEN_FILE")
+
+    def _load_auth_tokens(self, config: Dict[str, Any]) -> TokenIndex:
         """Load allowed auth tokens from env/config/file.
-        
-        Returns a list of dicts: {"token": str, "label": Optional[str], "enabled": bool}
-        Empty list means auth disabled.
+
+        Returns the token index; an empty index means auth disabled.
         """
         tokens: List[Dict[str, Any]] = []
 
-        token_file = config.get("auth_token_file") or os.environ.get("DAEMON_AUTH_TOKEN_FILE")
+        token_file = self._token_file(config)
         if token_file:
-            path = Path(token_file)
-            if not path.exists():
-                log.error(f"Auth token file {token_file} does not exist; auth disabled")
-                return []
             try:
-                raw = path.read_text()
-                parsed: Any = None
-                try:
-                    parsed = json.loads(raw)
-                except Exception:
-                    try:
-                        import yaml  # type: ignore
-                        parsed = yaml.safe_load(raw)
-                    except Exception as e:
-                        log.error(f"Failed to parse auth token file {token_file}: {e}; auth disabled")
-                        return []
-                if not isinstance(parsed, list):
-                    log.error(f"Auth token file {token_file} must be a list of objects; auth disabled")
-                    return []
-                for entry in parsed:
-                    if not isinstance(entry, dict) or "token" not in entry:
-                        log.warning(f"Skipping invalid token entry in {token_file}: {entry!r}")
-                        continue
-                    tokens.append(
-                        {
-                            "token": str(entry["token"]),
-                            "label": entry.get("label"),
-                            "enabled": bool(entry.get("enabled", True)),
-                        }
-                    )
-            except Exception as e:
-                log.error(f"Failed to read auth token file {token_file}: {e}; auth disabled")
-                return []
+                tokens = read_token_file(token_file)
+            except ValueError as e:
+                log.error(f"{e}; auth disabled")
+                return TokenIndex()
         else:
             env_tokens = config.get("auth_tokens") or os.environ.get("DAEMON_AUTH_TOKENS")
             if env_tokens:
@@ -126,7 +271,43 @@ class CollectorDaemon:
             log.info(f"Auth enabled with {len(tokens)} token(s)")
         else:
             log.info("Auth disabled (no tokens configured)")
-        return tokens
+        return TokenIndex(tokens)
+
+    def reload_tokens(self) -> bool:
+        """Re-read the token file and swap in a new index in one assignment.
+
+        In-flight requests finish against the index they started with. A file
+        that cannot be read or parsed keeps the current tokens.
+        """
+        token_file = self._token_file(self.config)
+        if not token_file:
+            return False
+        try:
+            index = TokenIndex(read_token_file(token_file))
+        except ValueError as e:
+            log.error(f"{e}; keeping the current {len(self.auth_tokens)} token(s)")
+            self.metrics.token_reloads.inc(result="error")
+            return False
+        self.auth_tokens = index
+        self.metrics.token_reloads.inc(result="success")
+        log.info(f"Reloaded {len(index)} token(s) from {token_file}")
+        return True
+
+    def _watch_tokens(self):
+        """Reload the token file when it changes, checking every ``token_watch_interval`` seconds."""
+        def state():
+            try:
+                stat = os.stat(self._token_file(self.config) or '')
+            except OSError:
+                return None
+            return stat.st_mtime_ns, stat.st_size
+
+        last = state()
+        while not self._stopped.wait(self.config.get('token_watch_interval', 5)):
+            current = state()
+            if current is not None and current != last:
+                self.reload_tokens()
+            last = current
 
     def _extract_presented_token(self, headers) -> Optional[str]:
         """Extract token from Authorization Bearer or X-Auth-Token."""
@@ -138,119 +319,568 @@ class CollectorDaemon:
             return alt.strip()
         return None
 
-    def _authorize(self, headers) -> Tuple[bool, Optional[str], str]:
+    def _authorize(self, headers, client: Optional[str] = None) -> Tuple[bool, Optional[str], str, float]:
         """Check request headers against configured tokens.
         
-        Returns (allowed, label, reason)
+        Returns (allowed, label, reason, retry_after). Accepted tokens are
+        counted per label and held to their label's rate limit; ``retry_after``
+        is non-zero only for reason ``rate_limited``. Failures are counted per
+        ``client`` address, and a client over its ``unauthorized`` rate limit is
+        answered ``rate_limited`` before its token is looked up.
         """
-        if not self.auth_tokens:
-            return True, None, "auth_disabled"
+        tokens = self.auth_tokens
+        if not tokens:
+            return True, None, "auth_disabled", 0.0
+
+        rate, burst = (self.config.get('rate_limits') or {}).get('unauthorized', AUTH_FAILURE_LIMIT)
+        failures = f"unauthorized {client}" if client and rate else None
+        if failures:
+            retry_after = self.rate_limiter.peek(failures)
+            if retry_after:
+                self.metrics.auth_rejections.inc(reason="too_many_failures")
+                return False, None, "rate_limited", retry_after
 
         presented = self._extract_presented_token(headers)
-        if not presented:
-            return False, None, "missing_token"
+        entry = tokens.lookup(presented) if presented else None
+        if entry is None or not entry.enabled:
+            if failures:
+                self.rate_limiter.check(failures, rate, burst)
+            if not presented:
+                return False, None, "missing_token", 0.0
+            if entry is None:
+                return False, None, "invalid_token", 0.0
+            return False, entry.label, "revoked", 0.0
+        self.metrics.auth_requests.inc(label=entry.key)
+        if entry.rate_limit:
+            burst = entry.burst if entry.burst is not None else entry.rate_limit
+            retry_after = self.rate_limiter.check(entry.key, entry.rate_limit, burst)
+            if retry_after:
+                self.metrics.rate_limited.inc(label=entry.key)
+                return False, entry.label, "rate_limited", retry_after
+        return True, entry.label, "ok", 0.0
+
+    def _job_names(self, config: Dict[str, Any], targets: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Untargeted collectors keep their plain names; target jobs are keyed target/collector."""
+        targets = self.targets if targets is None else targets
+        return list(config['collectors']) + [
+            key for target in targets.values() for key in target.job_keys()
+        ]
+
+    def _per_job(self, overrides: Optional[Dict[str, float]], job_names: Optional[List[str]] = None) -> Dict[str, float]:
+        """Expand per-collector overrides to job keys; ``target/collector`` entries win over ``collector`` ones."""
+        overrides = overrides or {}
+        expanded = {}
+        for key in self.job_names if job_names is None else job_names:
+            collector = split_job_key(key)[1]
+            if key in overrides:
+                expanded[key] = overrides[key]
+            elif collector in overrides:
+                expanded[key] = overrides[collector]
+        return expanded
+
+    def _build_jobs(self, config: Dict[str, Any], job_names: Optional[List[str]] = None) -> List[CollectorJob]:
+        """Create one scheduler job per configured collector and per target collector.
+
+        Each job uses its ``collector_intervals`` entry or the global ``interval``,
+        and its ``collector_timeouts`` entry or the global ``collector_timeout``,
+        which in turn defaults to the job's interval.
+        """
+        job_names = self.job_names if job_names is None else job_names
+        interval = config.get('interval', 300)
+        intervals = self._per_job(config.get('collector_intervals'), job_names)
+        timeouts = self._per_job(config.get('collector_timeouts'), job_names)
+        default_timeout = config.get('collector_timeout')
+        jobs = []
+        for name in job_names:
+            job_interval = intervals.get(name, interval)
+            job_timeout = timeouts.get(name, default_timeout or job_interval)
+            jobs.append(CollectorJob(name, interval=job_interval, timeout=job_timeout))
+        return jobs
 
-        for entry in self.auth_tokens:
-            token = entry.get("token")
-            enabled = entry.get("enabled", True)
-            label = entry.get("label")
-            if hmac.compare_digest(str(presented), str(token)):
-                if enabled:
-                    return True, label, "ok"
-                return False, label, "revoked"
+    def _schema_path(self) -> str:
+        return self.config.get('schema_path') or str(bundled_schema_path())
 
-        return False, None, "invalid_token"
+    def _collect_one(self, name: str) -> Dict[str, Any]:
+        """Run a single collector into its snapshot section.
+
+        A cached section younger than the collector's TTL is returned instead.
+        """
+        cached = self.cache.fresh(name)
+        if cached is not None:
+            log.debug(f"Collector {name} result is still fresh; not collecting")
+            return cached
+
+        target, collector = split_job_key(name)
+        if target:
+            params = self.targets[target].params.get(collector)
+        else:
+            params = (self.config.get('collector_params') or {}).get(collector)
+        workers = self.workers
+        if workers is not None:
+            memory_limit = self._per_job(self.config.get('collector_memory_limits')).get(
+                name, self.config.get('worker_memory_limit'))
+            section = workers.run(
+                collector,
+                params,
+                job=name,
+                debug=self.config.get('debug', False),
+                memory_limit=int(memory_limit * MIB) if memory_limit else None,
+                cpu_limit=self._per_job(self.config.get('collector_cpu_limits')).get(
+                    name, self.config.get('worker_cpu_limit')),
+            )
+        else:
+            section = collect_section(
+                collector,
+                self._schema_path(),
+                debug=self.config.get('debug', False),
+                plugin_paths=self.collector_paths,
+                collector_kwargs={collector: params} if params else None,
+                registry=self.registry,
+            )
+        return section
+
+    def _record_run(self, name: str, section: Dict[str, Any], duration: float):
+        """Count a finished run that was not discarded as late; cache hits are not runs."""
+        if self.cache.holds(name, section):
+            return
+        status = section.get("meta", {}).get("status") or "success"
+        self.metrics.collector_duration.observe(duration, collector=name)
+        self.metrics.collector_runs.inc(collector=name, status=status)
+        if status != "failed":
+            self.metrics.collector_last_success.set(time.time(), collector=name)
+
+    def _on_timeout(self, name: str):
+        self.metrics.collector_runs.inc(collector=name, status="timeout")
+        workers = self.workers
+        if workers is not None:
+            # A thread cannot be stopped, but a worker process can
+            workers.cancel(name)
+
+    def _build_workers(self, config: Dict[str, Any]) -> Optional[WorkerPool]:
+        """A worker process pool for ``isolation: process``, else None."""
+        if config.get('isolation', 'thread') != 'process':
+            return None
+        max_rss = config.get('worker_max_rss')
+        return WorkerPool(
+            config.get('max_workers', 4),
+            plugin_paths=config.get('collector_paths', []),
+            watch_interval=config.get('plugin_watch_interval', 10),
+            max_runs=config.get('worker_max_runs', 100),
+            max_rss=int(max_rss * MIB) if max_rss else None,
+            on_recycle=lambda reason: self.metrics.worker_recycles.inc(reason=reason),
+        )
+
+    def _install_workers(self, workers: Optional[WorkerPool]):
+        """Use ``workers`` in place of any previous pool; runs in flight on the old one finish first."""
+        old, self.workers = self.workers, workers
+        if workers is not None:
+            log.info(f"Running collectors in {workers.size} worker process(es)")
+        if old is not None:
+            old.close(cancel=False)
+
+    def _configure_workers(self, config: Dict[str, Any]):
+        """Start a worker process pool for ``isolation: process``, replacing any previous one."""
+        self._install_workers(self._build_workers(config))
+
+    def _on_section(self, name: str, section: Dict[str, Any]):
+        """Merge a finished collector section and publish a new snapshot.
+
+        Failed runs fall back to the collector's last good section, marked stale.
+        """
+        section = self.cache.resolve(name, section)
+        with self.lock:
+            if name not in self.job_names:
+                # A run of a job removed by a config reload
+                return
+            if self.sections.get(name) is section:
+                return
+            self.sections[name] = section
+            self.restored.discard(name)
+        self._publish()
+
+    def _publish(self, persist: bool = True) -> Dict[str, Any]:
+        """Assemble the current sections into ``latest_results`` and persist it.
+
+        The snapshot is serialized and compressed here, once per publish, so
+        ``/metadata`` requests only hand out cached bytes. Publishes are
+        serialized so snapshot versions follow the order sections arrived in.
+        """
+        with self._publish_lock:
+            return self._publish_locked(persist)
+
+    def _publish_locked(self, persist: bool = True) -> Dict[str, Any]:
+        with self.lock:
+            sections = dict(self.sections)
+            version = self.snapshot.version + 1
+            restored = sorted(name for name in self.restored if name in sections)
+            restored_from = self.restored_from
+
+        validate = self.config.get('validate', True)
+        try:
+            result = build_snapshot(
+                self.job_names,
+                sections,
+                schema_path=self._schema_path(),
+                validate=validate,
+                debug=self.config.get('debug', False),
+            )
+            if validate:
+                stats = get_validator(self._schema_path()).last_stats
+                if stats:
+                    self.metrics.validation_duration.observe(stats["duration"])
+        except Exception as e:
+            log.error(f"Failed to build snapshot: {e}")
+            result = {
+                "error": str(e),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+            }
+        if restored and restored_from is not None and isinstance(result.get("harvester"), dict):
+            path, saved_at = restored_from
+            result["harvester"]["restored"] = {
+                "path": path,
+                "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(saved_at)),
+                "age_seconds": round(time.time() - saved_at, 1),
+                "collectors": restored,
+            }
+        start = time.perf_counter()
+        snapshot = Snapshot(result, version=version)
+        self.metrics.serialization_duration.observe(time.perf_counter() - start)
+        self.metrics.snapshot_version.set(version)
+
+        # Update the latest results
+        with self.lock:
+            self.latest_results = result
+            self.snapshot = snapshot
+            self.recent_snapshots.append(snapshot)
+        self.notifier.notify(version)
+
+        # A restored snapshot was recorded when it was first published
+        history = self.history
+        if history is not None and persist:
+            try:
+                history.record(result, version)
+            except Exception as e:
+                log.error(f"Failed to record history in {history.path}: {e}")
+
+        pusher = self.pusher
+        if pusher is not None and persist:
+            try:
+                pusher.enqueue(snapshot)
+            except OSError as e:
+                log.error(f"Failed to spool snapshot {version} for push: {e}")
+
+        # Write results to file if output_file is set; done outside self.lock
+        # so HTTP requests never wait on disk I/O
+        if self.writer and persist:
+            try:
+                if self.writer.write(result, snapshot.body):
+                    self.metrics.output_writes.inc(result="written")
+                    self.metrics.output_write_duration.observe(self.writer.last_duration)
+                else:
+                    self.metrics.output_writes.inc(result="unchanged")
+            except Exception as e:
+                self.metrics.output_writes.inc(result="error")
+                log.error(f"Failed to write to output file {self.output_file}: {e}")
+
+        return result
+
+    def restore_snapshot(self) -> bool:
+        """Publish the last persisted snapshot, marked stale, until fresh results replace it.
+
+        Sections of the configured jobs are read back from ``output_file`` with
+        ``meta.stale`` and the file's age, and ``harvester.restored`` lists the
+        ones not refreshed yet. They are also seeded into the result cache, so a
+        collector still within its TTL is not collected again and one that
+        fails falls back to them. The file itself is not rewritten.
+        """
+        if not self.output_file:
+            return False
+        try:
+            document, saved_at = load_output(self.output_file)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not restore the last snapshot from {self.output_file}: {e}")
+            return False
+
+        age = max(0.0, time.time() - saved_at)
+        sections = snapshot_sections(document)
+        restored = {}
+        for name in self.job_names:
+            section = sections.get(name)
+            if not isinstance(section, dict) or section.get("meta", {}).get("status") == "failed":
+                continue
+            section = dict(section)
+            section["meta"] = dict(section.get("meta", {}), stale=True, age_seconds=round(age, 1))
+            self.cache.seed(name, section, age)
+            restored[name] = section
+        if not restored:
+            return False
+
+        with self.lock:
+            self.sections.update(restored)
+            self.restored = set(restored)
+            self.restored_from = (self.output_file, saved_at)
+        self._publish(persist=False)
+        log.info(f"Restored {len(restored)} section(s) from {self.output_file} ({age:.0f}s old)")
+        return True
+
+    def target_snapshot(self, target: str) -> Snapshot:
+        """The current snapshot limited to one target, derived once per published version."""
+        with self.lock:
+            snapshot = self.snapshot
+        view = snapshot.views.get(target)
+        if view is None:
+            def build() -> Snapshot:
+                built = Snapshot(target_view(snapshot.result, target), version=snapshot.version)
+                snapshot.views[target] = built
+                return built
+
+            view = self.coalesce('/metadata/{target}', ('view', snapshot.version, target), build)
+        return view
+
+    def projected_snapshot(self, snapshot: Snapshot, projection: Projection, route: str = '/metadata') -> Snapshot:
+        """``snapshot`` limited to a projection, derived once per snapshot and query."""
+        view = snapshot.projections.get(projection.key)
+        if view is None:
+            def build() -> Snapshot:
+                built = Snapshot(projection.apply(snapshot.result), version=snapshot.version)
+                if len(snapshot.projections) < MAX_PROJECTIONS:
+                    snapshot.projections[projection.key] = built
+                return built
+
+            view = self.coalesce(route, ('projection', snapshot.version, snapshot.etag, projection.key), build)
+        return view
+
+    def changes_since(self, since: int) -> bytes:
+        """Return the serialized ``/metadata/changes`` body for a client at version ``since``.
+
+        The body is a merge patch (RFC 7396) from that version to the current
+        snapshot, or the full document when the version is no longer in the
+        ring of recent snapshots. Bodies are cached on the current snapshot.
+        """
+        with self.lock:
+            snapshot = self.snapshot
+            base = next((s for s in self.recent_snapshots if s.version == since), None)
+
+        key = since if base is not None else "full"
+        body = snapshot.deltas.get(key)
+        if body is not None:
+            return body
+
+        def build() -> bytes:
+            key = since if base is not None else "full"
+            payload: Dict[str, Any] = {"version": snapshot.version, "since": since}
+            try:
+                if base is None:
+                    raise PatchNotRepresentable("base version not available")
+                payload.update({"type": "merge-patch", "patch": merge_patch(base.result, snapshot.result)})
+            except PatchNotRepresentable:
+                key = "full"
+                payload.update({"type": "full", "document": snapshot.result})
+                if key in snapshot.deltas:
+                    return snapshot.deltas[key]
+
+            body = dumps_compact(payload)
+            snapshot.deltas[key] = body
+            return body
+
+        return self.coalesce('/metadata/changes', ('changes', snapshot.version, key), build)
+
+    def refresh_collectors(self, names: Optional[List[str]] = None, wait: bool = False) -> Tuple[Dict[str, str], bool]:
+        """Run the named jobs (default: all) now, for ``POST /collect``.
+
+        Concurrent requests for a job share its in-flight run, and a job is not
+        started again within ``refresh_min_interval`` seconds of its last start.
+        With ``wait`` the call blocks, up to ``refresh_wait_timeout`` seconds,
+        until the runs have published. Returns each job's state (started,
+        running, recent) and whether every run has published.
+        """
+        names = list(names) if names is not None else list(self.job_names)
+        # A started run must not be answered from the TTL cache; joined and
+        # recent runs keep their cached result
+        runs = self.scheduler.refresh(names, self.config.get('refresh_min_interval', 10), before_start=self.cache.expire)
+        for state, _ in runs.values():
+            self.metrics.refresh_runs.inc(result=state)
+        done = True
+        if wait:
+            futures = {name: future for name, (_, future) in runs.items()}
+            done = self.scheduler.wait(futures, timeout=self.config.get('refresh_wait_timeout', 60))
+        return {name: state for name, (state, _) in runs.items()}, done
+
+    def coalesce(self, route: str, key: Any, build: Callable[[], Any]) -> Any:
+        """Run ``build`` once for concurrent requests with the same ``key`` and share its result."""
+        value, shared = self.coalescer.do(key, build)
+        if shared:
+            self.metrics.http_coalesced.inc(path=route)
+        return value
+
+    def throttle(self, route: str, client: str) -> float:
+        """Count a request to ``route`` against its ``rate_limits`` entry; returns seconds to wait, 0 if allowed.
+
+        Routes without an entry of their own use ``*``. Each client (token label
+        or IP address) has its own bucket per route.
+        """
+        limits = self.config.get('rate_limits') or {}
+        rate, burst = limits.get(route) or limits.get('*') or (0, 0)
+        if not rate:
+            return 0.0
+        retry_after = self.rate_limiter.check(f"{route} {client}", rate, burst)
+        if retry_after:
+            self.metrics.http_rate_limited.inc(path=route)
+        return retry_after
+
+    def reload_config(self, config: Dict[str, Any]) -> List[str]:
+        """Apply a changed configuration to the running daemon; return the changed keys.
+
+        Only what differs is touched: jobs are added, removed or rescheduled,
+        tokens, cache TTLs, the output writer and the plugin registry are
+        rebuilt, and a new schema or validation setting takes effect with a
+        republish. Collected sections, the published snapshot and the worker
+        pool are kept. ``host``, ``port`` and ``server_mode`` need a restart and
+        keep their running values. Raises ValueError, leaving the daemon
+        unchanged, if the new config is invalid.
+        """
+        old = self.config
+        changed = {key for key in set(old) | set(config) if old.get(key) != config.get(key)}
+        restart = sorted(changed & RESTART_KEYS)
+        if restart:
+            log.warning(f"Changing {', '.join(restart)} needs a restart; keeping the running values")
+            config = dict(config, **{key: old.get(key) for key in restart})
+            changed -= RESTART_KEYS
+        if not changed:
+            log.info("Config reloaded; nothing changed")
+            return []
+        # Build everything that can fail first, so an invalid config leaves the daemon untouched
+        targets = load_targets(config.get('targets'))
+        job_names = self._job_names(config, targets)
+        jobs = self._build_jobs(config, job_names)
+        ttls = self._per_job(config.get('collector_ttls'), job_names)
+        registry = None
+        if changed & {'collector_paths', 'plugin_watch_interval'}:
+            registry = CollectorRegistry(config.get('collector_paths', []), watch_interval=config.get('plugin_watch_interval', 10))
+            registry.load()
+        auth_tokens = None
+        if changed & {'auth_tokens', 'auth_token_file', 'token_watch_interval'}:
+            auth_tokens = self._load_auth_tokens(config)
+        output = self._build_output(config) if changed & OUTPUT_KEYS else None
+        pusher = self._build_pusher(config) if changed & PUSH_KEYS else None
+        history = self._build_history(config) if changed & HISTORY_KEYS else None
+        rebuild_workers = bool(changed & WORKER_KEYS) and (self.workers is not None or 'isolation' in changed)
+        try:
+            workers = self._build_workers(config) if rebuild_workers else None
+        except BaseException:
+            if history is not None:
+                history.close()
+            raise
+
+        # Nothing below raises. The config goes in first so new jobs see their new params
+        self.config = config
+        if registry is not None:
+            self.collector_paths = config.get('collector_paths', [])
+            self.registry = registry
+        if changed & JOB_KEYS:
+            self.targets = targets
+            with self.lock:
+                self.job_names = job_names
+                for name in set(self.sections) - set(job_names):
+                    del self.sections[name]
+            self.scheduler.update_jobs(jobs)
+        if changed & (JOB_KEYS | {'cache_ttl', 'collector_ttls'}):
+            self.cache.ttls = ttls
+            self.cache.default_ttl = config.get('cache_ttl', 0)
+        if 'max_workers' in changed:
+            self.scheduler.resize(config.get('max_workers', 4))
+        if 'jitter' in changed:
+            self.scheduler.jitter = config.get('jitter', 0.1)
+        if auth_tokens is not None:
+            self.auth_tokens = auth_tokens
+        if 'delta_history' in changed:
+            with self.lock:
+                self.recent_snapshots = deque(self.recent_snapshots, maxlen=max(1, config.get('delta_history', 32)))
+        if output is not None:
+            self.output_file, self.writer = output
+        if changed & HISTORY_KEYS:
+            self._install_history(history)
+        if changed & PUSH_KEYS:
+            self._install_pusher(pusher)
+        if rebuild_workers:
+            self._install_workers(workers)
+        if self.httpd is not None:
+            if 'request_timeout' in changed:
+                handler_class: Any = self.httpd.RequestHandlerClass
+                handler_class.timeout = config.get('request_timeout', 30)
+            if 'max_connections' in changed and isinstance(self.httpd, HarvesterHTTPServer):
+                self.httpd.max_connections = max(1, config.get('max_connections', 64))
+            if 'max_streams' in changed and isinstance(self.httpd, HarvesterHTTPServer):
+                self.httpd.max_streams = max(1, config.get('max_streams', 16))
+        if changed & {'debug', 'log_level'}:
+            level = logging.DEBUG if config.get('debug') else getattr(logging, config.get('log_level') or 'INFO')
+            logging.getLogger().setLevel(level)
+            log.setLevel(level)
+        if changed & (JOB_KEYS | {'schema_path', 'validate'}):
+            # Drops removed sections and revalidates against the new schema
+            self._publish()
+
+        log.info(f"Applied config changes: {', '.join(sorted(changed))}")
+        return sorted(changed)
+
+    def reload(self) -> bool:
+        """Reload the configuration through ``config_loader`` and apply the differences.
+
+        The auth token file is re-read as well. A config that fails to load or
+        apply is logged and the running one kept.
+        """
+        if self.config_loader is None:
+            log.warning("Reload requested but no config loader is set")
+            return False
+        with self._reload_lock:
+            try:
+                changed = self.reload_config(self.config_loader())
+                if not {'auth_tokens', 'auth_token_file'} & set(changed):
+                    # The token file itself may have changed
+                    self.reload_tokens()
+            except Exception as e:
+                self.metrics.config_reloads.inc(result="error")
+                log.error(f"Config reload failed, keeping the running config: {e}")
+                return False
+        self.metrics.config_reloads.inc(result="success")
+        return True
+
+    def _config_file_state(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.config['config_file'])
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch_config(self):
+        """Reload when the config file changes, checking every ``config_watch_interval`` seconds."""
+        state = self._config_file_state()
+        while not self._stopped.wait(self.config.get('config_watch_interval', 5)):
+            current = self._config_file_state()
+            if current is not None and current != state:
+                log.info(f"Config file {self.config['config_file']} changed; reloading")
+                self.reload()
+            state = current
 
     def run_collectors(self) -> Dict[str, Any]:
-        """Run all collectors and return the results."""
+        """Run all collectors concurrently, wait for them, and return the results."""
         debug = self.config.get('debug', False)
         if debug:
             log.setLevel(logging.DEBUG)
             log.debug("Debug mode enabled")
-            log.debug(f"Running collectors: {self.config['collectors']}")
+            log.debug(f"Running collectors: {self.job_names}")
             log.debug(f"Validation is {'enabled' if self.config.get('validate', True) else 'disabled'}")
-            
-        try:
-            # Get the schema path
-            schema_path = self.config.get('schema_path')
-            if not schema_path:
-                schema_path = str(bundled_schema_path())
-                if debug:
-                    log.debug(f"Using bundled schema from: {schema_path}")
-            else:
-                if debug:
-                    log.debug(f"Using custom schema from: {schema_path}")
-
-            if debug:
-                log.debug("Starting collection...")
-                start_time = time.time()
-
-            # Run the collectors
-            result = collect_all(
-                collector_names=self.config['collectors'],
-                schema_path=schema_path,
-                validate=self.config.get('validate', True),
-                debug=debug,
-                plugin_paths=self.collector_paths
-            )
-
-            # Update the latest results
-            with self.lock:
-                self.latest_results = result
-                
-                # Write results to file if output_file is set
-                if self.output_file:
-                    try:
-                        with open(self.output_file, 'w') as f:
-                            json.dump(result, f, indent=2)
-                        log.debug(f"Wrote collected data to {self.output_file}")
-                    except Exception as e:
-                        log.error(f"Failed to write to output file {self.output_file}: {e}")
-
-            return result
+            start_time = time.time()
 
-        except Exception as e:
-            log.error(f"Failed to run collectors: {e}")
-            with self.lock:
-                self.latest_results = {
-                    "error": str(e),
-                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
-                }
-            return self.latest_results
+        self.scheduler.run_now()
 
-    def _worker_loop(self):
-        """Background worker that runs collectors on a schedule."""
-        debug = self.config.get('debug', False)
-        interval = self.config.get('interval', 300)
-        
         if debug:
-            log.debug(f"Starting worker loop with {interval}s interval")
-            
-        while self.running:
-            try:
-                start_time = time.time()
-                log.info("Running scheduled collection")
-                if debug:
-                    log.debug(f"Collection started at {time.ctime(start_time)}")
-                    
-                self.run_collectors()
-                
-                if debug:
-                    duration = time.time() - start_time
-                    log.debug(f"Collection completed in {duration:.2f} seconds")
-                    
-            except Exception as e:
-                log.error(f"Error in collector worker: {e}")
-                if debug:
-                    import traceback
-                    log.debug(f"Full traceback:\n{traceback.format_exc()}")
-
-            # Wait for the next interval
-            sleep_time = max(0, interval - (time.time() - start_time))
-            if debug and sleep_time > 0:
-                log.debug(f"Sleeping for {sleep_time:.1f} seconds until next collection")
-                
-            time.sleep(sleep_time)
+            log.debug(f"Collection completed in {time.time() - start_time:.2f} seconds")
+
+        with self.lock:
+            return self.latest_results
 
     def start(self):
         """Start the daemon and HTTP server."""
@@ -260,24 +890,26 @@ class CollectorDaemon:
 
         self.running = True
 
-        # Initial collection
-        log.info("Running initial collection")
-        self.run_collectors()
-
-        # Start the background worker
-        self.worker_thread = threading.Thread(
-            target=self._worker_loop,
-            name="collector-worker",
-            daemon=True
-        )
-        self.worker_thread.start()
+        # Serve the last known data while the first collection runs
+        if self.config.get('restore', True):
+            self.restore_snapshot()
 
-        # Start the HTTP server
+        # Bind before collecting so /metadata and /healthz answer right away
         addr = (self.config.get('host', ''), self.config.get('port', 18080))
-        httpd = HTTPServer(addr, self._make_handler())
+        httpd = self._make_server(addr)
         self.httpd = httpd
 
-        log.info(f"Starting HTTP server on {addr[0]}:{addr[1]}")
+        # Start the per-collector scheduler; the initial collection runs on its pool
+        self.scheduler.start()
+        log.info("Running initial collection in the background")
+        self.scheduler.run_now(wait=False)
+
+        if self.config.get('config_file') and self.config.get('config_watch_interval', 5) > 0:
+            threading.Thread(target=self._watch_config, name="config-watch", daemon=True).start()
+        if self._token_file(self.config) and self.config.get('token_watch_interval', 5) > 0:
+            threading.Thread(target=self._watch_tokens, name="token-watch", daemon=True).start()
+
+        log.info(f"Starting HTTP server on {addr[0]}:{addr[1]} ({self.config.get('server_mode', 'threaded')} mode)")
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
@@ -285,84 +917,443 @@ class CollectorDaemon:
         finally:
             self.stop()
 
+    def request_stop(self):
+        """Make a running ``start()`` return, which then stops and drains the daemon.
+
+        Safe to call from a signal handler: ``serve_forever`` runs on the
+        calling thread there, so the server is shut down from a helper thread.
+        """
+        httpd = self.httpd
+        if httpd is not None:
+            threading.Thread(target=httpd.shutdown, name="shutdown", daemon=True).start()
+
     def stop(self):
         """Stop the daemon and clean up."""
         self.running = False
-        if self.worker_thread:
-            self.worker_thread.join(timeout=5)
-        if self.httpd:
-            self.httpd.shutdown()
-            self.httpd.server_close()
+        self._stopped.set()
+        self.scheduler.stop()
+        # Release /metadata/stream clients so the HTTP server can drain
+        self.notifier.close()
+        # start() also stops on its way out; only one caller closes the server
+        with self.lock:
+            httpd, self.httpd = self.httpd, None
+        if httpd:
+            httpd.shutdown()
+            if isinstance(httpd, HarvesterHTTPServer):
+                httpd.drain(self.config.get('drain_timeout', 5.0))
+            httpd.server_close()
+        if self.history is not None:
+            self.history.close()
+        if self.pusher is not None:
+            self.pusher.stop()
+        if self.workers is not None:
+            self.workers.close()
+
+    def _make_server(self, addr: Tuple[str, int]) -> HTTPServer:
+        """Create the HTTP server for the configured ``server_mode``.
+
+        ``threaded`` (default) serves connections concurrently with HTTP/1.1
+        keep-alive, a connection limit and a separate stream limit; ``single``
+        is the plain one-request-at-a-time HTTP/1.0 server, which cannot serve
+        streams.
+        """
+        handler = self._make_handler()
+        if self.config.get('server_mode', 'threaded') == 'single':
+            return HTTPServer(addr, handler)
+        handler.protocol_version = "HTTP/1.1"
+        return HarvesterHTTPServer(
+            addr,
+            handler,
+            max_connections=self.config.get('max_connections', 64),
+            max_streams=self.config.get('max_streams', 16),
+        )
 
     def _make_handler(self):
         """Create a request handler with access to this daemon instance."""
         daemon = self
 
         class RequestHandler(BaseHTTPRequestHandler):
+            # Socket timeout for reading a request, also bounds idle keep-alive connections
+            timeout = daemon.config.get('request_timeout', 30)
+            # Headers and body go out in separate writes; with Nagle on, every
+            # keep-alive response after the first waits for a delayed ACK
+            disable_nagle_algorithm = True
+
+            def send_response(self, code, message=None):
+                self._status = code
+                super().send_response(code, message)
+
             def do_GET(self):
-                allowed, label, reason = daemon._authorize(self.headers)
+                self._timed(self._route_get)
+
+            def do_POST(self):
+                self._timed(self._route_post)
+
+            def _timed(self, handle: Callable[[str], None]):
+                start = time.perf_counter()
+                self._status = 0
+                route = _route_name(self.path.split('?', 1)[0], daemon.targets)
+                try:
+                    handle(route)
+                finally:
+                    daemon.metrics.http_duration.observe(
+                        time.perf_counter() - start, path=route, status=str(self._status)
+                    )
+
+            def _route_get(self, route: str):
+                allowed, label, reason, retry_after = daemon._authorize(self.headers, self.client_address[0])
+                if reason == "rate_limited":
+                    self._handle_rate_limited(label, retry_after)
+                    return
                 if not allowed:
                     self._handle_unauthorized(label, reason)
                     return
+                retry_after = daemon.throttle(route, label or self.client_address[0])
+                if retry_after:
+                    self._handle_rate_limited(label, retry_after)
+                    return
 
-                path = self.path.split('?', 1)[0]
+                path, _, query = self.path.partition('?')
                 if path == '/metadata':
-                    self._handle_metadata()
+                    self._handle_metadata(params=parse_qs(query))
+                elif path == '/metadata/changes':
+                    self._handle_changes(parse_qs(query))
+                elif path == '/metadata/stream':
+                    self._handle_stream(parse_qs(query))
+                elif path == '/metadata/ndjson':
+                    self._handle_ndjson(parse_qs(query))
+                elif path.startswith('/metadata/') and path[len('/metadata/'):] in daemon.targets:
+                    self._handle_metadata(daemon.target_snapshot(path[len('/metadata/'):]), parse_qs(query), route)
+                elif path == '/collectors':
+                    self._handle_collectors()
+                elif path == '/history':
+                    self._handle_history(parse_qs(query))
+                elif path == '/metrics':
+                    body = daemon.coalesce('/metrics', ('metrics',), daemon.metrics.render)
+                    self._send_body(200, body, content_type=METRICS_CONTENT_TYPE)
                 elif path == '/healthz':
                     self._handle_healthz()
+                elif path == '/collect':
+                    self._send_body(405, json.dumps({"error": "use POST"}).encode('utf-8'), extra_headers={"Allow": "POST"})
                 else:
                     self._handle_not_found()
 
-            def _set_headers(self, status_code=200, content_type="application/json", extra_headers: Optional[Dict[str, str]] = None):
+            def _route_post(self, route: str):
+                # Until the body has been read the connection cannot carry another request
+                keep_open = not self.close_connection
+                self.close_connection = True
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                except ValueError:
+                    length = -1
+                if route != '/collect':
+                    self._handle_not_found()
+                    return
+                if length < 0:
+                    self._send_body(400, json.dumps({"error": "Content-Length must be a non-negative integer"}).encode('utf-8'))
+                    return
+
+                allowed, label, reason, retry_after = daemon._authorize(self.headers, self.client_address[0])
+                if reason == "auth_disabled":
+                    self._send_body(403, json.dumps({
+                        "error": "POST /collect needs auth tokens (--auth-token-file or DAEMON_AUTH_TOKENS)"
+                    }).encode('utf-8'))
+                    return
+                if reason == "rate_limited":
+                    self._handle_rate_limited(label, retry_after)
+                    return
+                if not allowed:
+                    self._handle_unauthorized(label, reason)
+                    return
+                retry_after = daemon.throttle(route, label or self.client_address[0])
+                if retry_after:
+                    self._handle_rate_limited(label, retry_after)
+                    return
+                if length > MAX_POST_BODY:
+                    self._send_body(413, json.dumps({"error": f"Request body over {MAX_POST_BODY} bytes"}).encode('utf-8'))
+                    return
+                if length:
+                    # The body is not used; read it so the connection stays usable
+                    self.rfile.read(length)
+                self.close_connection = not keep_open
+                self._handle_collect(parse_qs(self.path.partition('?')[2]))
+
+            def _handle_collect(self, params: Dict[str, List[str]]):
+                names = _parse_names(params.get("collectors"))
+                unknown = sorted(set(names or ()) - set(daemon.job_names))
+                if unknown:
+                    self._send_body(400, json.dumps({
+                        "error": f"Unknown collectors: {', '.join(unknown)}",
+                        "collectors": daemon.job_names,
+                    }).encode('utf-8'))
+                    return
+                wait = params.get("wait", ["false"])[0].lower() in ("1", "true", "yes")
+                runs, done = daemon.refresh_collectors(sorted(names) if names is not None else None, wait=wait)
+                payload: Dict[str, Any] = {"runs": runs}
+                if wait:
+                    with daemon.lock:
+                        snapshot = daemon.snapshot
+                    payload["version"] = snapshot.version
+                    payload["collectors"] = {
+                        name: section for name, section in snapshot.result.get("collectors", {}).items() if name in runs
+                    }
+                    if "host" in runs and "host" in snapshot.result:
+                        payload["host"] = snapshot.result["host"]
+                # 202 while runs are still going, 200 once their results are published
+                self._send_body(200 if wait and done else 202, json.dumps(payload).encode('utf-8'))
+
+            def _set_headers(self, status_code=200, content_type="application/json", extra_headers: Optional[Dict[str, str]] = None, cache_control: str = "no-store"):
                 self.send_response(status_code)
                 self.send_header("Content-Type", content_type)
-                self.send_header("Cache-Control", "no-store")
+                self.send_header("Cache-Control", cache_control)
                 if extra_headers:
                     for k, v in extra_headers.items():
                         self.send_header(k, v)
                 self.end_headers()
 
-            def _handle_metadata(self):
+            def _send_body(self, status_code: int, body: bytes, content_type: str = "application/json", extra_headers: Optional[Dict[str, str]] = None, cache_control: str = "no-store"):
+                headers = dict(extra_headers or {})
+                headers["Content-Length"] = str(len(body))
+                self._set_headers(status_code, content_type, headers, cache_control)
+                self.wfile.write(body)
+
+            def _handle_metadata(self, snapshot: Optional[Snapshot] = None, params: Optional[Dict[str, List[str]]] = None, route: str = '/metadata'):
+                if snapshot is None:
+                    with daemon.lock:
+                        snapshot = daemon.snapshot
+                params = params or {}
+                try:
+                    projection = compile_projection(_parse_names(params.get("collectors")), _parse_names(params.get("fields")))
+                except ValueError as e:
+                    self._send_body(400, json.dumps({"error": str(e)}).encode('utf-8'))
+                    return
+                if projection is not None:
+                    snapshot = daemon.projected_snapshot(snapshot, projection, route)
+
+                # Clients may cache and revalidate with If-None-Match
+                headers = {
+                    "ETag": snapshot.etag,
+                    "Vary": "Accept-Encoding",
+                    "X-Snapshot-Version": str(snapshot.version),
+                }
+                if etag_matches(self.headers.get("If-None-Match"), snapshot.etag):
+                    self._set_headers(304, extra_headers=headers, cache_control="no-cache")
+                    return
+
+                encoding = negotiate_encoding(self.headers.get("Accept-Encoding"), list(snapshot.encodings))
+                body = snapshot.encoded(encoding)
+                if encoding != "identity":
+                    headers["Content-Encoding"] = encoding
+                self._send_body(200, body, extra_headers=headers, cache_control="no-cache")
+
+            def _handle_changes(self, params: Dict[str, List[str]]):
+                try:
+                    since = int(params["since"][0])
+                except (KeyError, IndexError, ValueError):
+                    self._send_body(400, json.dumps({
+                        "error": "since must be an integer snapshot version"
+                    }).encode('utf-8'))
+                    return
+
+                body = daemon.changes_since(since)
+                headers = {"Vary": "Accept-Encoding"}
+                encoding = negotiate_encoding(self.headers.get("Accept-Encoding"), ["gzip", "identity"])
+                if encoding == "gzip":
+                    body = encode_body(body, "gzip")
+                    headers["Content-Encoding"] = "gzip"
+                self._send_body(200, body, extra_headers=headers)
+
+            def _begin_stream(self, path: str) -> bool:
+                """Claim a stream slot for a response that lasts until the client leaves.
+
+                In single mode a stream would hold the only request thread, so
+                it is refused with 501; with every slot taken the answer is 503.
+                Either way the response has been sent when this returns False.
+                """
+                server = self.server
+                if not isinstance(server, HarvesterHTTPServer):
+                    self._send_body(501, json.dumps({"error": f"{path} needs --server-mode threaded"}).encode('utf-8'))
+                    return False
+                if not server.begin_stream(self.connection):
+                    log.warning(f"Rejecting stream from {self.address_string()}: stream limit reached")
+                    self._send_body(503, json.dumps({"error": "too many streams"}).encode('utf-8'),
+                                    extra_headers={"Retry-After": "1"})
+                    return False
+                return True
+
+            def _handle_stream(self, params: Dict[str, List[str]]):
+                """Server-Sent Events: a snapshot event, then one update per publish."""
+                if not self._begin_stream('/metadata/stream'):
+                    return
+                names = _parse_names(params.get("collectors"))
+                heartbeat = daemon.config.get('stream_heartbeat', 15)
+
+                # The stream has no length, so the connection ends with it
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
                 with daemon.lock:
-                    data = json.dumps(daemon.latest_results, indent=2).encode('utf-8')
-                
-                self._set_headers()
-                self.wfile.write(data)
+                    last = daemon.snapshot
+                try:
+                    self.wfile.write(format_event("snapshot", last.version, stream_view(last.result, last.version, names)))
+                    self.wfile.flush()
+                    while not daemon.notifier.closed:
+                        daemon.notifier.wait_for_newer(last.version, timeout=heartbeat)
+                        with daemon.lock:
+                            current = daemon.snapshot
+                        if current.version <= last.version:
+                            # Comment line keeps proxies from timing out and detects gone clients
+                            self.wfile.write(b": keepalive\n\n")
+                        else:
+                            update = stream_update(last.result, current.result, current.version, names)
+                            if update is not None:
+                                self.wfile.write(format_event("update", current.version, update))
+                            last = current
+                        self.wfile.flush()
+                except OSError as e:
+                    log.debug(f"Stream client {self.address_string()} went away: {e}")
+
+            def _handle_ndjson(self, params: Dict[str, List[str]]):
+                """The snapshot as NDJSON lines; with ``follow`` also the changed sections of every later publish."""
+                names = _parse_names(params.get("collectors"))
+                follow = params.get("follow", ["false"])[0].lower() in ("1", "true", "yes")
+                heartbeat = daemon.config.get('stream_heartbeat', 15)
+                if follow and not self._begin_stream('/metadata/ndjson?follow=true'):
+                    return
+
+                with daemon.lock:
+                    last = daemon.snapshot
+                # Lines are written as they are encoded, so the body has no length
+                self.close_connection = True
+                self._set_headers(200, NDJSON_CONTENT_TYPE, {
+                    "Connection": "close",
+                    "X-Snapshot-Version": str(last.version),
+                }, cache_control="no-cache")
+                try:
+                    for line in document_lines(last.result, names, last.version):
+                        self.wfile.write(line)
+                    self.wfile.flush()
+                    while follow and not daemon.notifier.closed:
+                        daemon.notifier.wait_for_newer(last.version, timeout=heartbeat)
+                        with daemon.lock:
+                            current = daemon.snapshot
+                        if current.version <= last.version:
+                            # A blank line is skipped by NDJSON readers and detects gone clients
+                            self.wfile.write(b"\n")
+                        else:
+                            for line in update_lines(last.result, current.result, names, current.version):
+                                self.wfile.write(line)
+                            last = current
+                        self.wfile.flush()
+                except OSError as e:
+                    log.debug(f"NDJSON client {self.address_string()} went away: {e}")
+
+            def _handle_collectors(self):
+                def build() -> bytes:
+                    configured = set(daemon.config['collectors'])
+                    collectors = daemon.registry.describe()
+                    for entry in collectors:
+                        entry["configured"] = entry["name"] in configured
+                        entry["targets"] = [t.name for t in daemon.targets.values() if entry["name"] in t.collectors]
+                    return json.dumps({
+                        "loaded_at": daemon.registry.loaded_at,
+                        "collectors": collectors,
+                    }).encode('utf-8')
+
+                self._send_body(200, daemon.coalesce('/collectors', ('collectors',), build))
+
+            def _handle_history(self, params: Dict[str, List[str]]):
+                """Recorded field changes: ``?collector=&field=&from=&to=&limit=``; without a collector, what is recorded."""
+                history = daemon.history
+                if history is None:
+                    self._send_body(404, json.dumps({"error": "history is not enabled (--history-file)"}).encode('utf-8'))
+                    return
+                collector = params.get("collector", [None])[0]
+                if not collector:
+                    body = daemon.coalesce('/history', ('history',), lambda: json.dumps({"collectors": history.fields()}).encode('utf-8'))
+                    self._send_body(200, body)
+                    return
+                try:
+                    start = parse_time(params["from"][0]) if "from" in params else None
+                    end = parse_time(params["to"][0]) if "to" in params else None
+                    limit = int(params.get("limit", [DEFAULT_LIMIT])[0])
+                except ValueError:
+                    self._send_body(400, json.dumps({
+                        "error": "from/to must be Unix seconds or ISO 8601 times and limit an integer"
+                    }).encode('utf-8'))
+                    return
+                field = params.get("field", [None])[0]
+                body = daemon.coalesce(
+                    '/history', ('history', collector, field, start, end, limit),
+                    lambda: json.dumps(history.query(collector, field, start, end, limit)).encode('utf-8'),
+                )
+                self._send_body(200, body)
 
             def _handle_healthz(self):
-                self._set_headers(content_type="text/plain")
-                self.wfile.write(b"ok\n")
+                self._send_body(200, b"ok\n", content_type="text/plain")
 
             def _handle_not_found(self):
-                self._set_headers(404)
-                self.wfile.write(json.dumps({
+                self._send_body(404, json.dumps({
                     "error": "Not found",
-                    "endpoints": ["/metadata", "/healthz"]
+                    "endpoints": ROUTES,
+                    "targets": [f"/metadata/{name}" for name in daemon.targets],
                 }).encode('utf-8'))
 
             def _handle_unauthorized(self, label: Optional[str], reason: str):
+                daemon.metrics.auth_rejections.inc(reason=reason)
                 # Do not log tokens; log label if available
                 msg = f"Unauthorized request from {self.address_string()} reason={reason}"
                 if label:
                     msg += f" label={label}"
                 log.warning(msg)
-                self._set_headers(
-                    401,
-                    extra_headers={"WWW-Authenticate": "Bearer"}
-                )
                 body = {"error": "unauthorized", "reason": reason}
                 if label:
                     body["label"] = label
-                self.wfile.write(json.dumps(body).encode("utf-8"))
+                self._send_body(
+                    401,
+                    json.dumps(body).encode("utf-8"),
+                    extra_headers={"WWW-Authenticate": "Bearer"}
+                )
+
+            def _handle_rate_limited(self, label: Optional[str], retry_after: float):
+                seconds = max(1, math.ceil(retry_after))
+                self._send_body(
+                    429,
+                    json.dumps({"error": "rate_limited", "label": label, "retry_after": seconds}).encode("utf-8"),
+                    extra_headers={"Retry-After": str(seconds)}
+                )
 
             def log_message(self, fmt, *args):
                 log.info(f"{self.address_string()} - {fmt % args}")
 
         return RequestHandler
 
-def parse_args():
-    """Parse command line arguments."""
+def _route_name(path: str, targets: Dict[str, Any]) -> str:
+    """The ``ROUTES`` entry a path is served by, as used in metrics and rate limits."""
+    if path in ROUTES:
+        return path
+    if path.startswith('/metadata/') and path[len('/metadata/'):] in targets:
+        return '/metadata/{target}'
+    # Unknown paths share one name to keep metric cardinality bounded
+    return "other"
+
+def _parse_names(values: Optional[List[str]]) -> Optional[Set[str]]:
+    """Parse repeated/comma-separated ``?collectors=`` values; None means no filter."""
+    if not values:
+        return None
+    return {name.strip() for value in values for name in value.split(',') if name.strip()}
+
+def build_parser() -> argparse.ArgumentParser:
+    """The daemon's options; a config file can set any of them."""
     parser = argparse.ArgumentParser(description='Dwellir Harvester Daemon')
+    parser.add_argument('--config',
+                      help='YAML, TOML or JSON file with any of these options plus per-collector settings; command line options win')
+    parser.add_argument('--config-watch-interval', type=float, default=5,
+                      help='Seconds between checks of --config for changes to reload; 0 disables (default: 5). SIGHUP also reloads')
     parser.add_argument('--collectors', nargs='+', default=['host'],
                       help='List of collectors to run (default: host)')
     parser.add_argument(
@@ -372,19 +1363,117 @@ def parse_args():
         default=[],
         help='Additional paths to search for collectors (can be repeated). Also honors HARVESTER_COLLECTOR_PATHS.'
     )
+    parser.add_argument('--target', action='append', dest='targets', default=[],
+                      metavar='NAME=COLLECTOR[,COLLECTOR...]',
+                      help='Node instance to harvest with its own collectors, served on /metadata/NAME (can be repeated)')
+    parser.add_argument('--target-param', action='append', dest='target_params', default=[],
+                      metavar='TARGET.COLLECTOR.KEY=VALUE',
+                      help='Parameter passed to a target\'s collector; VALUE is parsed as JSON if possible (can be repeated)')
+    parser.add_argument('--plugin-watch-interval', type=float, default=10,
+                      help='Seconds between checks of --collector-path files for changes to hot-reload (default: 10)')
     parser.add_argument('--host', default='0.0.0.0',
                       help='Host to bind the HTTP server to (default: 0.0.0.0)')
     parser.add_argument('--port', type=int, default=18080,
                       help='Port to run the HTTP server on (default: 18080)')
+    parser.add_argument('--server-mode', choices=SERVER_MODES, default='threaded',
+                      help='HTTP server mode: concurrent keep-alive server or one request at a time (default: threaded)')
+    parser.add_argument('--max-connections', type=int, default=64,
+                      help='Maximum concurrent HTTP connections in threaded mode (default: 64)')
+    parser.add_argument('--max-streams', type=int, default=16,
+                      help='Maximum concurrent /metadata/stream and /metadata/ndjson?follow=true clients in threaded mode; '
+                           'they do not count toward --max-connections (default: 16)')
+    parser.add_argument('--request-timeout', type=float, default=30,
+                      help='Seconds to wait for a request or an idle keep-alive connection (default: 30)')
+    parser.add_argument('--drain-timeout', type=float, default=5,
+                      help='Seconds to let in-flight requests finish on shutdown (default: 5)')
+    parser.add_argument('--delta-history', type=int, default=32,
+                      help='Number of recent snapshots kept for /metadata/changes deltas (default: 32)')
+    parser.add_argument('--stream-heartbeat', type=float, default=15,
+                      help='Seconds between keep-alive comments on /metadata/stream (default: 15)')
     parser.add_argument('--interval', type=int, default=300,
                       help='Collection interval in seconds (default: 300)')
+    parser.add_argument('--collector-interval', action='append', dest='collector_intervals', default=[],
+                      metavar='NAME=SECONDS',
+                      help='Per-collector collection interval (can be repeated)')
+    parser.add_argument('--timeout', type=float, dest='collector_timeout',
+                      help='Default per-collector run timeout in seconds (default: the collector\'s interval)')
+    parser.add_argument('--collector-timeout', action='append', dest='collector_timeouts', default=[],
+                      metavar='NAME=SECONDS',
+                      help='Per-collector run timeout (can be repeated)')
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                      help='Seconds a collector result stays fresh; scheduled runs within it are skipped (default: 0)')
+    parser.add_argument('--collector-ttl', action='append', dest='collector_ttls', default=[],
+                      metavar='NAME=SECONDS',
+                      help='Per-collector result TTL (can be repeated)')
+    parser.add_argument('--workers', type=int, default=4,
+                      help='Maximum number of collectors running at the same time (default: 4)')
+    parser.add_argument('--isolation', choices=ISOLATION_MODES, default='thread',
+                      help='Run collectors in daemon threads or in a pool of --workers worker processes (default: thread)')
+    parser.add_argument('--worker-max-runs', type=int, default=100,
+                      help='Replace a worker process after this many collector runs (default: 100)')
+    parser.add_argument('--worker-max-rss', type=float,
+                      help='Replace a worker process once its peak RSS exceeds this many MiB (default: no limit)')
+    parser.add_argument('--worker-memory-limit', type=float,
+                      help='Address space limit in MiB for each collector run in a worker process (default: none)')
+    parser.add_argument('--collector-memory-limit', action='append', dest='collector_memory_limits', default=[],
+                      metavar='NAME=MIB',
+                      help='Per-collector --worker-memory-limit (can be repeated)')
+    parser.add_argument('--worker-cpu-limit', type=float,
+                      help='CPU time limit in seconds for each collector run in a worker process (default: none)')
+    parser.add_argument('--collector-cpu-limit', action='append', dest='collector_cpu_limits', default=[],
+                      metavar='NAME=SECONDS',
+                      help='Per-collector --worker-cpu-limit (can be repeated)')
+    parser.add_argument('--jitter', type=float, default=0.1,
+                      help='Random start offset as a fraction of each interval (default: 0.1)')
     parser.add_argument('--output', default='/var/lib/dwellir-harvester/harvested-data.json',
                       help='Path to output file for collected data (default: /var/lib/dwellir-harvester/harvested-data.json)')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='indent',
+                      help='Output file layout: indented or compact JSON, or NDJSON lines (default: indent)')
+    parser.add_argument('--fsync', choices=FSYNC_MODES, default='file',
+                      help='Durability of output writes: none, fsync the file, or file and directory (default: file)')
+    parser.add_argument('--output-refresh', type=float, default=3600,
+                      help='Rewrite the output file at least this often in seconds even if the data is unchanged (default: 3600)')
+    parser.add_argument('--history-file',
+                      help='SQLite file recording every field change for /history (default: disabled)')
+    parser.add_argument('--history-max-bytes', type=int, default=64 * 1024 * 1024,
+                      help='Size above which the oldest history is pruned (default: 67108864)')
+    parser.add_argument('--push-url',
+                      help='POST every published snapshot, batched as compressed NDJSON, to this http(s) URL (default: disabled)')
+    parser.add_argument('--push-token',
+                      help='Bearer token sent with pushes (also DAEMON_PUSH_TOKEN)')
+    parser.add_argument('--push-mode', choices=PUSH_MODES, default='delta',
+                      help='Push merge patches against the previous snapshot or full snapshots (default: delta)')
+    parser.add_argument('--push-batch-size', type=int, default=50,
+                      help='Most snapshots sent in one request (default: 50)')
+    parser.add_argument('--push-delay', type=float, default=5.0,
+                      help='Seconds a snapshot may wait for a batch to fill (default: 5)')
+    parser.add_argument('--push-encoding', choices=available_encodings(), default='gzip',
+                      help='Content-Encoding of push requests (default: gzip)')
+    parser.add_argument('--push-spool',
+                      help='Directory keeping unsent snapshots across outages and restarts (default: in memory)')
+    parser.add_argument('--push-spool-max-bytes', type=int, default=64 * 1024 * 1024,
+                      help='Size above which the oldest unsent snapshots are dropped (default: 67108864)')
+    parser.add_argument('--push-timeout', type=float, default=10.0,
+                      help='Seconds to wait for the push endpoint (default: 10)')
+    parser.add_argument('--push-max-backoff', type=float, default=300.0,
+                      help='Longest wait in seconds between retries of a failed push (default: 300)')
+    parser.add_argument('--no-restore', action='store_false', dest='restore',
+                      help='Do not serve the last snapshot from --output (marked stale) while the first collection runs')
     parser.add_argument('--schema', help='Path to JSON schema file (defaults to bundled schema)')
     parser.add_argument('--auth-token', action='append', dest='auth_tokens',
                       help='Bearer token to require for HTTP access (can be specified multiple times)')
     parser.add_argument('--auth-token-file',
-                      help='Path to JSON/YAML file containing token entries: [{"token": "...", "label": "...", "enabled": true}]')
+                      help='Path to JSON/YAML file containing token entries: [{"token": "...", "label": "...", "enabled": true, "rate_limit": 5, "burst": 10}]')
+    parser.add_argument('--rate-limit', action='append', dest='rate_limits', default=[], metavar='ENDPOINT=RATE[/BURST]',
+                      help='Limit each client (token label, else IP) to RATE requests per second with bursts of BURST on ENDPOINT, '
+                           'e.g. /metadata=1/5; * sets the default for other endpoints, 0 means unlimited; '
+                           'unauthorized limits failed authentications per IP (default: 1/10) (can be repeated)')
+    parser.add_argument('--token-watch-interval', type=float, default=5,
+                      help='Seconds between checks of --auth-token-file for changes to reload; 0 disables (default: 5)')
+    parser.add_argument('--refresh-min-interval', type=float, default=10,
+                      help='Minimum seconds between on-demand runs of a collector via POST /collect (default: 10)')
+    parser.add_argument('--refresh-wait-timeout', type=float, default=60,
+                      help='Longest a POST /collect?wait=true request waits for its runs, in seconds (default: 60)')
     parser.add_argument('--no-validate', action='store_false', dest='validate',
                       help='Disable schema validation')
     parser.add_argument('--debug', action='store_true',
@@ -393,11 +1482,190 @@ def parse_args():
                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
                       help='Logging level (default: INFO, ignored if --debug is used)')
     
-    return parser.parse_args()
+    return parser
+
+def _option_aliases(parser: argparse.ArgumentParser) -> Dict[str, argparse.Action]:
+    """Map config file keys (argparse dests and long option names) to their actions."""
+    actions = [action for action in parser._actions if action.dest not in ('help', 'config')]
+    # Dests win: `collector_timeout` is --timeout, not --collector-timeout
+    aliases: Dict[str, argparse.Action] = {action.dest: action for action in actions}
+    for action in actions:
+        # Flags only by dest, so `no_validate: true` cannot mean `validate: true`
+        if action.nargs != 0:
+            for option in action.option_strings:
+                if option.startswith('--'):
+                    aliases.setdefault(option[2:].replace('-', '_'), action)
+    return aliases
+
+def _file_defaults(aliases: Dict[str, argparse.Action], values: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert and check config file options like their command line counterparts. Raises ValueError."""
+    defaults: Dict[str, Any] = {}
+    for key, value in values.items():
+        action = aliases[key]
+        if action.nargs == 0:
+            if not isinstance(value, bool):
+                raise ValueError(f"Config option {key} must be true or false")
+        elif value is not None:
+            many = action.nargs in ('+', '*') or isinstance(action, argparse._AppendAction)
+            items = value if isinstance(value, list) else [value]
+            try:
+                convert = action.type
+                items = [convert(item) if callable(convert) else item for item in items]
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for config option {key}: {value!r}") from None
+            for item in items:
+                if action.choices is not None and item not in action.choices:
+                    raise ValueError(f"Invalid value for config option {key}: {item!r} (choose from {list(action.choices)})")
+            if not many and len(items) != 1:
+                raise ValueError(f"Config option {key} takes a single value")
+            value = items if many else items[0]
+        defaults[action.dest] = value
+    return defaults
+
+def _resolve_args(parser: argparse.ArgumentParser, argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse ``argv`` over the defaults from its ``--config`` file. Raises ValueError."""
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument('--config')
+    config_file = pre.parse_known_args(argv)[0].config
+    aliases = _option_aliases(parser)
+    file_values: Dict[str, Any] = {}
+    if config_file:
+        raw = load_config_file(config_file, {key: action.dest for key, action in aliases.items()})
+        unknown = sorted(set(raw) - set(aliases) - {'collector_params'})
+        if unknown:
+            raise ValueError(f"Unknown option(s) in config file {config_file}: {', '.join(unknown)}")
+        # Merged with their command line counterparts below instead of being replaced by them
+        merged = set(OVERRIDE_KEYS) | {'targets', 'collector_params'}
+        file_values = {key: raw[key] for key in merged if key in raw}
+        parser.set_defaults(**_file_defaults(aliases, {k: v for k, v in raw.items() if k not in merged}))
+
+    args = parser.parse_args(argv)
+    args.collector_intervals = {
+        **file_values.get('collector_intervals', {}),
+        **parse_overrides(args.collector_intervals, '--collector-interval'),
+    }
+    args.collector_timeouts = {
+        **file_values.get('collector_timeouts', {}),
+        **parse_overrides(args.collector_timeouts, '--collector-timeout'),
+    }
+    args.collector_ttls = {
+        **file_values.get('collector_ttls', {}),
+        **parse_overrides(args.collector_ttls, '--collector-ttl'),
+    }
+    args.collector_memory_limits = {
+        **file_values.get('collector_memory_limits', {}),
+        **parse_overrides(args.collector_memory_limits, '--collector-memory-limit'),
+    }
+    args.collector_cpu_limits = {
+        **file_values.get('collector_cpu_limits', {}),
+        **parse_overrides(args.collector_cpu_limits, '--collector-cpu-limit'),
+    }
+    args.collector_params = file_values.get('collector_params', {})
+    if args.push_url:
+        check_push_url(args.push_url)
+    args.rate_limits = parse_rate_limits(args.rate_limits)
+    unknown = sorted(set(args.rate_limits) - set(ROUTES) - {'/metadata/{target}', '*', 'unauthorized'})
+    if unknown:
+        raise ValueError(f"--rate-limit given for unknown endpoint(s): {unknown}")
+
+    targets: Dict[str, Dict[str, Any]] = {
+        name: {'collectors': list(spec['collectors']), 'params': {c: dict(p) for c, p in spec['params'].items()}}
+        for name, spec in file_values.get('targets', {}).items()
+    }
+    targets.update({
+        name: {'collectors': collectors, 'params': {}}
+        for name, collectors in parse_targets(args.targets).items()
+    })
+    params = parse_target_params(args.target_params)
+    unknown = sorted(set(params) - set(targets))
+    if unknown:
+        raise ValueError(f"--target-param given for unknown target(s): {unknown}")
+    for name, collector_params in params.items():
+        for collector, kwargs in collector_params.items():
+            targets[name]['params'].setdefault(collector, {}).update(kwargs)
+    load_targets(targets)
+    args.targets = targets
+    return args
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments and the ``--config`` file they name."""
+    parser = build_parser()
+    try:
+        return _resolve_args(parser, argv)
+    except ValueError as e:
+        parser.error(str(e))
 
-def main():
+def build_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """The daemon config dict for parsed arguments."""
+    return {
+        'config_file': args.config,
+        'config_watch_interval': args.config_watch_interval,
+        'collectors': args.collectors,
+        'collector_params': args.collector_params,
+        'targets': args.targets,
+        'collector_paths': args.collector_paths,
+        'plugin_watch_interval': args.plugin_watch_interval,
+        'host': args.host,
+        'port': args.port,
+        'server_mode': args.server_mode,
+        'max_connections': args.max_connections,
+        'max_streams': args.max_streams,
+        'request_timeout': args.request_timeout,
+        'drain_timeout': args.drain_timeout,
+        'delta_history': args.delta_history,
+        'stream_heartbeat': args.stream_heartbeat,
+        'interval': args.interval,
+        'collector_intervals': args.collector_intervals,
+        'collector_timeout': args.collector_timeout,
+        'collector_timeouts': args.collector_timeouts,
+        'cache_ttl': args.cache_ttl,
+        'collector_ttls': args.collector_ttls,
+        'max_workers': args.workers,
+        'isolation': args.isolation,
+        'worker_max_runs': args.worker_max_runs,
+        'worker_max_rss': args.worker_max_rss,
+        'worker_memory_limit': args.worker_memory_limit,
+        'collector_memory_limits': args.collector_memory_limits,
+        'worker_cpu_limit': args.worker_cpu_limit,
+        'collector_cpu_limits': args.collector_cpu_limits,
+        'jitter': args.jitter,
+        'validate': args.validate,
+        'output_file': args.output,
+        'output_format': args.output_format,
+        'fsync': args.fsync,
+        'output_refresh': args.output_refresh,
+        'restore': args.restore,
+        'history_file': args.history_file,
+        'history_max_bytes': args.history_max_bytes,
+        'push_url': args.push_url,
+        'push_token': args.push_token,
+        'push_mode': args.push_mode,
+        'push_batch_size': args.push_batch_size,
+        'push_delay': args.push_delay,
+        'push_encoding': args.push_encoding,
+        'push_spool': args.push_spool,
+        'push_spool_max_bytes': args.push_spool_max_bytes,
+        'push_timeout': args.push_timeout,
+        'push_max_backoff': args.push_max_backoff,
+        'debug': args.debug,
+        'log_level': args.log_level,
+        'schema_path': args.schema,  # Pass the schema path to the daemon
+        'auth_tokens': args.auth_tokens,
+        'auth_token_file': args.auth_token_file,
+        'token_watch_interval': args.token_watch_interval,
+        'refresh_min_interval': args.refresh_min_interval,
+        'refresh_wait_timeout': args.refresh_wait_timeout,
+        'rate_limits': args.rate_limits,
+    }
+
+def load_daemon_config(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Parse ``argv`` and its config file into a daemon config dict. Raises ValueError."""
+    return build_config(_resolve_args(build_parser(), argv))
+
+def main(argv: Optional[List[str]] = None):
     """Main entry point."""
-    args = parse_args()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parse_args(argv)
     
     # Configure logging
     log_level = logging.DEBUG if args.debug else getattr(logging, args.log_level)
@@ -412,19 +1680,25 @@ def main():
         log.debug(f"Command line arguments: {sys.argv}")
     
     # Create and start the daemon
-    daemon = CollectorDaemon({
-        'collectors': args.collectors,
-        'collector_paths': args.collector_paths,
-        'host': args.host,
-        'port': args.port,
-        'interval': args.interval,
-        'validate': args.validate,
-        'output_file': args.output,
-        'debug': args.debug,
-        'schema_path': args.schema,  # Pass the schema path to the daemon
-        'auth_tokens': args.auth_tokens,
-        'auth_token_file': args.auth_token_file,
-    })
+    try:
+        daemon = CollectorDaemon(build_config(args))
+    except Exception as e:
+        log.error(f"Fatal error: {e}")
+        sys.exit(1)
+    # Reloads re-read the same command line over the current config file
+    daemon.config_loader = lambda: load_daemon_config(argv)
+    if hasattr(signal, 'SIGHUP'):
+        # Reload off the signal handler so serve_forever is not blocked
+        signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(
+            target=daemon.reload, name="config-reload", daemon=True
+        ).start())
+
+    def on_sigterm(signum, frame):
+        log.info("Received SIGTERM, shutting down...")
+        daemon.request_stop()
+
+    # systemd and container runtimes stop with SIGTERM; drain like on Ctrl-C
+    signal.signal(signal.SIGTERM, on_sigterm)
     
     try:
         daemon.start()
@@ -0,0 +1,67 @@
+"""JSON merge-patch (RFC 7396) helpers for snapshot deltas."""
+from typing import Any, Dict
+
+
+class PatchNotRepresentable(ValueError):
+    """Raised when a change cannot be expressed as a merge patch.
+
+    Merge patches use ``null`` to delete keys, so a document that sets an
+    object member to ``null`` cannot be reproduced by applying a patch.
+    """
+
+
+def _check_no_nulls(value: Any):
+    if isinstance(value, dict):
+        for v in value.values():
+            if v is None:
+                raise PatchNotRepresentable("object member set to null")
+            _check_no_nulls(v)
+
+
+def merge_patch(old: Any, new: Any) -> Any:
+    """Return a merge patch that turns ``old`` into ``new``.
+
+    An empty dict means the documents are equal. Raises PatchNotRepresentable
+    if ``new`` contains changes a merge patch cannot express.
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        _check_no_nulls(new)
+        if isinstance(new, dict):
+            # A non-object target is replaced wholesale; start from scratch
+            return new
+        raise PatchNotRepresentable("document root is not an object")
+
+    patch: Dict[str, Any] = {}
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            if value is None:
+                raise PatchNotRepresentable(f"member '{key}' added as null")
+            _check_no_nulls(value)
+            patch[key] = value
+            continue
+        if old[key] == value:
+            continue
+        if value is None:
+            raise PatchNotRepresentable(f"member '{key}' set to null")
+        if isinstance(old[key], dict) and isinstance(value, dict):
+            patch[key] = merge_patch(old[key], value)
+        else:
+            _check_no_nulls(value)
+            patch[key] = value
+    return patch
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """Apply a merge patch to ``target`` and return the result (RFC 7396)."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
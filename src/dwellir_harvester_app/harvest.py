@@ -0,0 +1,268 @@
+"""Per-collector execution and snapshot assembly.
+
+``collect_all`` from the lib runs every collector in turn and builds the whole
+document in one pass. The daemon runs collectors individually, so this module
+splits that into two steps that produce the same document shape: run one
+collector into its section, and assemble the current sections into a snapshot.
+"""
+import importlib.metadata
+import json
+import sys
+import traceback
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from dwellir_harvester.core import (
+    CollectorFailedError,
+    CollectorMetadata,
+    CollectResult,
+    collect_system_info,
+    now_iso_tz,
+    run_collector,
+)
+
+from .validation import get_validator
+
+if TYPE_CHECKING:
+    from .registry import CollectorRegistry
+
+
+def harvester_version() -> str:
+    """Return the installed app version, falling back to the lib version."""
+    try:
+        return importlib.metadata.version("dwellir-harvester")
+    except importlib.metadata.PackageNotFoundError:
+        from dwellir_harvester import __version__
+        return __version__
+
+
+def failed_section(
+    name: str,
+    errors: List[str],
+    debug_traceback: Optional[str] = None,
+    version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build the section recorded for a collector that produced no result."""
+    meta: Dict[str, Any] = {
+        "collector_type": "generic",
+        "collector_name": name,
+        "status": "failed",
+        "collection_time": now_iso_tz(),
+        "errors": errors,
+    }
+    if version is not None:
+        meta["collector_version"] = version
+    if debug_traceback:
+        meta["debug"] = {"traceback": debug_traceback}
+    return {"meta": meta, "data": {}}
+
+
+def timeout_section(
+    name: str,
+    timeout: float,
+    elapsed: Optional[float] = None,
+    version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build the failed section for a collector run that was abandoned after ``timeout`` seconds.
+
+    ``message`` carries the details as a compact JSON object (the schema types
+    it as a string) so scripts can tell a timeout from other failures.
+    """
+    section = failed_section(name, [f"Collector {name} timed out after {timeout:g}s"], version=version)
+    error: Dict[str, Any] = {"error": "timeout", "collector": name, "timeout_seconds": timeout}
+    if elapsed is not None:
+        error["elapsed_seconds"] = round(elapsed, 3)
+    section["message"] = json.dumps(error, separators=(",", ":"))
+    return section
+
+
+def run_collector_class(
+    name: str,
+    collector_cls: type,
+    debug: bool = False,
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Instantiate and run an already-resolved collector class.
+
+    Mirrors the lib's ``run_collector`` without going back through
+    ``load_collectors``. Raises CollectorFailedError if the collector cannot
+    be created or raises.
+    """
+    kwargs = kwargs or {}
+    try:
+        if hasattr(collector_cls, "create"):
+            try:
+                collector = collector_cls.create(**kwargs)
+            except TypeError:
+                collector = collector_cls.create()
+        else:
+            collector = collector_cls(**kwargs)
+    except Exception as e:
+        raise CollectorFailedError(f"Failed to create collector {name}: {str(e)}") from e
+
+    try:
+        result = collector.run(debug=debug)
+    except Exception as e:
+        raise CollectorFailedError(f"Error in collector {name}: {str(e)}") from e
+    if hasattr(result, "to_dict"):
+        result = result.to_dict()
+    elif isinstance(result, dict) and hasattr(result.get("metadata"), "to_dict"):
+        result["metadata"] = result["metadata"].to_dict()
+
+    # The host collector is always reported with host metadata
+    if name == "host":
+        return CollectResult(
+            metadata=CollectorMetadata(
+                collector_name=name,
+                collector_version=getattr(collector_cls, "VERSION", "0.0.0"),
+                collector_type="host",
+                status=result.get("meta", {}).get("status", "success"),
+                errors=result.get("meta", {}).get("errors", []),
+            ),
+            data=result.get("data", {}),
+        ).to_dict()
+
+    if not isinstance(result, dict):
+        result = {"data": result}
+    if "meta" not in result:
+        result["meta"] = {
+            "collector_type": getattr(collector, "COLLECTOR_TYPE", "generic"),
+            "collector_name": getattr(collector, "NAME", name),
+            "collector_version": getattr(collector, "VERSION", "0.0.0"),
+            "collection_time": now_iso_tz(),
+        }
+    if debug and "debug" not in result.get("meta", {}):
+        result["meta"]["debug"] = {
+            "python_version": sys.version,
+            "platform": sys.platform,
+            "executable": sys.executable,
+            "collector_module": collector_cls.__module__,
+        }
+    return result
+
+
+def collect_section(
+    name: str,
+    schema_path: Optional[str] = None,
+    debug: bool = False,
+    plugin_paths: Optional[List[str]] = None,
+    collector_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+    registry: Optional["CollectorRegistry"] = None,
+    collector_cls: Optional[type] = None,
+) -> Dict[str, Any]:
+    """Run a single collector and return its ``{"meta", "data", "message"}`` section.
+
+    An already-resolved ``collector_cls`` is run directly. With a ``registry``
+    the collector class is resolved from it; otherwise the lib's
+    ``run_collector`` discovers collectors itself.
+    """
+    collection_time = now_iso_tz()
+    try:
+        if collector_cls is None and registry is not None:
+            collector_cls = registry.get(name)
+            if collector_cls is None:
+                raise CollectorFailedError(f"Unknown collector: {name}")
+        if collector_cls is not None:
+            collector_result = run_collector_class(
+                name,
+                collector_cls,
+                debug=debug,
+                kwargs=(collector_kwargs or {}).get(name),
+            )
+        else:
+            collector_result = run_collector(
+                name,
+                schema_path,
+                debug=debug,
+                plugin_paths=plugin_paths,
+                collector_kwargs=collector_kwargs,
+            )
+    except CollectorFailedError as e:
+        return failed_section(name, [str(e)], traceback.format_exc() if debug else None)
+
+    metadata = collector_result.get("metadata", {})
+    section = {
+        "meta": collector_result.get("meta", {
+            "collector_type": metadata.get("collector_type", "generic"),
+            "collector_name": metadata.get("collector_name", name),
+            "collector_version": metadata.get("collector_version", "0.0.0"),
+            "collection_time": metadata.get("collection_time", collection_time),
+        }),
+        "data": collector_result.get("data", {}),
+    }
+    if "message" in collector_result:
+        section["message"] = collector_result["message"]
+    return section
+
+
+def build_snapshot(
+    collector_names: List[str],
+    sections: Dict[str, Dict[str, Any]],
+    schema_path: Optional[str] = None,
+    validate: bool = True,
+    debug: bool = False,
+) -> Dict[str, Any]:
+    """Assemble collector sections into a document shaped like ``collect_all`` output.
+
+    Collectors without a section yet are left out; the host section is lifted
+    to the top-level ``host`` key unless it failed.
+    """
+    result: Dict[str, Any] = {
+        "harvester": {
+            "harvester-version": harvester_version(),
+            "collection_time": now_iso_tz(),
+            "collectors_used": list(collector_names),
+        },
+        "host": {},
+        "collectors": {},
+    }
+
+    for name in collector_names:
+        section = sections.get(name)
+        if section is None:
+            continue
+        if name == "host" and section.get("meta", {}).get("status") != "failed":
+            result["host"] = section.get("data", {})
+        else:
+            result["collectors"][name] = section
+
+    try:
+        result["system"] = collect_system_info()
+    except Exception as e:
+        result["system"] = {"error": f"Failed to collect system info: {str(e)}"}
+        if debug:
+            result["system"]["debug"] = {"traceback": traceback.format_exc()}
+
+    if validate and schema_path:
+        apply_validation(result, schema_path, debug=debug)
+
+    return result
+
+
+def snapshot_sections(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Split an assembled document back into ``{name: section}``, the inverse of ``build_snapshot``."""
+    sections = dict(result.get("collectors") or {})
+    if result.get("host"):
+        sections["host"] = {
+            "meta": {"collector_name": "host", "collector_type": "host", "status": "success"},
+            "data": result["host"],
+        }
+    return sections
+
+
+def apply_validation(result: Dict[str, Any], schema_path: str, debug: bool = False) -> Dict[str, Any]:
+    """Validate ``result`` with the cached validator for ``schema_path``.
+
+    Like ``collect_all``, a failure is recorded as ``harvester.validation_error``
+    rather than raised.
+    """
+    try:
+        get_validator(schema_path).validate(result)
+    except Exception as e:
+        if debug:
+            result["harvester"]["validation_error"] = {
+                "error": str(e),
+                "traceback": traceback.format_exc(),
+            }
+        else:
+            result["harvester"]["validation_error"] = str(e)
+    return result
@@ -0,0 +1,245 @@
+"""Local change history of published snapshots.
+
+Each publish records only the fields that changed since the previous one, per
+collector, in a SQLite database. Sections are flattened to dotted leaf paths
+(``data.peers``, ``meta.status``); lists are stored whole. A field that
+disappears is recorded as removed. Rows are clustered by field and time, so a
+``/history`` query reads only the range it returns.
+
+Retention is by size: once the live pages exceed ``max_bytes`` the oldest
+tenth of the covered time span is dropped. Every field still keeps its last
+change before the cutoff, so the value at any retained point stays known.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+log = logging.getLogger("dwellir-harvester")
+
+# Leaf keys that change on every publish without the node changing, at any
+# depth: collectors nest their own meta inside data
+VOLATILE_KEYS = {"collection_time", "age_seconds"}
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+# Share of the covered time span dropped per pruning pass
+PRUNE_FRACTION = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fields (
+    id INTEGER PRIMARY KEY,
+    collector TEXT NOT NULL,
+    field TEXT NOT NULL,
+    UNIQUE (collector, field)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    field_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    value TEXT,
+    PRIMARY KEY (field_id, ts, version)
+) WITHOUT ROWID;
+"""
+
+
+def flatten(value: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Yield ``(dotted path, leaf)`` pairs of nested dicts; lists and scalars are leaves."""
+    if isinstance(value, dict) and value:
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else str(key))
+    elif prefix:
+        yield prefix, value
+
+
+def snapshot_fields(result: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+    """``{(collector, field): JSON value}`` for every non-volatile leaf of a snapshot."""
+    sections = dict(result.get("collectors") or {})
+    if result.get("host"):
+        sections["host"] = {"data": result["host"]}
+    fields = {}
+    for collector, section in sections.items():
+        for field, value in flatten(section):
+            if field.rpartition(".")[2] not in VOLATILE_KEYS:
+                fields[(collector, field)] = json.dumps(value, separators=(",", ":"), sort_keys=True)
+    return fields
+
+
+def parse_time(value: str) -> float:
+    """Unix seconds or an ISO 8601 time (UTC if no offset) -> Unix seconds. Raises ValueError."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _point(ts: int, version: int, value: Optional[str]) -> Dict[str, Any]:
+    point: Dict[str, Any] = {
+        "time": datetime.fromtimestamp(ts / 1000, timezone.utc).isoformat(),
+        "ts": ts / 1000,
+        "version": version,
+    }
+    if value is None:
+        point["removed"] = True
+    else:
+        point["value"] = json.loads(value)
+    return point
+
+
+class HistoryStore:
+    """Append-only field change log in a SQLite file."""
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # Must be set before the first table exists to let pruning shrink the file
+        self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._field_ids: Dict[Tuple[str, str], int] = {
+            (collector, field): field_id
+            for field_id, collector, field in self._conn.execute("SELECT id, collector, field FROM fields")
+        }
+        # Latest recorded value per field, to diff the next snapshot against
+        self._last: Dict[int, Optional[str]] = {
+            field_id: value
+            for field_id, value, _ in self._conn.execute(
+                "SELECT field_id, value, MAX(ts) FROM changes GROUP BY field_id"
+            )
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _field_id(self, key: Tuple[str, str]) -> int:
+        field_id = self._field_ids.get(key)
+        if field_id is None:
+            cursor = self._conn.execute("INSERT INTO fields (collector, field) VALUES (?, ?)", key)
+            # Always set after an INSERT
+            field_id = self._field_ids[key] = cursor.lastrowid or 0
+        return field_id
+
+    def record(self, result: Dict[str, Any], version: int, ts: Optional[float] = None) -> int:
+        """Store the fields of ``result`` that changed since the last record; returns how many."""
+        ts_ms = int((time.time() if ts is None else ts) * 1000)
+        fields = snapshot_fields(result)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                seen = set()
+                rows: List[Tuple[int, int, int, Optional[str]]] = []
+                for key, value in fields.items():
+                    field_id = self._field_id(key)
+                    seen.add(field_id)
+                    if self._last.get(field_id) != value:
+                        rows.append((field_id, ts_ms, version, value))
+                for field_id, last in self._last.items():
+                    if field_id not in seen and last is not None:
+                        rows.append((field_id, ts_ms, version, None))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO changes (field_id, ts, version, value) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for field_id, _, _, new_value in rows:
+                self._last[field_id] = new_value
+            if rows and self.size() > self.max_bytes:
+                self._prune()
+        return len(rows)
+
+    def size(self) -> int:
+        """Bytes in use by the database, not counting free pages."""
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def _prune(self):
+        oldest, newest = self._conn.execute("SELECT MIN(ts), MAX(ts) FROM changes").fetchone()
+        if oldest is None or oldest == newest:
+            return
+        cutoff = oldest + max(1, int((newest - oldest) * PRUNE_FRACTION))
+        deleted = self._conn.execute(
+            "DELETE FROM changes WHERE ts < ? AND (field_id, ts) NOT IN "
+            "(SELECT field_id, MAX(ts) FROM changes WHERE ts < ? GROUP BY field_id)",
+            (cutoff, cutoff),
+        ).rowcount
+        self._conn.execute("PRAGMA incremental_vacuum")
+        log.info(f"History over {self.max_bytes} bytes; pruned {deleted} change(s) before {cutoff / 1000:.0f}")
+
+    def fields(self) -> Dict[str, List[str]]:
+        """``{collector: [field, ...]}`` of everything ever recorded."""
+        with self._lock:
+            known = sorted(self._field_ids)
+        listing: Dict[str, List[str]] = {}
+        for collector, field in known:
+            listing.setdefault(collector, []).append(field)
+        return listing
+
+    def query(
+        self,
+        collector: str,
+        field: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> Dict[str, Any]:
+        """Changes of a collector's fields between ``start`` and ``end`` (Unix seconds, inclusive).
+
+        ``field`` selects one field or, as a dotted prefix, a subtree. Each
+        field reports its value as of ``start`` (``initial``, the last change
+        before it) and its changes in the range, oldest first. At most
+        ``limit`` changes are returned in total.
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        start_ms = None if start is None else int(start * 1000)
+        end_ms = None if end is None else int(end * 1000)
+        with self._lock:
+            selected = sorted(
+                (name, field_id) for (owner, name), field_id in self._field_ids.items()
+                if owner == collector and (field is None or name == field or name.startswith(field + "."))
+            )
+            fields: Dict[str, Any] = {}
+            remaining = limit
+            truncated = False
+            for name, field_id in selected:
+                initial = None
+                if start_ms is not None:
+                    row = self._conn.execute(
+                        "SELECT ts, version, value FROM changes WHERE field_id = ? AND ts < ? "
+                        "ORDER BY ts DESC, version DESC LIMIT 1",
+                        (field_id, start_ms),
+                    ).fetchone()
+                    initial = _point(*row) if row else None
+                rows = self._conn.execute(
+                    "SELECT ts, version, value FROM changes WHERE field_id = ? AND ts >= ? AND ts <= ? "
+                    "ORDER BY ts, version LIMIT ?",
+                    (
+                        field_id,
+                        start_ms if start_ms is not None else -1,
+                        end_ms if end_ms is not None else 2 ** 62,
+                        remaining + 1,
+                    ),
+                ).fetchall()
+                if len(rows) > remaining:
+                    rows = rows[:remaining]
+                    truncated = True
+                remaining -= len(rows)
+                if rows or initial:
+                    fields[name] = {"initial": initial, "changes": [_point(*row) for row in rows]}
+                if remaining <= 0:
+                    truncated = truncated or name != selected[-1][0]
+                    break
+        return {"collector": collector, "field": field, "from": start, "to": end, "fields": fields, "truncated": truncated}
@@ -0,0 +1,245 @@
+"""Prometheus metrics for the daemon.
+
+A small, dependency-free implementation of counters, gauges and histograms
+rendered in the Prometheus text exposition format (version 0.0.4), which
+OpenMetrics scrapers also accept.
+"""
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COLLECTOR_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+HTTP_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._values.items())
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """An ordered collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class HarvesterMetrics(MetricsRegistry):
+    """The metrics the daemon exports on ``/metrics``."""
+
+    def __init__(self):
+        super().__init__()
+        self.collector_duration = self.register(Histogram(
+            "dwellir_harvester_collector_run_duration_seconds",
+            "Duration of collector runs.",
+            ["collector"],
+            COLLECTOR_BUCKETS,
+        ))
+        self.collector_runs = self.register(Counter(
+            "dwellir_harvester_collector_runs_total",
+            "Collector runs by outcome (success, partial, failed, timeout).",
+            ["collector", "status"],
+        ))
+        self.collector_last_success = self.register(Gauge(
+            "dwellir_harvester_collector_last_success_timestamp_seconds",
+            "Unix time of the last successful run of each collector.",
+            ["collector"],
+        ))
+        self.validation_duration = self.register(Histogram(
+            "dwellir_harvester_validation_duration_seconds",
+            "Time spent validating snapshots against the schema.",
+        ))
+        self.serialization_duration = self.register(Histogram(
+            "dwellir_harvester_serialization_duration_seconds",
+            "Time spent serializing and compressing published snapshots.",
+        ))
+        self.output_write_duration = self.register(Histogram(
+            "dwellir_harvester_output_write_duration_seconds",
+            "Time spent writing the output file.",
+        ))
+        self.output_writes = self.register(Counter(
+            "dwellir_harvester_output_writes_total",
+            "Output file persistence attempts by result (written, unchanged, error).",
+            ["result"],
+        ))
+        self.snapshot_version = self.register(Gauge(
+            "dwellir_harvester_snapshot_version",
+            "Version of the currently published snapshot.",
+        ))
+        self.http_duration = self.register(Histogram(
+            "dwellir_harvester_http_request_duration_seconds",
+            "HTTP request latency by path and status code.",
+            ["path", "status"],
+            HTTP_BUCKETS,
+        ))
+        self.auth_rejections = self.register(Counter(
+            "dwellir_harvester_auth_rejections_total",
+            "Rejected HTTP requests by reason.",
+            ["reason"],
+        ))
+        self.config_reloads = self.register(Counter(
+            "dwellir_harvester_config_reloads_total",
+            "Config file reloads by result (success, error).",
+            ["result"],
+        ))
+        self.token_reloads = self.register(Counter(
+            "dwellir_harvester_token_reloads_total",
+            "Auth token file reloads by result (success, error).",
+            ["result"],
+        ))
+        self.auth_requests = self.register(Counter(
+            "dwellir_harvester_auth_requests_total",
+            "Authenticated HTTP requests by token label.",
+            ["label"],
+        ))
+        self.rate_limited = self.register(Counter(
+            "dwellir_harvester_rate_limited_total",
+            "HTTP requests rejected by a token label's rate limit.",
+            ["label"],
+        ))
+        self.http_rate_limited = self.register(Counter(
+            "dwellir_harvester_http_rate_limited_total",
+            "HTTP requests rejected by an endpoint rate limit, by path.",
+            ["path"],
+        ))
+        self.worker_recycles = self.register(Counter(
+            "dwellir_harvester_worker_recycles_total",
+            "Collector worker processes replaced, by reason (runs, memory, exited).",
+            ["reason"],
+        ))
+        self.push_records = self.register(Counter(
+            "dwellir_harvester_push_records_total",
+            "Snapshot records pushed, by result (sent, failed attempts, rejected by the endpoint, dropped from the spool).",
+            ["result"],
+        ))
+        self.http_coalesced = self.register(Counter(
+            "dwellir_harvester_http_coalesced_total",
+            "HTTP requests served from a concurrent identical request's response build, by path.",
+            ["path"],
+        ))
+        self.refresh_runs = self.register(Counter(
+            "dwellir_harvester_refresh_runs_total",
+            "Collectors requested on POST /collect, by outcome (started, running, recent).",
+            ["result"],
+        ))
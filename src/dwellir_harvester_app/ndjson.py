@@ -0,0 +1,142 @@
+"""Newline-delimited JSON (NDJSON) form of a harvest.
+
+Instead of one document, a harvest is written as one compact line per
+collector, each as soon as that collector finishes, followed by a harvester
+envelope line:
+
+- ``{"type": "collector", "name": ..., "meta": ..., "data": ..., "message": ...}``
+- ``{"type": "host", "data": ...}`` for a successful host collector, which the
+  JSON document lifts to its top-level ``host`` key
+- ``{"type": "harvester", "harvester": ..., "system": ...}``, always last
+
+Only one section is encoded at a time, so memory does not grow with the size
+of the whole document.
+"""
+import json
+import traceback
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set
+
+from .harvest import build_snapshot
+from .scheduler import RunJob, run_batch
+from .snapshot import dumps_compact
+from .validation import get_validator
+
+CONTENT_TYPE = "application/x-ndjson"
+
+
+def section_line(name: str, section: Dict[str, Any]) -> bytes:
+    """The line for one collector's section."""
+    if name == "host" and section.get("meta", {}).get("status") != "failed":
+        return dumps_compact({"type": "host", "data": section.get("data", {})}) + b"\n"
+    line = {"type": "collector", "name": name}
+    line.update(section)
+    return dumps_compact(line) + b"\n"
+
+
+def envelope_line(result: Dict[str, Any], version: Optional[int] = None) -> bytes:
+    """The closing line: the ``harvester`` and ``system`` parts of ``result``."""
+    line: Dict[str, Any] = {"type": "harvester"}
+    if version is not None:
+        line["version"] = version
+    line["harvester"] = result.get("harvester", {})
+    line["system"] = result.get("system", {})
+    return dumps_compact(line) + b"\n"
+
+
+def document_lines(
+    result: Dict[str, Any],
+    names: Optional[Set[str]] = None,
+    version: Optional[int] = None,
+) -> Iterator[bytes]:
+    """NDJSON lines for an assembled snapshot, limited to the collectors in ``names``."""
+    if result.get("host") and (names is None or "host" in names):
+        yield dumps_compact({"type": "host", "data": result["host"]}) + b"\n"
+    for name, section in result.get("collectors", {}).items():
+        if names is None or name in names:
+            yield section_line(name, section)
+    yield envelope_line(result, version)
+
+
+def read_document(lines: Iterable[bytes]) -> Dict[str, Any]:
+    """Reassemble the document that ``document_lines`` produced. Raises ValueError."""
+    result: Dict[str, Any] = {"harvester": {}, "host": {}, "collectors": {}}
+    for raw in lines:
+        if not raw.strip():
+            continue
+        line = json.loads(raw)
+        kind = line.pop("type", None) if isinstance(line, dict) else None
+        if kind == "host":
+            result["host"] = line.get("data", {})
+        elif kind == "collector" and isinstance(line.get("name"), str):
+            result["collectors"][line.pop("name")] = line
+        elif kind == "harvester":
+            result["harvester"] = line.get("harvester", {})
+            result["system"] = line.get("system", {})
+        else:
+            raise ValueError(f"Unexpected NDJSON line type: {kind!r}")
+    return result
+
+
+def update_lines(
+    old: Dict[str, Any],
+    new: Dict[str, Any],
+    names: Optional[Set[str]] = None,
+    version: Optional[int] = None,
+) -> List[bytes]:
+    """Lines for the sections that changed between two snapshots, then the envelope.
+
+    Empty when a collector filter is given and none of those collectors changed.
+    """
+    lines = []
+    if new.get("host") and new.get("host") != old.get("host") and (names is None or "host" in names):
+        lines.append(dumps_compact({"type": "host", "data": new["host"]}) + b"\n")
+    old_sections = old.get("collectors", {})
+    for name, section in new.get("collectors", {}).items():
+        if (names is None or name in names) and old_sections.get(name) != section:
+            lines.append(section_line(name, section))
+    if lines or names is None:
+        lines.append(envelope_line(new, version))
+    return lines
+
+
+def stream_harvest(
+    out: BinaryIO,
+    names: List[str],
+    run_job: RunJob,
+    schema_path: Optional[str] = None,
+    validate: bool = True,
+    debug: bool = False,
+    **batch_options: Any,
+) -> Dict[str, Any]:
+    """Run the collectors with ``run_batch`` and write each section to ``out`` as it lands.
+
+    Sections are validated one by one as they are written; the first
+    validation failure is reported as ``harvester.validation_error`` in the
+    envelope line, like ``collect_all`` does in the JSON document. Returns the
+    envelope (the snapshot without its sections).
+    """
+    validator = get_validator(schema_path) if validate and schema_path else None
+    failures: List[Dict[str, Any]] = []
+
+    def check(validate_fn, *args):
+        try:
+            validate_fn(*args)
+        except Exception as e:
+            failures.append({"error": str(e), "traceback": traceback.format_exc()})
+
+    def emit(name: str, section: Dict[str, Any]):
+        if validator is not None:
+            check(validator.validate_section, name, section)
+        out.write(section_line(name, section))
+        out.flush()
+
+    run_batch(names, run_job, on_result=emit, **batch_options)
+
+    envelope = build_snapshot(names, {}, validate=False, debug=debug)
+    if validator is not None:
+        check(validator.validate, envelope)
+    if failures:
+        envelope["harvester"]["validation_error"] = failures[0] if debug else failures[0]["error"]
+    out.write(envelope_line(envelope))
+    out.flush()
+    return envelope
@@ -0,0 +1,159 @@
+"""Atomic persistence of harvested data to the output file."""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from .ndjson import document_lines, read_document
+from .snapshot import dumps_compact
+
+log = logging.getLogger("dwellir-harvester")
+
+FSYNC_MODES = ["none", "file", "full"]
+OUTPUT_FORMATS = ["indent", "compact", "ndjson"]
+
+
+@contextmanager
+def atomic_writer(path: str, fsync: str = "file") -> Iterator[BinaryIO]:
+    """Yield a binary file that replaces ``path`` atomically when the block exits cleanly.
+
+    Data is streamed to a temp file in the same directory and renamed over
+    ``path``, so readers never see a partial file. ``fsync`` is ``none`` (leave
+    flushing to the OS), ``file`` (fsync the data before the rename) or
+    ``full`` (also fsync the directory so the rename itself is durable).
+    """
+    if fsync not in FSYNC_MODES:
+        raise ValueError(f"Unknown fsync mode: {fsync}")
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            if fsync != "none":
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync == "full":
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write_bytes(path: str, data: bytes, fsync: str = "file"):
+    """Write ``data`` to ``path`` atomically; see ``atomic_writer`` for ``fsync``."""
+    with atomic_writer(path, fsync) as f:
+        f.write(data)
+
+
+def content_fingerprint(result: Dict[str, Any]) -> str:
+    """Hash of ``result`` ignoring fields that change on every publish.
+
+    ``harvester.collection_time``, each section's ``meta.collection_time`` and
+    ``system.uptime`` are left out, so re-collecting identical data does not
+    count as a change.
+    """
+    stripped = dict(result)
+    if isinstance(result.get("harvester"), dict):
+        stripped["harvester"] = {k: v for k, v in result["harvester"].items() if k != "collection_time"}
+    if isinstance(result.get("system"), dict):
+        stripped["system"] = {k: v for k, v in result["system"].items() if k != "uptime"}
+    if isinstance(result.get("collectors"), dict):
+        stripped["collectors"] = {}
+        for name, section in result["collectors"].items():
+            if isinstance(section, dict) and isinstance(section.get("meta"), dict):
+                section = dict(section)
+                section["meta"] = {k: v for k, v in section["meta"].items() if k != "collection_time"}
+            stripped["collectors"][name] = section
+    return hashlib.sha256(dumps_compact(stripped)).hexdigest()
+
+
+def load_output(path: str) -> Tuple[Dict[str, Any], float]:
+    """Read back an output file in any ``OUTPUT_FORMATS`` layout; returns ``(document, mtime)``.
+
+    Raises OSError if the file cannot be read and ValueError if it is not a
+    harvest document.
+    """
+    with open(path, "rb") as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        data = f.read()
+    try:
+        document = json.loads(data)
+    except ValueError:
+        document = None
+    if not isinstance(document, dict) or "type" in document:
+        # NDJSON (a one-line NDJSON file also parses as a JSON object)
+        document = read_document(data.splitlines())
+    if not isinstance(document.get("collectors"), dict):
+        raise ValueError("not a harvest document")
+    return document, mtime
+
+
+class OutputWriter:
+    """Persist published results to a file, skipping writes when nothing changed.
+
+    An unchanged document is still rewritten once ``refresh`` seconds have
+    passed since the last write, so the file's timestamps never go too stale.
+    """
+
+    def __init__(self, path: str, fsync: str = "file", output_format: str = "indent", refresh: float = 3600):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.path = path
+        self.fsync = fsync
+        self.output_format = output_format
+        self.refresh = refresh
+        self.last_duration: Optional[float] = None
+        self._fingerprint: Optional[str] = None
+        self._written_at = 0.0
+
+    def write(self, result: Dict[str, Any], compact_body: Optional[bytes] = None) -> bool:
+        """Write ``result`` if it changed; returns True if the file was written.
+
+        ``compact_body`` lets callers pass already-serialized compact JSON.
+        """
+        fingerprint = content_fingerprint(result)
+        now = time.monotonic()
+        if fingerprint == self._fingerprint and now - self._written_at < self.refresh:
+            log.debug(f"Output unchanged; not rewriting {self.path}")
+            return False
+
+        start = time.perf_counter()
+        if self.output_format == "ndjson":
+            # Streamed line by line instead of building the whole document in memory
+            size = 0
+            with atomic_writer(self.path, fsync=self.fsync) as f:
+                for line in document_lines(result):
+                    f.write(line)
+                    size += len(line)
+        else:
+            if self.output_format == "compact":
+                data = compact_body if compact_body is not None else dumps_compact(result)
+            else:
+                data = json.dumps(result, indent=2).encode("utf-8")
+            atomic_write_bytes(self.path, data, fsync=self.fsync)
+            size = len(data)
+        self.last_duration = time.perf_counter() - start
+
+        self._fingerprint = fingerprint
+        self._written_at = now
+        log.debug(f"Wrote {size} bytes to {self.path} in {self.last_duration * 1000:.2f} ms")
+        return True
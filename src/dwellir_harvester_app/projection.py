@@ -0,0 +1,104 @@
+"""Projections of the published document for ``/metadata?collectors=&fields=``.
+
+``collectors`` keeps only the named sections, as on ``/metadata/stream``.
+``fields`` keeps only the listed dotted paths, where ``*`` matches any key at
+its level, e.g. ``collectors.*.data.version,harvester.collection_time``.
+Paths that do not exist are left out. A query is compiled once into a tree
+of path segments; the daemon applies it once per snapshot version.
+"""
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+WILDCARD = "*"
+# Paths accepted in one ?fields= query
+MAX_FIELDS = 64
+# Projected views cached per snapshot; further distinct queries are built per request
+MAX_PROJECTIONS = 64
+
+_MISSING = object()
+
+
+class Projection:
+    """A compiled ``collectors``/``fields`` query."""
+
+    def __init__(self, collectors: Optional[FrozenSet[str]], fields: Optional[Tuple[str, ...]]):
+        self.key = (collectors, fields)
+        self.collectors = collectors
+        # segment -> subtree; None selects the whole value
+        self.tree: Optional[Dict[str, Any]] = None
+        for field in fields or ():
+            self.tree = _add_path(self.tree or {}, field.split("."))
+
+    def apply(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        document = result
+        if self.collectors is not None:
+            document = {key: value for key, value in result.items() if key not in ("host", "collectors")}
+            if "host" in self.collectors and "host" in result:
+                document["host"] = result["host"]
+            document["collectors"] = {
+                name: section for name, section in result.get("collectors", {}).items() if name in self.collectors
+            }
+        if self.tree is None:
+            return document
+        selected = _select(document, self.tree)
+        return {} if selected is _MISSING else selected
+
+
+def _add_path(tree: Dict[str, Any], segments) -> Dict[str, Any]:
+    head, rest = segments[0], segments[1:]
+    if not rest:
+        tree[head] = None
+    elif head not in tree or tree[head] is not None:
+        # A shorter path already selecting the whole value wins
+        tree[head] = _add_path(tree.get(head) or {}, rest)
+    return tree
+
+
+def _merge(a: Any, b: Any) -> Any:
+    if isinstance(a, dict) and isinstance(b, dict):
+        merged = dict(a)
+        for key, value in b.items():
+            merged[key] = _merge(merged[key], value) if key in merged else value
+        return merged
+    return b
+
+
+def _select(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if tree is None:
+        return value
+    if not isinstance(value, dict):
+        return _MISSING
+    out: Dict[str, Any] = {}
+    for segment, subtree in tree.items():
+        keys = value.keys() if segment == WILDCARD else ([segment] if segment in value else [])
+        for key in keys:
+            selected = _select(value[key], subtree)
+            if selected is not _MISSING:
+                out[key] = _merge(out[key], selected) if key in out else selected
+    return out if out else _MISSING
+
+
+@lru_cache(maxsize=256)
+def _compile(collectors: Optional[FrozenSet[str]], fields: Optional[Tuple[str, ...]]) -> Projection:
+    return Projection(collectors, fields)
+
+
+def compile_projection(
+    collectors: Optional[Iterable[str]] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> Optional[Projection]:
+    """The compiled projection for a query, shared by equal queries; None when nothing is filtered.
+
+    Raises ValueError for an empty path segment or more than ``MAX_FIELDS`` paths.
+    """
+    names = frozenset(collectors) if collectors is not None else None
+    paths = tuple(sorted(set(fields))) if fields is not None else None
+    if names is None and paths is None:
+        return None
+    if paths is not None:
+        if len(paths) > MAX_FIELDS:
+            raise ValueError(f"fields accepts at most {MAX_FIELDS} paths")
+        for path in paths:
+            if not all(path.split(".")):
+                raise ValueError(f"Invalid field path '{path}'")
+    return _compile(names, paths)
@@ -0,0 +1,289 @@
+"""Push published snapshots to a remote HTTP endpoint.
+
+For daemons behind NAT the central service cannot pull ``/metadata``. With
+``--push-url`` every publish is queued as a record, full or as a JSON merge
+patch (RFC 7396) against the previous record. A sender thread POSTs the
+records in batches as compressed NDJSON, one record per line::
+
+    {"type": "full", "version": 7, "document": {...}}
+    {"type": "merge-patch", "version": 8, "since": 7, "patch": {...}}
+
+Records wait in a spool until the endpoint answers 2xx. A 4xx answer other
+than 408, 425 or 429 drops the batch; any other answer or a connection error
+is retried with exponential backoff. Records so survive
+outages and, with a spool directory, restarts. The spool is bounded by size.
+When the oldest records are dropped, the next record is sent in full. A
+receiver should skip a patch whose ``since`` is not the last version it
+applied and wait for the next full record.
+"""
+import http.client
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .delta import PatchNotRepresentable, merge_patch
+from .ndjson import CONTENT_TYPE as NDJSON_CONTENT_TYPE
+from .persist import atomic_write_bytes
+from .snapshot import Snapshot, available_encodings, dumps_compact, encode_body
+
+log = logging.getLogger("dwellir-harvester")
+
+PUSH_MODES = ["delta", "full"]
+# 4xx answers worth retrying; any other 4xx rejects the batch for good
+RETRYABLE_CLIENT_ERRORS = {408, 425, 429}
+
+
+def check_push_url(url: str):
+    """Return the split ``url``; raises ValueError unless it is an http(s) URL."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Push URL must be an http(s) URL: {url}")
+    return parts
+
+
+class Spool:
+    """Ordered records waiting to be sent, in a directory or in memory.
+
+    In a directory each record is one file named by its sequence number,
+    written atomically, so a restart resumes where the last process stopped.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # seq -> (size, data or None when on disk)
+        self._records: "OrderedDict[int, Tuple[int, Optional[bytes]]]" = OrderedDict()
+        self._bytes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".json") and not name.startswith("."):
+                    try:
+                        size = os.path.getsize(os.path.join(directory, name))
+                        self._records[int(name[:-5])] = (size, None)
+                    except (OSError, ValueError):
+                        continue
+                    self._bytes += size
+        self._next = (next(reversed(self._records)) + 1) if self._records else 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def _path(self, seq: int) -> str:
+        # Only used for a spool kept in a directory
+        return os.path.join(self.directory or "", f"{seq:016d}.json")
+
+    def append(self, data: bytes) -> int:
+        """Store a record; returns how many of the oldest records were dropped to stay under ``max_bytes``."""
+        with self._lock:
+            seq = self._next
+            self._next += 1
+            if self.directory:
+                atomic_write_bytes(self._path(seq), data, fsync="none")
+            self._records[seq] = (len(data), None if self.directory else data)
+            self._bytes += len(data)
+            dropped = []
+            while self._bytes > self.max_bytes and len(self._records) > 1:
+                dropped.append(self._records.popitem(last=False))
+        for old_seq, (size, _) in dropped:
+            self._forget(old_seq, size)
+        return len(dropped)
+
+    def _forget(self, seq: int, size: int):
+        with self._lock:
+            self._bytes -= size
+        if self.directory:
+            try:
+                os.unlink(self._path(seq))
+            except FileNotFoundError:
+                pass
+
+    def peek(self, limit: int) -> List[Tuple[int, bytes]]:
+        """The oldest ``limit`` records as ``(seq, data)``."""
+        with self._lock:
+            head = [(seq, data) for seq, (_, data) in islice(self._records.items(), limit)]
+        records = []
+        for seq, data in head:
+            if data is None:
+                try:
+                    with open(self._path(seq), "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    continue
+            records.append((seq, data))
+        return records
+
+    def remove(self, seqs: List[int]):
+        """Drop sent records."""
+        for seq in seqs:
+            with self._lock:
+                entry = self._records.pop(seq, None)
+            if entry is not None:
+                self._forget(seq, entry[0])
+
+
+class Pusher:
+    """Queues published snapshots and sends them to ``url`` from a background thread."""
+
+    def __init__(
+        self,
+        url: str,
+        spool: Spool,
+        mode: str = "delta",
+        batch_size: int = 50,
+        batch_delay: float = 5.0,
+        encoding: str = "gzip",
+        token: Optional[str] = None,
+        timeout: float = 10.0,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        on_records: Optional[Callable[[str, int], None]] = None,
+    ):
+        parts = check_push_url(url)
+        if mode not in PUSH_MODES:
+            raise ValueError(f"Unknown push mode: {mode}")
+        if encoding not in available_encodings():
+            raise ValueError(f"Push encoding {encoding} is not available here")
+        self.url = url
+        self._parts = parts
+        self.spool = spool
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.batch_delay = batch_delay
+        self.encoding = encoding
+        self.token = token
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_records = on_records
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._last: Optional[Snapshot] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+        # Roughly when the oldest spooled record went in, to bound how long records wait
+        self._oldest_at: Optional[float] = None
+
+    def enqueue(self, snapshot: Snapshot):
+        """Spool a record for ``snapshot``, a merge patch against the previous one in delta mode."""
+        record: Dict[str, Any] = {"version": snapshot.version}
+        base = self._last
+        try:
+            if self.mode != "delta" or base is None:
+                raise PatchNotRepresentable("no base")
+            record.update({"type": "merge-patch", "since": base.version, "patch": merge_patch(base.result, snapshot.result)})
+        except PatchNotRepresentable:
+            record.update({"type": "full", "document": snapshot.result})
+        dropped = self.spool.append(dumps_compact(record))
+        # A patch chain with a dropped link is useless; restart it with a full record
+        self._last = None if dropped else snapshot
+        if dropped:
+            log.warning(f"Push spool over {self.spool.max_bytes} bytes; dropped {dropped} oldest record(s)")
+            self._report("dropped", dropped)
+        if self._oldest_at is None or len(self.spool) >= self.batch_size:
+            self._wakeup.set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="push", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Stop sending; unsent records stay in the spool."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._close_connection()
+
+    def _close_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        # One persistent connection, reused across batches until it fails
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._parts.scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(self._parts.hostname, self._parts.port, timeout=self.timeout)
+        return self._conn
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            if not len(self.spool):
+                self._oldest_at = None
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            waited = time.monotonic() - self._oldest_at
+            if len(self.spool) < self.batch_size and waited < self.batch_delay:
+                self._wakeup.wait(self.batch_delay - waited)
+                self._wakeup.clear()
+                continue
+            if self.flush():
+                self._failures = 0
+                self._oldest_at = time.monotonic() if len(self.spool) else None
+            else:
+                self._failures += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** (self._failures - 1))
+                # Jitter keeps a fleet from retrying in lockstep after an outage
+                self._stopped.wait(delay * random.uniform(0.5, 1.0))
+
+    def flush(self) -> bool:
+        """Send one batch of the oldest records; returns False if the endpoint did not take it."""
+        records = self.spool.peek(self.batch_size)
+        if not records:
+            return True
+        body = b"".join(data + b"\n" for _, data in records)
+        headers = {"Content-Type": NDJSON_CONTENT_TYPE, "User-Agent": "dwellir-harvester"}
+        if self.encoding != "identity":
+            body = encode_body(body, self.encoding)
+            headers["Content-Encoding"] = self.encoding
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        path = self._parts.path or "/"
+        if self._parts.query:
+            path += f"?{self._parts.query}"
+
+        try:
+            conn = self._connection()
+            conn.request("POST", path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.will_close:
+                self._close_connection()
+        except (OSError, http.client.HTTPException, socket.timeout) as e:
+            self._close_connection()
+            log.warning(f"Push to {self.url} failed: {e}")
+            self._report("failed", len(records))
+            return False
+        if 400 <= resp.status < 500 and resp.status not in RETRYABLE_CLIENT_ERRORS:
+            # Sending the same batch again would get the same answer and block the spool behind it
+            log.error(f"Push to {self.url} rejected with HTTP {resp.status}; dropping {len(records)} record(s)")
+            self.spool.remove([seq for seq, _ in records])
+            # Patches after the dropped records have no base at the receiver
+            self._last = None
+            self._report("rejected", len(records))
+            return True
+        if not 200 <= resp.status < 300:
+            log.warning(f"Push to {self.url} rejected with HTTP {resp.status}")
+            self._report("failed", len(records))
+            return False
+        self.spool.remove([seq for seq, _ in records])
+        self._report("sent", len(records))
+        return True
+
+    def _report(self, result: str, records: int):
+        if self.on_records:
+            self.on_records(result, records)
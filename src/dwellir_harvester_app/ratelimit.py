@@ -0,0 +1,100 @@
+"""Token-bucket rate limiting for the daemon's HTTP clients."""
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# Buckets kept before idle (full) ones are dropped, bounding memory with many client IPs
+MAX_BUCKETS = 10000
+
+
+def parse_rate_limits(values: Optional[Iterable[str]], option: str = "--rate-limit") -> Dict[str, Tuple[float, float]]:
+    """Parse repeated ``ENDPOINT=RATE[/BURST]`` options into ``{endpoint: (rate, burst)}``.
+
+    ``RATE`` is requests per second and ``BURST`` defaults to ``RATE`` (at
+    least 1). A rate of 0 means unlimited. Raises ValueError on malformed entries.
+    """
+    limits: Dict[str, Tuple[float, float]] = {}
+    for value in values or []:
+        endpoint, sep, spec = str(value).partition("=")
+        endpoint = endpoint.strip()
+        rate, _, burst = spec.partition("/")
+        if not sep or not endpoint:
+            raise ValueError(f"Invalid {option} '{value}', expected ENDPOINT=RATE[/BURST]")
+        try:
+            parsed = (float(rate), float(burst) if burst else float(rate))
+        except ValueError:
+            raise ValueError(f"Invalid {option} '{value}', RATE and BURST must be numbers") from None
+        if parsed[0] < 0 or parsed[1] < 0:
+            raise ValueError(f"Invalid {option} '{value}', RATE and BURST must not be negative")
+        limits[endpoint] = parsed
+    return limits
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average and bursts of ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: Optional[float] = None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take one token; returns 0 if allowed, else the seconds until one is available."""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """One token bucket per client key, created on first use."""
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, key: str, rate: float, burst: float) -> float:
+        """Count a request by ``key``; returns 0 if allowed, else the seconds to wait.
+
+        A changed ``rate`` or ``burst`` (e.g. after a token file reload) applies
+        to the existing bucket.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._evict(now)
+                bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            elif bucket.rate != rate or bucket.capacity != max(1.0, burst):
+                bucket.rate, bucket.capacity = rate, max(1.0, burst)
+            return bucket.take(now)
+
+    def peek(self, key: str) -> float:
+        """Seconds until ``key`` may make a request, without counting one; 0 if allowed or unseen."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0.0
+            bucket.refill(now)
+            return 0.0 if bucket.tokens >= 1 else (1 - bucket.tokens) / bucket.rate
+
+    def _evict(self, now: float):
+        """Drop buckets that have refilled; a client coming back starts with a full one anyway."""
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._buckets[key]
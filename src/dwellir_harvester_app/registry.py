@@ -0,0 +1,157 @@
+"""Long-lived collector registry.
+
+``load_collectors`` from the lib scans built-ins, entry points and plugin paths
+on every call, and ``run_collector`` calls it once per collector run. The
+registry does that discovery once and keeps the result. It re-imports only
+plugin files whose mtime changed under the watched plugin paths.
+"""
+import importlib
+import logging
+import os
+import pkgutil
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dwellir_harvester.core import load_collectors
+
+log = logging.getLogger("dwellir-harvester")
+
+BUILTIN_PACKAGE = "dwellir_harvester.collectors"
+
+
+def plugin_search_paths(plugin_paths: Optional[List[str]] = None) -> List[str]:
+    """Plugin paths from arguments plus ``HARVESTER_COLLECTOR_PATHS``, as the lib resolves them."""
+    env_paths = os.environ.get("HARVESTER_COLLECTOR_PATHS", "")
+    env_list = [p for p in env_paths.split(os.pathsep) if p.strip()] if env_paths else []
+    return [p.strip() for p in (plugin_paths or []) + env_list if p.strip()]
+
+
+def _tree_mtime(path: str) -> float:
+    """Latest mtime of a module file, or of any file in a package directory."""
+    if not os.path.isdir(path):
+        return os.stat(path).st_mtime
+    latest = os.stat(path).st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith(".py"):
+                latest = max(latest, os.stat(os.path.join(root, name)).st_mtime)
+    return latest
+
+
+def scan_plugin_modules(paths: List[str]) -> Dict[str, Tuple[str, float]]:
+    """Map top-level plugin module name -> (file or package path, mtime)."""
+    modules: Dict[str, Tuple[str, float]] = {}
+    for path in paths:
+        if not os.path.isdir(path):
+            continue
+        for info in pkgutil.iter_modules([path]):
+            location = os.path.join(path, info.name if info.ispkg else f"{info.name}.py")
+            try:
+                modules[info.name] = (location, _tree_mtime(location))
+            except OSError:
+                continue
+    return modules
+
+
+class CollectorRegistry:
+    """Collector classes discovered once and reused across runs."""
+
+    def __init__(self, plugin_paths: Optional[List[str]] = None, watch_interval: float = 10.0):
+        self.plugin_paths = list(plugin_paths or [])
+        self.watch_interval = watch_interval
+        self._lock = threading.RLock()
+        self._collectors: Dict[str, type] = {}
+        self._plugin_modules: Dict[str, Tuple[str, float]] = {}
+        self._checked_at = 0.0
+        self.loaded_at: Optional[float] = None
+
+    def load(self) -> Dict[str, type]:
+        """Run full discovery and remember plugin file mtimes."""
+        start = time.perf_counter()
+        with self._lock:
+            self._plugin_modules = scan_plugin_modules(plugin_search_paths(self.plugin_paths))
+            self._collectors = load_collectors(plugin_paths=self.plugin_paths)
+            self._checked_at = time.monotonic()
+            self.loaded_at = time.time()
+        log.debug(f"Loaded {len(self._collectors)} collectors in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return dict(self._collectors)
+
+    def collectors(self) -> Dict[str, type]:
+        with self._lock:
+            if self.loaded_at is None:
+                self.load()
+            return dict(self._collectors)
+
+    def get(self, name: str) -> Optional[type]:
+        """Return the collector class registered under ``name``, if any."""
+        self.refresh_if_changed()
+        with self._lock:
+            if self.loaded_at is None:
+                self.load()
+            return self._collectors.get(name)
+
+    def refresh_if_changed(self, force: bool = False) -> bool:
+        """Re-import plugin modules whose files changed; returns True if anything was reloaded.
+
+        Checks at most once per ``watch_interval`` seconds unless ``force`` is set.
+        """
+        with self._lock:
+            if self.loaded_at is None:
+                return False
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.watch_interval:
+                return False
+            self._checked_at = now
+
+            current = scan_plugin_modules(plugin_search_paths(self.plugin_paths))
+            changed = [
+                name for name, (location, mtime) in current.items()
+                if self._plugin_modules.get(name) != (location, mtime)
+            ]
+            removed = [name for name in self._plugin_modules if name not in current]
+            if not changed and not removed:
+                return False
+
+            for name in changed:
+                module = sys.modules.get(name)
+                try:
+                    if module is not None:
+                        importlib.reload(module)
+                    log.info(f"Reloaded plugin module {name}")
+                except Exception as e:
+                    log.error(f"Failed to reload plugin module {name}: {e}")
+            for name in removed:
+                sys.modules.pop(name, None)
+                log.info(f"Plugin module {name} was removed")
+
+            # Modules that did not change come straight from sys.modules
+            self._plugin_modules = current
+            self._collectors = load_collectors(plugin_paths=self.plugin_paths)
+            self.loaded_at = time.time()
+            return True
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Name, version, type, module and source of each loaded collector."""
+        with self._lock:
+            collectors = dict(self._collectors)
+            plugin_modules = set(self._plugin_modules)
+
+        entries = []
+        for name, cls in sorted(collectors.items()):
+            module = cls.__module__
+            if module.startswith(BUILTIN_PACKAGE + "."):
+                source = "builtin"
+            elif module.split(".", 1)[0] in plugin_modules:
+                source = "filesystem"
+            else:
+                source = "entry_point"
+            entries.append({
+                "name": name,
+                "version": getattr(cls, "VERSION", "0.0.0"),
+                "collector_type": getattr(cls, "COLLECTOR_TYPE", None),
+                "class": f"{module}.{cls.__qualname__}",
+                "source": source,
+            })
+        return entries
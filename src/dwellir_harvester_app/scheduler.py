@@ -0,0 +1,404 @@
+"""Per-collector job scheduler for the daemon.
+
+Every configured collector runs as its own job on a bounded thread pool, with
+its own interval and timeout. A slow or hung collector only delays its own
+section of the snapshot instead of the whole harvest cycle.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .harvest import failed_section, timeout_section
+
+log = logging.getLogger("dwellir-harvester")
+
+RunJob = Callable[[str], Dict[str, Any]]
+OnResult = Callable[[str, Dict[str, Any]], None]
+OnRun = Callable[[str, Dict[str, Any], float], None]
+
+# How often ``wait`` checks whether a queued run has started and has a deadline
+QUEUE_POLL_INTERVAL = 0.05
+
+
+def parse_overrides(values: Optional[Iterable[str]], option: str = "override") -> Dict[str, float]:
+    """Parse repeated ``name=seconds`` options into ``{name: seconds}``.
+
+    Raises ValueError on malformed entries.
+    """
+    overrides: Dict[str, float] = {}
+    for value in values or []:
+        name, sep, seconds = str(value).partition("=")
+        name = name.strip()
+        if not sep or not name:
+            raise ValueError(f"Invalid {option} '{value}', expected NAME=SECONDS")
+        try:
+            overrides[name] = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid {option} '{value}', SECONDS must be a number") from None
+        if overrides[name] <= 0:
+            raise ValueError(f"Invalid {option} '{value}', SECONDS must be positive")
+    return overrides
+
+
+class CollectorJob:
+    """Scheduling state for a single collector."""
+
+    def __init__(self, name: str, interval: float, timeout: Optional[float] = None):
+        self.name = name
+        self.interval = interval
+        self.timeout = timeout
+        self.next_run = 0.0
+        self.future: Optional[Future] = None
+        # Set when the run leaves the pool queue; None while it waits for a worker
+        self.started_at: Optional[float] = None
+        self.timed_out = False
+        self.last_duration: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+    def deadline(self) -> Optional[float]:
+        """Monotonic time at which the in-flight run times out, if any.
+
+        The timeout counts from when the run starts, not from when it was
+        queued, so a queued run has no deadline yet.
+        """
+        if self.timeout is None or self.started_at is None:
+            return None
+        return self.started_at + self.timeout
+
+
+class CollectorScheduler:
+    """Run collector jobs on a bounded pool and report each result as it lands.
+
+    ``run_job(name)`` produces a collector section and ``on_result(name, section)``
+    is called from the worker thread as soon as that section is ready. A run that
+    exceeds its timeout (counted from when a worker picks it up) is reported as
+    failed and its late result is discarded;
+    the job is not started again until the overrunning run has returned, so a
+    hung collector holds at most one pool slot. ``on_run(name, section,
+    duration)`` is called before ``on_result`` for every run whose result is
+    kept, so late runs are not counted as finished.
+    """
+
+    def __init__(
+        self,
+        jobs: List[CollectorJob],
+        run_job: RunJob,
+        on_result: OnResult,
+        max_workers: int = 4,
+        jitter: float = 0.1,
+        on_timeout: Optional[Callable[[str], None]] = None,
+        on_run: Optional[OnRun] = None,
+    ):
+        self.jobs: Dict[str, CollectorJob] = {job.name: job for job in jobs}
+        self.run_job = run_job
+        self.on_result = on_result
+        self.on_timeout = on_timeout
+        self.on_run = on_run
+        self.jitter = jitter
+        self.max_workers = max(1, max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="collector")
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Schedule every job one interval out, with a jittered offset, and start the loop."""
+        now = time.monotonic()
+        with self._lock:
+            for job in self.jobs.values():
+                job.next_run = now + job.interval + random.uniform(0, self.jitter * job.interval)
+        self._thread = threading.Thread(target=self._loop, name="collector-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Stop scheduling and abandon queued runs; in-flight runs are not waited for."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def update_jobs(self, jobs: List[CollectorJob]):
+        """Replace the job set while running.
+
+        Jobs that stay keep their schedule and any in-flight run and only take
+        the new interval and timeout; a shorter interval takes effect from now.
+        New jobs run right away. A removed job's in-flight run is left to
+        finish, but it is no longer scheduled.
+        """
+        now = time.monotonic()
+        with self._lock:
+            updated: Dict[str, CollectorJob] = {}
+            for job in jobs:
+                existing = self.jobs.get(job.name)
+                if existing is None:
+                    job.next_run = now
+                    updated[job.name] = job
+                    continue
+                existing.timeout = job.timeout
+                if existing.interval != job.interval:
+                    existing.interval = job.interval
+                    existing.next_run = min(existing.next_run, now + job.interval)
+                updated[job.name] = existing
+            self.jobs = updated
+        self._wakeup.set()
+
+    def resize(self, max_workers: int):
+        """Change the pool size; runs already queued or in flight finish on the old pool."""
+        max_workers = max(1, max_workers)
+        with self._lock:
+            if max_workers == self.max_workers:
+                return
+            old, self.max_workers = self.executor, max_workers
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector")
+        old.shutdown(wait=False)
+
+    def run_now(self, names: Optional[List[str]] = None, wait: bool = True) -> Dict[str, Future]:
+        """Start the named jobs (default: all) immediately.
+
+        Jobs that are already running are not started twice; their in-flight
+        future is returned instead. With ``wait`` the call blocks until every
+        job has reported a result or timed out.
+        """
+        with self._lock:
+            jobs = [self.jobs[name] for name in (names if names is not None else list(self.jobs)) if name in self.jobs]
+            futures = {job.name: self._submit(job) for job in jobs}
+
+        if wait:
+            self.wait(futures)
+        return futures
+
+    def refresh(
+        self,
+        names: List[str],
+        min_spacing: float = 0.0,
+        before_start: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Tuple[str, Future]]:
+        """Start the named jobs for an on-demand refresh; returns ``{name: (state, future)}``.
+
+        A running job is joined instead of started again (``running``), and a
+        job started less than ``min_spacing`` seconds ago keeps its last result
+        (``recent``). A job that is ``started`` has its next scheduled run
+        pushed a full interval out, and ``before_start`` is called with its
+        name just before it is submitted.
+        """
+        now = time.monotonic()
+        runs: Dict[str, Tuple[str, Future]] = {}
+        with self._lock:
+            for name in names:
+                job = self.jobs.get(name)
+                if job is None:
+                    continue
+                future = job.future
+                if future is not None and not future.done():
+                    runs[name] = ("running", future)
+                elif future is not None and job.started_at is not None and now - job.started_at < min_spacing:
+                    runs[name] = ("recent", future)
+                else:
+                    if before_start is not None:
+                        before_start(name)
+                    runs[name] = ("started", self._submit(job))
+                    job.next_run = max(job.next_run, now + job.interval)
+        return runs
+
+    def wait(self, futures: Dict[str, Future], timeout: Optional[float] = None) -> bool:
+        """Block until each job's run in ``futures`` has reported a result or timed out.
+
+        Returns False if ``timeout`` seconds passed first; runs still going are
+        left to report later.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        for name, future in futures.items():
+            job = self.jobs.get(name)
+            while True:
+                now = time.monotonic()
+                deadline = job.deadline() if job is not None else None
+                limits = [t for t in (deadline, end) if t is not None]
+                if job is not None and job.timeout is not None and deadline is None:
+                    # Still queued: its deadline is only known once a worker picks it up
+                    limits.append(now + QUEUE_POLL_INTERVAL)
+                remaining = max(0.0, min(limits) - now) if limits else None
+                try:
+                    future.result(timeout=remaining)
+                except FutureTimeoutError:
+                    now = time.monotonic()
+                    if job is not None and deadline is not None and now >= deadline:
+                        self._expire(job)
+                    elif end is not None and now >= end:
+                        return False
+                    else:
+                        continue
+                except Exception:
+                    pass
+                break
+        return True
+
+    def _submit(self, job: CollectorJob) -> Future:
+        future = job.future
+        if future is not None and not future.done():
+            log.warning(f"Collector {job.name} is still running; not starting another run")
+            return future
+        job.started_at = None
+        job.timed_out = False
+        job.future = future = self.executor.submit(self._execute, job)
+        return future
+
+    def _execute(self, job: CollectorJob):
+        with self._lock:
+            job.started_at = start = time.monotonic()
+        # Let the loop pick up the new deadline
+        self._wakeup.set()
+        try:
+            section = self.run_job(job.name)
+        except Exception as e:
+            log.error(f"Collector {job.name} raised: {e}")
+            section = failed_section(job.name, [str(e)])
+        job.last_duration = duration = time.monotonic() - start
+
+        with self._lock:
+            if job.timed_out:
+                log.warning(
+                    f"Discarding late result from {job.name} "
+                    f"(finished after {duration:.2f}s, timeout {job.timeout}s)"
+                )
+                return
+        log.debug(f"Collector {job.name} completed in {duration:.2f} seconds")
+        if self.on_run:
+            self.on_run(job.name, section, duration)
+        self.on_result(job.name, section)
+
+    def _expire(self, job: CollectorJob):
+        with self._lock:
+            started_at, timeout = job.started_at, job.timeout
+            if job.timed_out or job.future is None or job.future.done() or started_at is None or timeout is None:
+                return
+            job.timed_out = True
+        log.error(f"Collector {job.name} timed out after {timeout}s")
+        if self.on_timeout:
+            self.on_timeout(job.name)
+        self.on_result(job.name, timeout_section(job.name, timeout, time.monotonic() - started_at))
+
+    def _loop(self) -> None:
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            wake = now + 1.0
+            expired: List[CollectorJob] = []
+            with self._lock:
+                for job in self.jobs.values():
+                    deadline = job.deadline()
+                    if job.running and not job.timed_out and deadline is not None:
+                        if now >= deadline:
+                            expired.append(job)
+                        else:
+                            wake = min(wake, deadline)
+                    if now >= job.next_run:
+                        self._submit(job)
+                        job.next_run += job.interval
+                        if job.next_run <= now:
+                            job.next_run = now + job.interval
+                    wake = min(wake, job.next_run)
+
+            for job in expired:
+                self._expire(job)
+
+            self._wakeup.wait(max(0.0, wake - time.monotonic()))
+            self._wakeup.clear()
+
+
+def run_batch(
+    names: List[str],
+    run_job: RunJob,
+    max_workers: int = 4,
+    timeouts: Optional[Dict[str, float]] = None,
+    default_timeout: Optional[float] = None,
+    on_timeout: Optional[Callable[[str, float, float], Dict[str, Any]]] = None,
+    on_result: Optional[OnResult] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Run each named job once, at most ``max_workers`` at a time, and return ``{name: section}``.
+
+    A job's timeout (``timeouts[name]``, else ``default_timeout``; None means no
+    limit) counts from when it starts running. An overrunning job is abandoned:
+    its section becomes ``on_timeout(name, timeout, elapsed)`` (a
+    ``timeout_section`` by default) and a new worker takes its slot. Workers are
+    daemon threads, so an abandoned collector does not keep the process alive.
+
+    With ``on_result`` each section is handed over in the calling thread as
+    soon as it is ready and is not kept; the returned dict is then empty.
+    """
+    timeouts = timeouts or {}
+    on_timeout = on_timeout or (lambda name, timeout, elapsed: timeout_section(name, timeout, elapsed))
+    pending = deque(dict.fromkeys(names))
+    results: Dict[str, Dict[str, Any]] = {}
+    done = set()
+    ready: List[str] = []
+    started: Dict[str, float] = {}
+    abandoned = set()
+    cond = threading.Condition()
+
+    def worker():
+        while True:
+            with cond:
+                if not pending:
+                    return
+                name = pending.popleft()
+                started[name] = time.monotonic()
+            try:
+                section = run_job(name)
+            except Exception as e:
+                log.error(f"Collector {name} raised: {e}")
+                section = failed_section(name, [str(e)])
+            with cond:
+                if name in abandoned:
+                    log.warning(f"Discarding late result from {name}")
+                    # A replacement worker already took this slot
+                    return
+                results[name] = section
+                done.add(name)
+                ready.append(name)
+                cond.notify_all()
+
+    def spawn():
+        threading.Thread(target=worker, name="collector", daemon=True).start()
+
+    total = len(pending)
+    for _ in range(min(max(1, max_workers), total)):
+        spawn()
+
+    while True:
+        with cond:
+            now = time.monotonic()
+            wait: Optional[float] = None
+            for name, start in list(started.items()):
+                timeout = timeouts.get(name, default_timeout)
+                if name in done or timeout is None:
+                    continue
+                remaining = start + timeout - now
+                if remaining > 0:
+                    wait = remaining if wait is None else min(wait, remaining)
+                    continue
+                log.error(f"Collector {name} timed out after {timeout}s")
+                abandoned.add(name)
+                results[name] = on_timeout(name, timeout, now - start)
+                done.add(name)
+                ready.append(name)
+                if pending:
+                    spawn()
+            if not ready and len(done) < total:
+                cond.wait(wait)
+            handoff, ready[:] = list(ready), []
+            handoff_sections = [(name, results.pop(name) if on_result else results[name]) for name in handoff]
+        if on_result:
+            for name, section in handoff_sections:
+                on_result(name, section)
+        if len(done) >= total and not handoff:
+            break
+    return {name: results[name] for name in dict.fromkeys(names) if name in results}
@@ -0,0 +1,119 @@
+"""HTTP server used by the daemon.
+
+``HarvesterHTTPServer`` handles each connection on its own thread, so a slow or
+stalled client no longer blocks everyone else. It caps concurrent connections,
+and on shutdown it drains in-flight requests before closing. Long-lived
+streaming responses are moved to a cap of their own, so subscribers cannot use
+up the connections that ordinary requests need.
+"""
+import logging
+import socket
+import threading
+from http.server import ThreadingHTTPServer
+from typing import Set
+
+log = logging.getLogger("dwellir-harvester")
+
+SERVER_MODES = ["threaded", "single"]
+
+_BUSY_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"Content-Length: 30\r\n"
+    b"\r\n"
+    b'{"error": "too many requests"}'
+)
+
+
+class HarvesterHTTPServer(ThreadingHTTPServer):
+    """Thread-per-connection HTTP server with a connection limit and graceful drain."""
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, server_address, handler_class, max_connections: int = 64, max_streams: int = 16):
+        self.max_connections = max(1, max_connections)
+        self.max_streams = max(1, max_streams)
+        self.draining = False
+        self._connections: Set[socket.socket] = set()
+        self._streams: Set[socket.socket] = set()
+        self._connections_cv = threading.Condition()
+        super().__init__(server_address, handler_class)
+
+    @property
+    def active_connections(self) -> int:
+        with self._connections_cv:
+            return len(self._connections)
+
+    @property
+    def active_streams(self) -> int:
+        with self._connections_cv:
+            return len(self._streams)
+
+    def begin_stream(self, request) -> bool:
+        """Count ``request`` against the stream limit instead of the connection limit.
+
+        Returns False, leaving the connection counted as before, if every
+        stream slot is taken or the server is draining.
+        """
+        with self._connections_cv:
+            if self.draining or len(self._streams) >= self.max_streams:
+                return False
+            self._connections.discard(request)
+            self._streams.add(request)
+            self._connections_cv.notify_all()
+        return True
+
+    def process_request(self, request, client_address):
+        with self._connections_cv:
+            over_limit = self.draining or len(self._connections) >= self.max_connections
+            if not over_limit:
+                self._connections.add(request)
+        if over_limit:
+            log.warning(f"Rejecting connection from {client_address[0]}: connection limit reached")
+            self._reject(request)
+            return
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self._connections_cv:
+                self._connections.discard(request)
+                self._streams.discard(request)
+                self._connections_cv.notify_all()
+
+    def _reject(self, request):
+        try:
+            request.settimeout(1)
+            request.sendall(_BUSY_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """Finish in-flight requests and close idle keep-alive connections.
+
+        Call after ``shutdown()``. Reads are shut down on every open connection,
+        so idle keep-alive clients see EOF while requests that are already being
+        answered can still write their response. Returns False if connections
+        were still open when ``timeout`` expired.
+        """
+        with self._connections_cv:
+            self.draining = True
+            for conn in list(self._connections | self._streams):
+                try:
+                    conn.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass
+            drained = self._connections_cv.wait_for(
+                lambda: not self._connections and not self._streams, timeout=timeout)
+        if not drained:
+            log.warning(
+                f"HTTP drain timed out with {self.active_connections} connection(s) "
+                f"and {self.active_streams} stream(s) open"
+            )
+        return drained
@@ -0,0 +1,116 @@
+"""Pre-serialized snapshots of the daemon's published results.
+
+A snapshot is serialized and compressed once when it is published, so HTTP
+handlers only pick cached bytes and never re-encode the document per request.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+# Optional dependency for zstd content-encoding
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
+# Server preference when a client accepts several encodings equally
+ENCODING_PREFERENCE = ["zstd", "gzip", "identity"]
+
+
+def dumps_compact(obj: Any) -> bytes:
+    """Serialize ``obj`` to compact UTF-8 JSON."""
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def available_encodings() -> List[str]:
+    """Content-encodings this process can produce."""
+    return [e for e in ENCODING_PREFERENCE if e != "zstd" or zstandard is not None]
+
+
+def encode_body(body: bytes, encoding: str) -> bytes:
+    """Compress ``body`` with the given content-encoding."""
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == "identity":
+        return body
+    raise ValueError(f"Unsupported content-encoding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: List[str]) -> str:
+    """Pick the best content-encoding for an ``Accept-Encoding`` header.
+
+    Honors q-values (``q=0`` rejects an encoding) and ``*``; ties are broken by
+    ``ENCODING_PREFERENCE``. Falls back to ``identity``.
+    """
+    if not accept_encoding:
+        return "identity"
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    def weight(encoding: str) -> float:
+        if encoding in weights:
+            return weights[encoding]
+        if "*" in weights:
+            return weights["*"]
+        # identity is acceptable unless explicitly refused
+        return 0.001 if encoding == "identity" else 0.0
+
+    candidates = [e for e in available if weight(e) > 0]
+    if not candidates:
+        return "identity"
+    return max(candidates, key=lambda e: (weight(e), -ENCODING_PREFERENCE.index(e)))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return True if an ``If-None-Match`` header matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class Snapshot:
+    """One published result together with its cached encodings."""
+
+    def __init__(self, result: Dict[str, Any], version: int = 0):
+        self.result = result
+        self.version = version
+        self.body = dumps_compact(result)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.encodings: Dict[str, bytes] = {
+            encoding: encode_body(self.body, encoding) for encoding in available_encodings()
+        }
+        # Serialized /metadata/changes responses against this snapshot, keyed by base version
+        self.deltas: Dict[Any, bytes] = {}
+        # Derived per-target snapshots, built on first request
+        self.views: Dict[str, "Snapshot"] = {}
+        # Projected snapshots for ?collectors=&fields= queries, keyed by Projection.key
+        self.projections: Dict[Any, "Snapshot"] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """Return the body in a content-encoding produced at publish time."""
+        return self.encodings.get(encoding, self.body)
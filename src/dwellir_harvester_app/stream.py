@@ -0,0 +1,87 @@
+"""Snapshot update notifications and Server-Sent Events helpers."""
+import threading
+from typing import Any, Dict, Optional, Set
+
+from .snapshot import dumps_compact
+
+
+class SnapshotNotifier:
+    """Wake threads waiting for a snapshot newer than the one they have seen."""
+
+    def __init__(self, version: int = 0):
+        self._cv = threading.Condition()
+        self._version = version
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def notify(self, version: int):
+        """Record a newly published version and wake all waiters."""
+        with self._cv:
+            self._version = max(self._version, version)
+            self._cv.notify_all()
+
+    def close(self):
+        """Wake all waiters for good, e.g. on daemon shutdown."""
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+
+    def wait_for_newer(self, version: int, timeout: Optional[float] = None) -> int:
+        """Block until a version newer than ``version`` is published, the
+        notifier is closed, or ``timeout`` expires. Returns the latest version.
+        """
+        with self._cv:
+            self._cv.wait_for(lambda: self._closed or self._version > version, timeout=timeout)
+            return self._version
+
+
+def format_event(event: str, event_id: int, payload: Any) -> bytes:
+    """Encode one Server-Sent Event with a compact JSON data line."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, event.encode("ascii"), dumps_compact(payload))
+
+
+def _wants(name: str, names: Optional[Set[str]]) -> bool:
+    return names is None or name in names
+
+
+def stream_view(result: Dict[str, Any], version: int, names: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """The initial event for a stream: the document limited to ``names``."""
+    view = {key: value for key, value in result.items() if key not in ("host", "collectors")}
+    view["version"] = version
+    if _wants("host", names) and "host" in result:
+        view["host"] = result["host"]
+    view["collectors"] = {
+        name: section for name, section in result.get("collectors", {}).items() if _wants(name, names)
+    }
+    return view
+
+
+def stream_update(
+    old: Dict[str, Any],
+    new: Dict[str, Any],
+    version: int,
+    names: Optional[Set[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """An update event carrying only the sections that changed between two snapshots.
+
+    Returns None when a filtered stream has nothing new to report.
+    """
+    old_collectors = old.get("collectors", {})
+    changed = {
+        name: section
+        for name, section in new.get("collectors", {}).items()
+        if _wants(name, names) and old_collectors.get(name) != section
+    }
+    update: Dict[str, Any] = {
+        "version": version,
+        "collection_time": new.get("harvester", {}).get("collection_time"),
+        "collectors": changed,
+    }
+    if _wants("host", names) and old.get("host") != new.get("host"):
+        update["host"] = new.get("host")
+    if names is not None and not changed and "host" not in update:
+        return None
+    return update
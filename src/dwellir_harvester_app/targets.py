@@ -0,0 +1,116 @@
+"""Multi-target harvesting: one daemon serving several node instances.
+
+A target is a named node instance with its own collectors and per-collector
+parameters, e.g. two Polkadot parachain nodes on different RPC ports. Each
+(target, collector) pair is an ordinary scheduler job keyed ``target/collector``,
+so every target shares one worker pool and one published snapshot. In that
+snapshot the target's sections appear under their ``target/collector`` keys.
+``target_view`` derives the per-target document served on ``/metadata/<target>``.
+"""
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TARGET_SEPARATOR = "/"
+# Would shadow the other /metadata/... endpoints
+RESERVED_TARGETS = {"changes", "stream", "ndjson"}
+_TARGET_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class Target:
+    """A named node instance: which collectors to run for it and with which parameters."""
+
+    def __init__(self, name: str, collectors: List[str], params: Optional[Dict[str, Dict[str, Any]]] = None):
+        if not _TARGET_NAME.match(name) or name in RESERVED_TARGETS:
+            raise ValueError(f"Invalid target name '{name}'")
+        unknown = set(params or {}) - set(collectors)
+        if unknown:
+            raise ValueError(f"Target '{name}' has parameters for collectors it does not run: {sorted(unknown)}")
+        self.name = name
+        self.collectors = list(collectors)
+        self.params = {collector: dict(kwargs) for collector, kwargs in (params or {}).items()}
+
+    def job_keys(self) -> List[str]:
+        return [job_key(self.name, collector) for collector in self.collectors]
+
+
+def job_key(target: Optional[str], collector: str) -> str:
+    """Scheduler/snapshot key of a collector, qualified by its target if it has one."""
+    return f"{target}{TARGET_SEPARATOR}{collector}" if target else collector
+
+
+def split_job_key(key: str) -> Tuple[Optional[str], str]:
+    """``"relay/polkadot"`` -> ``("relay", "polkadot")``; untargeted keys give ``(None, key)``."""
+    target, sep, collector = key.partition(TARGET_SEPARATOR)
+    return (target, collector) if sep else (None, key)
+
+
+def load_targets(targets: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, Target]:
+    """Build targets from config: ``{name: {"collectors": [...], "params": {collector: {...}}}}``.
+
+    Raises ValueError on invalid names or parameters for collectors a target does not run.
+    """
+    loaded = {}
+    for name, spec in (targets or {}).items():
+        loaded[name] = Target(name, spec.get("collectors", []), spec.get("params"))
+    return loaded
+
+
+def parse_targets(values: Optional[Iterable[str]]) -> Dict[str, List[str]]:
+    """Parse repeated ``NAME=COLLECTOR[,COLLECTOR...]`` options. Raises ValueError."""
+    targets: Dict[str, List[str]] = {}
+    for value in values or []:
+        name, sep, collectors = str(value).partition("=")
+        names = [c.strip() for c in collectors.split(",") if c.strip()]
+        if not sep or not name.strip() or not names:
+            raise ValueError(f"Invalid --target '{value}', expected NAME=COLLECTOR[,COLLECTOR...]")
+        targets.setdefault(name.strip(), []).extend(names)
+    return targets
+
+
+def parse_target_params(values: Optional[Iterable[str]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Parse repeated ``TARGET.COLLECTOR.KEY=VALUE`` options into ``{target: {collector: {key: value}}}``.
+
+    VALUE is read as JSON when it parses (numbers, booleans, lists), else as a
+    plain string. Raises ValueError.
+    """
+    params: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for value in values or []:
+        path, sep, raw = str(value).partition("=")
+        parts = path.strip().split(".", 2)
+        if not sep or len(parts) != 3 or not all(parts):
+            raise ValueError(f"Invalid --target-param '{value}', expected TARGET.COLLECTOR.KEY=VALUE")
+        try:
+            parsed = json.loads(raw)
+        except ValueError:
+            parsed = raw
+        target, collector, key = parts
+        params.setdefault(target, {}).setdefault(collector, {})[key] = parsed
+    return params
+
+
+def target_view(result: Dict[str, Any], target: str) -> Dict[str, Any]:
+    """The document for one target, shaped like a single-instance snapshot.
+
+    Only the target's sections are kept, under their plain collector names;
+    ``harvester`` and ``system`` are shared with the aggregated snapshot.
+    """
+    prefix = f"{target}{TARGET_SEPARATOR}"
+    view = {key: value for key, value in result.items() if key not in ("harvester", "host", "collectors")}
+    harvester = dict(result.get("harvester", {}))
+    harvester["collectors_used"] = [
+        key[len(prefix):] for key in harvester.get("collectors_used", []) if key.startswith(prefix)
+    ]
+    harvester["target"] = target
+    view["harvester"] = harvester
+    view["host"] = {}
+    view["collectors"] = {}
+    for key, section in result.get("collectors", {}).items():
+        if not key.startswith(prefix):
+            continue
+        name = key[len(prefix):]
+        if name == "host" and section.get("meta", {}).get("status") != "failed":
+            view["host"] = section.get("data", {})
+        else:
+            view["collectors"][name] = section
+    return view
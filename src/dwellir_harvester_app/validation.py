@@ -0,0 +1,149 @@
+"""Cached, compiled schema validation.
+
+The lib's ``validate_output`` reads and compiles the schema file on every call
+and always validates the whole document. ``SchemaValidator`` compiles a schema
+once, recompiles it only when the file's mtime changes, and skips collector
+sections that were already validated unchanged in an earlier snapshot.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import jsonschema  # type: ignore
+    from jsonschema.exceptions import best_match  # type: ignore
+    from jsonschema.validators import validator_for  # type: ignore
+except ImportError:
+    jsonschema = None
+
+log = logging.getLogger("dwellir-harvester")
+
+# Root keywords that cannot make a collector section's validity depend on the
+# rest of the document; any other root keyword disables incremental mode.
+_INCREMENTAL_ROOT_KEYS = {
+    "$schema", "$id", "title", "description", "type", "properties", "required",
+    "additionalProperties", "definitions", "$defs",
+}
+_INCREMENTAL_COLLECTORS_KEYS = {"title", "description", "type", "additionalProperties"}
+
+
+class SchemaValidator:
+    """Compiled validator for one schema file."""
+
+    def __init__(self, schema_path: str):
+        self.schema_path = schema_path
+        self.last_stats: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._validator = None
+        self._section_validator = None
+        # collector name -> section object that last validated cleanly
+        self._validated: Dict[str, Any] = {}
+
+    def _ensure_current(self):
+        mtime = os.stat(self.schema_path).st_mtime
+        if self._validator is not None and mtime == self._mtime:
+            return
+        with open(self.schema_path, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        cls = validator_for(schema)
+        cls.check_schema(schema)
+        self._validator = cls(schema)
+        self._section_validator = None
+        self._validated.clear()
+
+        collectors_schema = schema.get("properties", {}).get("collectors", {})
+        section_schema = collectors_schema.get("additionalProperties")
+        if (
+            isinstance(section_schema, dict)
+            and set(schema) <= _INCREMENTAL_ROOT_KEYS
+            and set(collectors_schema) <= _INCREMENTAL_COLLECTORS_KEYS
+        ):
+            self._section_validator = self._validator.evolve(schema=section_schema)
+        self._mtime = mtime
+        log.debug(
+            f"Compiled schema {self.schema_path} "
+            f"({'incremental' if self._section_validator else 'full'} validation)"
+        )
+
+    @staticmethod
+    def _check(validator, instance, *path):
+        error = best_match(validator.iter_errors(instance))
+        if error is not None:
+            error.path.extendleft(reversed(path))
+            raise error
+
+    def validate(self, document: Dict[str, Any]):
+        """Validate ``document``, raising ``jsonschema.ValidationError`` on the first problem.
+
+        Collector sections are cached by identity: a section object that passed
+        before is not validated again. Does nothing if jsonschema is not installed.
+        """
+        if jsonschema is None:
+            return
+        with self._lock:
+            self._ensure_current()
+            start = time.perf_counter()
+            validated = skipped = 0
+            collectors = document.get("collectors")
+
+            try:
+                if self._section_validator is None or not isinstance(collectors, dict):
+                    self._check(self._validator, document)
+                    validated = len(collectors) if isinstance(collectors, dict) else 0
+                else:
+                    envelope = dict(document)
+                    envelope["collectors"] = {}
+                    self._check(self._validator, envelope)
+                    for name, section in collectors.items():
+                        if self._validated.get(name) is section:
+                            skipped += 1
+                            continue
+                        self._validated.pop(name, None)
+                        self._check(self._section_validator, section, "collectors", name)
+                        self._validated[name] = section
+                        validated += 1
+                    for name in set(self._validated) - set(collectors):
+                        del self._validated[name]
+            finally:
+                self.last_stats = {
+                    "duration": time.perf_counter() - start,
+                    "sections_validated": validated,
+                    "sections_skipped": skipped,
+                }
+        log.debug(
+            f"Validated snapshot in {self.last_stats['duration'] * 1000:.2f} ms "
+            f"({validated} section(s) checked, {skipped} unchanged)"
+        )
+
+    def validate_section(self, name: str, section: Dict[str, Any]) -> bool:
+        """Validate one collector section on its own, as when sections are streamed.
+
+        Returns False without validating if the schema cannot check sections
+        independently of the rest of the document (or jsonschema is missing).
+        """
+        if jsonschema is None:
+            return False
+        with self._lock:
+            self._ensure_current()
+            if self._section_validator is None:
+                return False
+            self._check(self._section_validator, section, "collectors", name)
+        return True
+
+
+_validators: Dict[str, SchemaValidator] = {}
+_validators_lock = threading.Lock()
+
+
+def get_validator(schema_path: str) -> SchemaValidator:
+    """Return the process-wide validator for a schema file."""
+    key = os.path.abspath(schema_path)
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is None:
+            validator = _validators[key] = SchemaValidator(key)
+        return validator
@@ -0,0 +1,253 @@
+"""Collector runs in separate worker processes.
+
+With ``--isolation process`` the daemon hands collector runs to a pool of
+long-lived worker processes instead of running them in its own interpreter.
+A plugin that leaks memory or spins the CPU then grows and slows a worker,
+not the daemon serving HTTP.
+
+Workers are started up front from a clean fork server, so no collector
+thread's locks are inherited. Each keeps its own collector registry and runs
+one collector at a time. Requests and results cross a pipe as compact JSON.
+Per run, a worker lowers its soft ``RLIMIT_AS`` (address space) and
+``RLIMIT_CPU`` to the collector's caps and raises them again afterwards. A
+worker is replaced after ``max_runs`` runs, when its peak RSS exceeds
+``max_rss``, when it dies, and when a run times out: killing it is the only
+way to stop a collector stuck in a call.
+"""
+import json
+import logging
+import multiprocessing
+import signal
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .harvest import collect_section, failed_section
+from .registry import CollectorRegistry
+from .snapshot import dumps_compact
+
+# Not available on Windows; process isolation then runs without rlimits
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore
+
+log = logging.getLogger("dwellir-harvester")
+
+ISOLATION_MODES = ["thread", "process"]
+MIB = 1024 * 1024
+
+
+class CpuLimitExceeded(Exception):
+    """Raised in a worker when a collector run uses up its CPU time."""
+
+
+def _on_sigxcpu(signum, frame):
+    raise CpuLimitExceeded("CPU time limit exceeded")
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _set_soft_limit(which: int, soft: int):
+    hard = resource.getrlimit(which)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = hard if soft == resource.RLIM_INFINITY else min(soft, hard)
+    resource.setrlimit(which, (soft, hard))
+
+
+def worker_main(conn, plugin_paths: List[str], watch_interval: float):
+    """Worker process loop: run one requested collector at a time until the pipe closes."""
+    # The daemon handles shutdown; a terminal's Ctrl+C must not kill runs midway
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+        base = {which: resource.getrlimit(which)[0] for which in (resource.RLIMIT_AS, resource.RLIMIT_CPU)}
+    registry = CollectorRegistry(plugin_paths, watch_interval=watch_interval)
+    registry.load()
+
+    while True:
+        try:
+            request = json.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        name = request["name"]
+        try:
+            if resource is not None:
+                if request.get("memory_limit"):
+                    _set_soft_limit(resource.RLIMIT_AS, int(request["memory_limit"]))
+                if request.get("cpu_limit"):
+                    _set_soft_limit(resource.RLIMIT_CPU, int(_cpu_seconds() + request["cpu_limit"]) + 1)
+            try:
+                section = collect_section(
+                    name,
+                    debug=request.get("debug", False),
+                    collector_kwargs={name: request["kwargs"]} if request.get("kwargs") else None,
+                    registry=registry,
+                )
+            finally:
+                if resource is not None:
+                    for which, soft in base.items():
+                        resource.setrlimit(which, (soft, resource.getrlimit(which)[1]))
+        except Exception as e:
+            section = failed_section(name, [f"Collector {name} failed in worker: {e}"])
+        reply: Dict[str, Any] = {"section": section}
+        if resource is not None:
+            # ru_maxrss is in KiB on Linux
+            reply["maxrss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        conn.send_bytes(dumps_compact(reply))
+
+
+class _Worker:
+    def __init__(self, context, plugin_paths: List[str], watch_interval: float):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(child, plugin_paths, watch_interval),
+            name="harvester-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.runs = 0
+        self.job: Optional[str] = None
+
+    def close(self, timeout: float = 2):
+        self.conn.close()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout)
+
+
+class WorkerPool:
+    """A fixed number of worker processes; ``run`` blocks until one is free."""
+
+    def __init__(
+        self,
+        size: int,
+        plugin_paths: Optional[List[str]] = None,
+        watch_interval: float = 10.0,
+        max_runs: int = 100,
+        max_rss: Optional[int] = None,
+        on_recycle: Optional[Callable[[str], None]] = None,
+    ):
+        self.size = max(1, size)
+        self.plugin_paths = list(plugin_paths or [])
+        self.watch_interval = watch_interval
+        self.max_runs = max_runs
+        self.max_rss = max_rss
+        self.on_recycle = on_recycle
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._cond = threading.Condition()
+        self._idle: List[_Worker] = []
+        self._busy: Dict[str, _Worker] = {}
+        self._closed = False
+        for _ in range(self.size):
+            self._idle.append(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.plugin_paths, self.watch_interval)
+
+    def pids(self) -> List[int]:
+        with self._cond:
+            return [w.process.pid for w in self._idle + list(self._busy.values())]
+
+    def run(
+        self,
+        name: str,
+        kwargs: Optional[Dict[str, Any]] = None,
+        job: Optional[str] = None,
+        debug: bool = False,
+        memory_limit: Optional[int] = None,
+        cpu_limit: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Run collector ``name`` in a free worker and return its section.
+
+        ``memory_limit`` (bytes of address space) and ``cpu_limit`` (seconds)
+        cap this run. ``job`` names the run for ``cancel``. A worker that dies
+        midway yields a failed section.
+        """
+        job = job or name
+        with self._cond:
+            while not self._idle and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return failed_section(name, ["Collector worker pool is closed"])
+            worker = self._idle.pop()
+            worker.job = job
+            self._busy[job] = worker
+
+        request = {"name": name, "kwargs": kwargs, "debug": debug,
+                   "memory_limit": memory_limit, "cpu_limit": cpu_limit}
+        try:
+            worker.conn.send_bytes(dumps_compact(request))
+            reply = json.loads(worker.conn.recv_bytes())
+        except (EOFError, OSError):
+            worker.process.join(1)
+            code = worker.process.exitcode
+            log.warning(f"Collector worker {worker.process.pid} exited with code {code} while running {job}")
+            self._retire(worker, "exited")
+            return failed_section(name, [f"Collector worker exited with code {code} while running {name}"])
+
+        worker.runs += 1
+        if worker.runs >= self.max_runs:
+            self._retire(worker, "runs")
+        elif self.max_rss and reply.get("maxrss", 0) > self.max_rss:
+            log.info(f"Collector worker {worker.process.pid} peaked at {reply['maxrss'] // MIB} MiB; replacing it")
+            self._retire(worker, "memory")
+        else:
+            with self._cond:
+                self._busy.pop(job, None)
+                worker.job = None
+                if self._closed:
+                    worker.close()
+                else:
+                    self._idle.append(worker)
+                    self._cond.notify()
+        return reply["section"]
+
+    def _retire(self, worker: _Worker, reason: str):
+        """Replace ``worker`` with a fresh process."""
+        worker.close()
+        with self._cond:
+            job = worker.job
+            if job is not None and self._busy.get(job) is worker:
+                del self._busy[job]
+            if self._closed:
+                return
+        replacement = self._spawn()
+        with self._cond:
+            if self._closed:
+                replacement.close()
+                return
+            self._idle.append(replacement)
+            self._cond.notify()
+        if self.on_recycle:
+            self.on_recycle(reason)
+
+    def cancel(self, job: str) -> bool:
+        """Kill the worker running ``job``, e.g. after a timeout; returns True if there was one."""
+        with self._cond:
+            worker = self._busy.get(job)
+        if worker is None:
+            return False
+        log.warning(f"Killing collector worker {worker.process.pid} running {job}")
+        worker.process.kill()
+        return True
+
+    def close(self, cancel: bool = True):
+        """Stop all workers.
+
+        Runs in flight get a failed section, or with ``cancel=False`` finish
+        first and their worker exits afterwards.
+        """
+        with self._cond:
+            self._closed = True
+            workers = self._idle + (list(self._busy.values()) if cancel else [])
+            self._idle = []
+            self._cond.notify_all()
+        for worker in workers:
+            worker.close(timeout=0.5)
@@ -8,3 +8,43 @@ ROOT = Path(__file__).resolve().parent.parent
 SRC = ROOT / "src"
 if SRC.is_dir():
     sys.path.insert(0, str(SRC))
+
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def make_daemon(tmp_path):
+    """Build CollectorDaemons writing into tmp_path; schedulers are stopped on teardown."""
+    from dwellir_harvester_app.daemon import CollectorDaemon
+
+    daemons = []
+
+    def _make(**config):
+        config.setdefault('collectors', ['null'])
+        config.setdefault('output_file', str(tmp_path / "harvested-data.json"))
+        daemon = CollectorDaemon(config)
+        daemons.append(daemon)
+        return daemon
+
+    yield _make
+    for daemon in daemons:
+        daemon.scheduler.stop()
+
+
+@pytest.fixture
+def serve_daemon():
+    """Serve a daemon over HTTP on an ephemeral port; returns the port."""
+    daemons = []
+
+    def _serve(daemon):
+        httpd = daemon._make_server(("127.0.0.1", 0))
+        daemon.httpd = httpd
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        daemons.append(daemon)
+        return httpd.server_address[1]
+
+    yield _serve
+    for daemon in daemons:
+        daemon.stop()
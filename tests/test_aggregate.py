@@ -0,0 +1,131 @@
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.aggregate import Aggregator, FleetTarget, make_handler, read_fleet_file
+from dwellir_harvester_app.auth import TokenIndex
+from dwellir_harvester_app.server import HarvesterHTTPServer
+
+PLUGIN = (
+    "from dwellir_harvester.collector_base import GenericCollector\n"
+    "class Versioned(GenericCollector):\n"
+    "    NAME = 'versioned'\n"
+    "    VERSION = '1.0.0'\n"
+    "    def __init__(self, version='0'):\n"
+    "        super().__init__()\n"
+    "        self.version = version\n"
+    "    @classmethod\n"
+    "    def create(cls, **kwargs):\n"
+    "        return cls(**kwargs)\n"
+    "    def collect(self):\n"
+    "        return {'workload': {'client_version': self.version}}\n"
+)
+
+
+@pytest.fixture
+def fleet(tmp_path: Path, make_daemon, serve_daemon):
+    (tmp_path / "versioned_plugin.py").write_text(PLUGIN)
+    daemons = {}
+    for name, version, extra in [("a", "1.2.0", {}), ("b", "1.3.0", {}), ("c", "1.2.0", {"auth_tokens": ["fleet-secret"]})]:
+        daemon = make_daemon(collectors=['versioned', 'null'] if name != "b" else ['versioned'],
+                             collector_paths=[str(tmp_path)], collector_params={'versioned': {'version': version}},
+                             output_file=str(tmp_path / f"{name}.json"), **extra)
+        daemon.run_collectors()
+        daemons[name] = (daemon, serve_daemon(daemon))
+    return daemons
+
+
+def _get(port, path, headers=None):
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", headers=headers or {})
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return resp.status, dict(resp.headers), json.loads(resp.read())
+
+
+def test_scrapes_fleet_concurrently_with_etags(fleet):
+    targets = [FleetTarget(name, f"http://127.0.0.1:{port}", token="fleet-secret" if name == "c" else None)
+               for name, (_, port) in fleet.items()]
+    targets.append(FleetTarget("gone", "127.0.0.1:9", timeout=1))
+    aggregator = Aggregator(targets, concurrency=8)
+    try:
+        aggregator.scrape()
+        first = {name: dict(t.__dict__) for name, t in aggregator.targets.items()}
+        assert {name: t["status"] for name, t in first.items()} == {"a": "ok", "b": "ok", "c": "ok", "gone": "error"}
+        assert first["a"]["document"]["collectors"]["versioned"]["data"]["workload"]["client_version"] == "1.2.0"
+
+        # Unchanged daemons answer 304 and keep their document; a new publish is fetched
+        fleet["b"][0].run_collectors()
+        aggregator.scrape()
+        assert aggregator.targets["a"].document is first["a"]["document"]
+        assert aggregator.targets["c"].document is first["c"]["document"]
+        assert aggregator.targets["b"].document is not first["b"]["document"]
+        assert aggregator.targets["b"].snapshot_version == fleet["b"][0].snapshot.version
+
+        aggregator.targets["c"].token = "wrong"
+        aggregator.scrape()
+        assert aggregator.targets["c"].status == "error"
+        assert aggregator.targets["c"].error == "HTTP 401"
+        assert aggregator.targets["c"].document is not None
+    finally:
+        aggregator.close()
+
+
+def test_fleet_view_filters_and_index(fleet):
+    targets = [FleetTarget(name, f"http://127.0.0.1:{port}/metadata", token="fleet-secret")
+               for name, (_, port) in fleet.items()]
+    aggregator = Aggregator(targets)
+    httpd = HarvesterHTTPServer(("127.0.0.1", 0), make_handler(aggregator, TokenIndex([{"token": "view"}])))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+    auth = {"Authorization": "Bearer view"}
+    try:
+        aggregator.scrape()
+        with pytest.raises(urllib.error.HTTPError) as err:
+            _get(port, "/fleet")
+        assert err.value.code == 401
+
+        _, headers, body = _get(port, "/fleet?collector=versioned&version=1.2.0", auth)
+        assert sorted(body["daemons"]) == ["a", "c"]
+        assert list(body["daemons"]["a"]["collectors"]) == ["versioned"]
+        assert headers["X-Fleet-Round"] == "1"
+
+        _, _, body = _get(port, "/fleet?collector=null", auth)
+        assert sorted(body["daemons"]) == ["a", "c"]
+        _, _, body = _get(port, "/fleet?version=1.3.0&summary=true", auth)
+        assert list(body["daemons"]) == ["b"]
+        assert "collectors" not in body["daemons"]["b"]
+
+        # Filtered views are cached per round and revalidate by ETag
+        assert aggregator.query(daemons={"a"}) is aggregator.query(daemons={"a"})
+        req = urllib.request.Request(f"http://127.0.0.1:{port}/fleet", headers=dict(auth, **{"Accept-Encoding": "gzip"}))
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            etag = resp.headers["ETag"]
+            assert sorted(json.loads(gzip.decompress(resp.read()))["daemons"]) == ["a", "b", "c"]
+        with pytest.raises(urllib.error.HTTPError) as err:
+            _get(port, "/fleet", dict(auth, **{"If-None-Match": etag}))
+        assert err.value.code == 304
+
+        _, _, index = _get(port, "/fleet/index", auth)
+        assert index["status"]["ok"] == 3
+        assert index["collectors"]["versioned"]["versions"] == {"1.2.0": ["a", "c"], "1.3.0": ["b"]}
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        aggregator.close()
+
+
+def test_read_fleet_file(tmp_path: Path):
+    path = tmp_path / "fleet.json"
+    path.write_text(json.dumps({"daemons": {"node-1": "http://10.0.0.1:18080",
+                                            "node-2": {"url": "http://10.0.0.2:18080", "token": "t", "timeout": 2}}}))
+    assert read_fleet_file(str(path)) == {
+        "node-1": {"url": "http://10.0.0.1:18080"},
+        "node-2": {"url": "http://10.0.0.2:18080", "token": "t", "timeout": 2},
+    }
+    path.write_text(json.dumps({"daemons": {"node-1": {"token": "t"}}}))
+    with pytest.raises(ValueError, match="needs a url"):
+        read_fleet_file(str(path))
@@ -0,0 +1,93 @@
+import http.client
+import json
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.auth import TokenIndex, read_token_file
+from dwellir_harvester_app.ratelimit import TokenBucket
+
+
+def _get(port, path, token=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers={"Authorization": f"Bearer {token}"} if token else {})
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def test_token_index_lookup():
+    index = TokenIndex([
+        {"token": "a", "label": "ops"},
+        {"token": "b", "label": "old", "enabled": False},
+        {"token": "a", "label": "shadowed"},
+        {"token": "c"},
+    ])
+    assert len(index) == 3
+    assert index.lookup("a").label == "ops"
+    assert index.lookup("b").enabled is False
+    assert index.lookup("c").key == "unlabeled"
+    assert index.lookup("missing") is None
+    assert index.labels() == ["old", "ops", "unlabeled"]
+
+
+def test_read_token_file_validates_entries(tmp_path: Path):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps([{"token": "a", "rate_limit": 2}, {"label": "no-token"}]))
+    assert read_token_file(str(path)) == [
+        {"token": "a", "label": None, "enabled": True, "rate_limit": 2.0, "burst": None}
+    ]
+
+    path.write_text(json.dumps([{"token": "a", "rate_limit": -1}]))
+    with pytest.raises(ValueError, match="rate_limit"):
+        read_token_file(str(path))
+    path.write_text("{not a list")
+    with pytest.raises(ValueError):
+        read_token_file(str(path))
+    with pytest.raises(ValueError, match="does not exist"):
+        read_token_file(str(tmp_path / "missing.json"))
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=2)
+    start = bucket.updated
+    assert bucket.take(start) == 0
+    assert bucket.take(start) == 0
+    assert bucket.take(start) == pytest.approx(0.5)
+    assert bucket.take(start + 0.5) == 0
+
+
+def test_token_file_reload_and_rate_limits(tmp_path: Path, make_daemon, serve_daemon):
+    token_file = tmp_path / "tokens.json"
+    token_file.write_text(json.dumps([
+        {"token": "ops-token", "label": "ops"},
+        {"token": "slow-token", "label": "slow", "rate_limit": 0.01, "burst": 2},
+    ]))
+    daemon = make_daemon(auth_token_file=str(token_file))
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    assert _get(port, "/healthz", "slow-token")[0].status == 200
+    assert _get(port, "/healthz", "slow-token")[0].status == 200
+    resp, body = _get(port, "/healthz", "slow-token")
+    assert resp.status == 429
+    assert int(resp.getheader("Retry-After")) >= 1
+    assert json.loads(body)["label"] == "slow"
+    # Other labels have their own budget
+    assert _get(port, "/healthz", "ops-token")[0].status == 200
+
+    token_file.write_text(json.dumps([{"token": "ops-token", "label": "ops", "enabled": False}]))
+    assert daemon.reload_tokens()
+    resp, body = _get(port, "/healthz", "ops-token")
+    assert resp.status == 401 and json.loads(body)["reason"] == "revoked"
+    assert _get(port, "/healthz", "slow-token")[0].status == 401
+
+    # A broken file keeps the tokens in use
+    token_file.write_text("[{")
+    assert not daemon.reload_tokens()
+    assert daemon.auth_tokens.lookup("ops-token").label == "ops"
+
+    assert daemon.metrics.auth_requests.value(label="slow") == 3
+    assert daemon.metrics.rate_limited.value(label="slow") == 1
+    assert daemon.metrics.token_reloads.value(result="error") == 1
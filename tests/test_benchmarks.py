@@ -0,0 +1,50 @@
+import importlib.util
+import json
+import logging
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _load_runner():
+    spec = importlib.util.spec_from_file_location("run_benchmarks", ROOT / "benchmarks" / "run_benchmarks.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_quick_benchmark_report(tmp_path, monkeypatch):
+    runner = _load_runner()
+    for name in runner.SYNTHETIC_ENV:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("HARVESTER_BENCH_LATENCY", "7")
+    output = tmp_path / "bench.json"
+
+    assert runner.main(["--quick", "--requests", "3", "--output", str(output)]) == 0
+
+    # The run leaves logging and the environment as it found them
+    assert logging.root.manager.disable == logging.NOTSET
+    assert os.environ["HARVESTER_BENCH_LATENCY"] == "7"
+    assert not any(name in os.environ for name in runner.SYNTHETIC_ENV if name != "HARVESTER_BENCH_LATENCY")
+
+    report = json.loads(output.read_text())
+    results = report["results"]
+    assert set(results) == set(runner.SUITES)
+    assert results["cycle"]["cycle"]["count"] == 2
+    assert results["http"]["identity"]["count"] == 6
+    assert all(results["http"][variant]["errors"] == 0 for variant in ("identity", "gzip", "conditional"))
+    assert [entry["payload_bytes"] for entry in results["serialization"]["sizes"]] == [1024, 16384]
+    assert results["cold_start"]["null"]["errors"] == []
+    assert results["cold_start"]["sample_plugin"]["errors"] == []
+
+    lines = runner.compare(report, report)
+    assert lines and all("(+0.0%)" in line for line in lines)
+
+
+def test_percentile_nearest_rank():
+    runner = _load_runner()
+    values = list(range(1, 101))
+    assert runner.percentile(values, 50) == 50
+    assert runner.percentile(values, 99) == 99
+    assert runner.percentile([], 99) == 0.0
@@ -0,0 +1,73 @@
+import time
+
+from dwellir_harvester_app.cache import ResultCache
+from dwellir_harvester_app.harvest import failed_section
+
+
+def _ok(value):
+    return {"meta": {"collector_name": "c", "status": "success"}, "data": {"v": value}}
+
+
+def test_fresh_within_ttl_only():
+    cache = ResultCache({"slow": 60}, default_ttl=0)
+    section = _ok(1)
+    cache.resolve("slow", section)
+    cache.resolve("fast", _ok(2))
+
+    assert cache.fresh("slow") is section
+    assert cache.fresh("fast") is None
+    assert cache.fresh("unknown") is None
+
+
+def test_reused_and_seeded_sections_keep_their_age():
+    cache = ResultCache({"slow": 60})
+    cache.seed("slow", _ok(1), age=59.9)
+    section = cache.fresh("slow")
+    assert section is not None
+
+    # Publishing the cached section again must not restart its TTL
+    cache.resolve("slow", section)
+    time.sleep(0.15)
+    assert cache.fresh("slow") is None
+
+
+def test_failure_falls_back_to_last_good_marked_stale():
+    cache = ResultCache()
+    good = _ok(1)
+    cache.resolve("c", good)
+    time.sleep(0.05)
+
+    served = cache.resolve("c", failed_section("c", ["rpc timeout"]))
+    assert served["data"] == {"v": 1}
+    assert served["meta"]["stale"] is True
+    assert served["meta"]["age_seconds"] >= 0
+    assert served["meta"]["refresh_errors"] == ["rpc timeout"]
+    assert "stale" not in good["meta"]
+
+
+def test_failure_without_cached_result_is_published():
+    cache = ResultCache()
+    failure = failed_section("c", ["boom"])
+    assert cache.resolve("c", failure) is failure
+
+
+def test_daemon_serves_last_good_after_failure(make_daemon):
+    daemon = make_daemon(collectors=['null'], validate=False)
+    daemon.run_collectors()
+    good = daemon.sections["null"]
+
+    daemon._on_section("null", failed_section("null", ["timed out"]))
+    served = daemon.snapshot.result["collectors"]["null"]
+    assert served["data"] == good["data"]
+    assert served["meta"]["stale"] is True
+
+
+def test_daemon_skips_runs_within_ttl(make_daemon):
+    daemon = make_daemon(collectors=['null'], collector_ttls={'null': 60})
+    daemon.run_collectors()
+    version = daemon.snapshot.version
+    section = daemon.sections["null"]
+
+    daemon.run_collectors()
+    assert daemon.sections["null"] is section
+    assert daemon.snapshot.version == version
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+from dwellir_harvester_app.cli import main
+from dwellir_harvester_app.scheduler import run_batch
+
+PLUGIN = (
+    "import time\n"
+    "from dwellir_harvester.collector_base import GenericCollector\n"
+    "class Sleepy(GenericCollector):\n"
+    "    NAME = 'sleepy'\n"
+    "    VERSION = '2.0.0'\n"
+    "    def collect(self):\n"
+    "        time.sleep(30)\n"
+    "        return {'data': {}}\n"
+    "class Nap(GenericCollector):\n"
+    "    NAME = 'nap'\n"
+    "    VERSION = '1.0.0'\n"
+    "    def collect(self):\n"
+    "        time.sleep(0.3)\n"
+    "        return {'data': {'rested': True}}\n"
+)
+
+
+def _collect(tmp_path: Path, monkeypatch, *args):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir(exist_ok=True)
+    (plugin_dir / "cli_timeout_plugins.py").write_text(PLUGIN)
+    monkeypatch.setenv("HARVESTER_INDEX_PATH", str(tmp_path / "index.json"))
+    output = tmp_path / "out.json"
+    start = time.monotonic()
+    rc = main(["collect", *args, "--collector-path", str(plugin_dir), "--output", str(output)])
+    return rc, json.loads(output.read_text()), time.monotonic() - start
+
+
+def test_cli_abandons_overrunning_collector(tmp_path: Path, monkeypatch):
+    rc, result, elapsed = _collect(tmp_path, monkeypatch, "sleepy", "null", "--collector-timeout", "sleepy=0.3")
+
+    assert rc == 0
+    assert elapsed < 5
+    sleepy = result["collectors"]["sleepy"]
+    assert sleepy["meta"]["status"] == "failed"
+    assert sleepy["meta"]["collector_version"] == "2.0.0"
+    message = json.loads(sleepy["message"])
+    assert message["error"] == "timeout"
+    assert message["timeout_seconds"] == 0.3
+    assert result["collectors"]["null"]["data"]["data"]["foo"] == "bar"
+    assert "validation_error" not in result["harvester"]
+
+
+def test_cli_runs_collectors_concurrently(tmp_path: Path, monkeypatch):
+    rc, result, elapsed = _collect(tmp_path, monkeypatch, "nap", "null", "--jobs", "2", "--timeout", "10")
+    assert rc == 0
+    assert result["collectors"]["nap"]["data"]["data"]["rested"] is True
+
+    start = time.monotonic()
+    sections = run_batch(["a", "b", "c"], lambda name: time.sleep(0.3) or {"meta": {}, "data": {"name": name}}, max_workers=3)
+    assert time.monotonic() - start < 0.6
+    assert [s["data"]["name"] for s in sections.values()] == ["a", "b", "c"]
+
+
+def test_run_batch_replaces_abandoned_workers():
+    release = threading.Event()
+
+    def run_job(name):
+        if name == "hung":
+            release.wait(10)
+        return {"meta": {}, "data": {"name": name}}
+
+    try:
+        sections = run_batch(["hung", "after"], run_job, max_workers=1, default_timeout=0.2)
+    finally:
+        release.set()
+
+    assert json.loads(sections["hung"]["message"])["error"] == "timeout"
+    assert sections["after"]["data"]["name"] == "after"
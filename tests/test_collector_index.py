@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import dwellir_harvester_app.collector_index as collector_index
+from dwellir_harvester_app.cli import main
+from dwellir_harvester_app.collector_index import resolve_collectors
+
+PLUGIN = (
+    "from dwellir_harvester.collector_base import GenericCollector\n"
+    "class Indexed(GenericCollector):\n"
+    "    NAME='indexed_plugin'\n"
+    "    VERSION='1.0.0'\n"
+    "    def collect(self):\n"
+    "        return {'data': {'ok': True}}\n"
+)
+
+
+def _forbid_discovery(monkeypatch):
+    class NoDiscovery:
+        def __init__(self, *args, **kwargs):
+            raise AssertionError("full discovery ran")
+
+    monkeypatch.setattr(collector_index, "CollectorRegistry", NoDiscovery)
+
+
+def test_index_serves_known_names_without_discovery(tmp_path: Path, monkeypatch):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "indexed_plugin_mod.py").write_text(PLUGIN)
+    index = str(tmp_path / "index.json")
+
+    first = resolve_collectors(["null", "indexed_plugin"], [str(plugin_dir)], path=index)
+    assert set(first) == {"null", "indexed_plugin"}
+    entries = json.loads(Path(index).read_text())["collectors"]
+    assert entries["indexed_plugin"] == {"module": "indexed_plugin_mod", "class": "Indexed"}
+
+    sys.modules.pop("indexed_plugin_mod", None)
+    _forbid_discovery(monkeypatch)
+    second = resolve_collectors(["indexed_plugin"], [str(plugin_dir)], path=index)
+    assert second["indexed_plugin"].NAME == "indexed_plugin"
+
+
+def test_index_is_rebuilt_when_plugins_change(tmp_path: Path, monkeypatch):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    plugin_file = plugin_dir / "indexed_plugin_mod2.py"
+    plugin_file.write_text(PLUGIN.replace("indexed_plugin'", "indexed_plugin2'"))
+    index = str(tmp_path / "index.json")
+    resolve_collectors(["indexed_plugin2"], [str(plugin_dir)], path=index)
+
+    stat = plugin_file.stat()
+    os.utime(plugin_file, (stat.st_atime, stat.st_mtime + 5))
+    fingerprint = collector_index.index_fingerprint([str(plugin_dir)])
+    assert collector_index.load_index(index, fingerprint) is None
+
+    # Unknown names and unreadable indexes fall back to discovery instead of failing
+    Path(index).write_text("{not json")
+    assert resolve_collectors(["no-such-collector", "null"], path=index).keys() == {"null"}
+    assert "null" in json.loads(Path(index).read_text())["collectors"]
+
+
+def test_cli_collect_uses_index(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("HARVESTER_INDEX_PATH", str(tmp_path / "index.json"))
+    output = tmp_path / "out.json"
+    assert main(["collect", "null", "--output", str(output)]) == 0
+
+    _forbid_discovery(monkeypatch)
+    assert main(["collect", "null", "--output", str(output)]) == 0
+    assert json.loads(output.read_text())["collectors"]["null"]["data"]["data"]["foo"] == "bar"
@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.daemon import build_config, load_daemon_config, parse_args
+
+
+def test_yaml_config_with_per_collector_settings(tmp_path: Path):
+    config_file = tmp_path / "harvester.yaml"
+    config_file.write_text(
+        "port: 19090\n"
+        "max-connections: 8\n"
+        "timeout: 12\n"
+        "validate: false\n"
+        "collectors:\n"
+        "  host: {}\n"
+        "  'null':\n"
+        "    interval: 60\n"
+        "    ttl: 30\n"
+        "    params: {answer: 42}\n"
+        "targets:\n"
+        "  relay:\n"
+        "    collectors:\n"
+        "      'null': {interval: 15, timeout: 5}\n"
+    )
+
+    args = parse_args(['--config', str(config_file), '--port', '18081', '--collector-interval', 'host=90'])
+    config = build_config(args)
+
+    assert config['port'] == 18081  # the command line wins
+    assert config['max_connections'] == 8
+    assert config['collector_timeout'] == 12.0
+    assert config['validate'] is False
+    assert config['collectors'] == ['host', 'null']
+    assert config['collector_params'] == {'null': {'answer': 42}}
+    assert config['collector_intervals'] == {'null': 60.0, 'relay/null': 15.0, 'host': 90.0}
+    assert config['collector_timeouts'] == {'relay/null': 5.0}
+    assert config['collector_ttls'] == {'null': 30.0}
+    assert config['targets'] == {'relay': {'collectors': ['null'], 'params': {}}}
+
+
+def test_toml_config_and_invalid_options(tmp_path: Path, capsys):
+    config_file = tmp_path / "harvester.toml"
+    config_file.write_text(
+        'collectors = ["null"]\n'
+        'workers = 2\n'
+        '[targets.relay]\n'
+        'collectors = ["null"]\n'
+        'params = { null = { port = 9944 } }\n'
+    )
+    config = load_daemon_config(['--config', str(config_file)])
+    assert config['max_workers'] == 2
+    assert config['targets']['relay']['params'] == {'null': {'port': 9944}}
+
+    config_file.write_text('server_mode = "forking"\n')
+    with pytest.raises(ValueError, match="server_mode"):
+        load_daemon_config(['--config', str(config_file)])
+
+    config_file.write_text('no_validate = true\n')
+    with pytest.raises(SystemExit):
+        parse_args(['--config', str(config_file)])
+    assert "Unknown option(s)" in capsys.readouterr().err
+
+
+def test_reload_applies_only_the_differences(tmp_path: Path, make_daemon):
+    token_file = tmp_path / "tokens.json"
+    token_file.write_text(json.dumps([{"token": "old", "label": "ops"}]))
+    daemon = make_daemon(collectors=['null', 'host'], interval=300, auth_token_file=str(token_file))
+    daemon.run_collectors()
+    null_section = daemon.sections['null']
+    assert daemon.latest_results['host']
+    null_job = daemon.scheduler.jobs['null']
+    executor = daemon.scheduler.executor
+
+    config = dict(daemon.config, collectors=['null'], collector_intervals={'null': 30},
+                  targets={'relay': {'collectors': ['null']}}, port=1, cache_ttl=10)
+    changed = daemon.reload_config(config)
+
+    assert changed == ['cache_ttl', 'collector_intervals', 'collectors', 'targets']
+    assert daemon.config.get('port') is None  # needs a restart
+    assert sorted(daemon.scheduler.jobs) == ['null', 'relay/null']
+    assert daemon.scheduler.jobs['null'] is null_job and null_job.interval == 30
+    assert daemon.scheduler.executor is executor
+    assert daemon.sections['null'] is null_section
+    assert daemon.latest_results['host'] == {}
+    assert sorted(daemon.latest_results['collectors']) == ['null']
+    assert daemon.cache.ttl('relay/null') == 10
+
+    # Nothing changed in the config, but the token file is re-read
+    token_file.write_text(json.dumps([{"token": "new", "label": "ops"}]))
+    daemon.config_loader = lambda: dict(daemon.config)
+    assert daemon.reload()
+    assert daemon.auth_tokens.lookup("new").label == "ops"
+    assert daemon.auth_tokens.lookup("old") is None
+
+    def broken():
+        raise ValueError("Invalid config file")
+
+    daemon.config_loader = broken
+    assert not daemon.reload()
+    assert daemon.metrics.config_reloads.value(result="error") == 1
+    assert sorted(daemon.scheduler.jobs) == ['null', 'relay/null']
+
+
+def test_invalid_reload_leaves_the_daemon_unchanged(make_daemon):
+    daemon = make_daemon(collectors=['null'], interval=300)
+    config = daemon.config
+    jobs = daemon.scheduler.jobs
+
+    with pytest.raises(ValueError, match="http"):
+        daemon.reload_config(dict(config, collectors=['host', 'null'], cache_ttl=10, push_url='ftp://bad'))
+    assert daemon.config is config
+    assert daemon.scheduler.jobs is jobs and sorted(jobs) == ['null']
+    assert daemon.job_names == ['null']
+    assert daemon.cache.default_ttl == 0
+    assert daemon.pusher is None
+
+    # The next reload diffs against the running config, not the rejected one
+    assert daemon.reload_config(dict(config, collectors=['host', 'null'])) == ['collectors']
+    assert sorted(daemon.scheduler.jobs) == ['host', 'null']
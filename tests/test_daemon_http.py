@@ -0,0 +1,418 @@
+import gzip
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from dwellir_harvester_app.delta import apply_merge_patch
+from dwellir_harvester_app.snapshot import Snapshot, etag_matches, negotiate_encoding
+
+
+def _get(port, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def test_metadata_is_served_from_cached_snapshot(make_daemon, serve_daemon):
+    daemon = make_daemon()
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    resp, body = _get(port, "/metadata")
+    assert resp.status == 200
+    assert body == daemon.snapshot.body
+    assert json.loads(body)["collectors"]["null"]
+    assert resp.getheader("ETag") == daemon.snapshot.etag
+    assert resp.getheader("Content-Length") == str(len(body))
+
+
+def test_metadata_conditional_and_gzip(make_daemon, serve_daemon):
+    daemon = make_daemon()
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    resp, body = _get(port, "/metadata", {"If-None-Match": daemon.snapshot.etag})
+    assert resp.status == 304
+    assert body == b""
+
+    resp, body = _get(port, "/metadata", {"Accept-Encoding": "gzip"})
+    assert resp.status == 200
+    assert resp.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(body) == daemon.snapshot.body
+
+
+def test_negotiate_encoding():
+    available = ["gzip", "identity"]
+    assert negotiate_encoding(None, available) == "identity"
+    assert negotiate_encoding("gzip, deflate", available) == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity", available) == "identity"
+    assert negotiate_encoding("br", available) == "identity"
+    assert negotiate_encoding("*", available) == "gzip"
+
+
+def test_etag_matches():
+    snap = Snapshot({"a": 1})
+    assert etag_matches(snap.etag, snap.etag)
+    assert etag_matches(f'"other", W/{snap.etag}', snap.etag)
+    assert etag_matches("*", snap.etag)
+    assert not etag_matches('"other"', snap.etag)
+    assert not etag_matches(None, snap.etag)
+
+
+def test_stalled_client_does_not_block_others(make_daemon, serve_daemon):
+    daemon = make_daemon(request_timeout=5)
+    port = serve_daemon(daemon)
+
+    # Open a connection that never sends a request
+    stalled = socket.create_connection(("127.0.0.1", port))
+    try:
+        started = time.monotonic()
+        resp, body = _get(port, "/healthz")
+        assert resp.status == 200
+        assert body == b"ok\n"
+        assert time.monotonic() - started < 1
+    finally:
+        stalled.close()
+
+
+def test_keep_alive_reuses_connection(make_daemon, serve_daemon):
+    daemon = make_daemon()
+    port = serve_daemon(daemon)
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    for _ in range(3):
+        conn.request("GET", "/healthz")
+        resp = conn.getresponse()
+        assert resp.status == 200
+        assert resp.version == 11
+        resp.read()
+    conn.close()
+
+
+def test_connection_limit_returns_503(make_daemon, serve_daemon):
+    daemon = make_daemon(max_connections=1)
+    port = serve_daemon(daemon)
+
+    held = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    held.request("GET", "/healthz")
+    held.getresponse().read()
+    try:
+        resp, _ = _get(port, "/healthz")
+        assert resp.status == 503
+        assert resp.getheader("Retry-After") == "1"
+    finally:
+        held.close()
+
+
+def test_sigterm_stops_and_drains(tmp_path):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "dwellir_harvester_app.daemon", "--host", "127.0.0.1", "--port", str(port),
+         "--collectors", "null", "--output", str(tmp_path / "out.json"), "--no-restore"],
+        env=dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parent.parent / "src")),
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                assert _get(port, "/healthz")[0].status == 200
+                break
+            except ConnectionError:
+                assert time.monotonic() < deadline and proc.poll() is None
+                time.sleep(0.05)
+
+        # Without a handler SIGTERM kills the process before stop() can drain
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=10) == 0
+    finally:
+        proc.kill()
+
+
+def test_stop_drains_idle_keep_alive_connections(make_daemon):
+    daemon = make_daemon()
+    httpd = daemon._make_server(("127.0.0.1", 0))
+    daemon.httpd = httpd
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+    conn.request("GET", "/healthz")
+    conn.getresponse().read()
+    assert httpd.active_connections == 1
+
+    started = time.monotonic()
+    daemon.stop()
+    assert time.monotonic() - started < 2
+    assert httpd.active_connections == 0
+    conn.close()
+
+
+def test_changes_returns_merge_patch_or_full_document(make_daemon, serve_daemon):
+    daemon = make_daemon(delta_history=2, validate=False)
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    resp, body = _get(port, "/metadata")
+    base_version = int(resp.getheader("X-Snapshot-Version"))
+    base = json.loads(body)
+
+    daemon._on_section("null", {"meta": {"collector_name": "null"}, "data": {"changed": True}})
+    resp, body = _get(port, f"/metadata/changes?since={base_version}")
+    delta = json.loads(body)
+    assert resp.status == 200
+    assert delta["type"] == "merge-patch"
+    assert delta["version"] == daemon.snapshot.version
+    assert apply_merge_patch(base, delta["patch"]) == daemon.snapshot.result
+
+    # Push the base version out of the ring
+    daemon._publish()
+    daemon._publish()
+    resp, body = _get(port, f"/metadata/changes?since={base_version}")
+    delta = json.loads(body)
+    assert delta["type"] == "full"
+    assert delta["document"] == daemon.snapshot.result
+
+    resp, _ = _get(port, "/metadata/changes?since=latest")
+    assert resp.status == 400
+
+
+def _read_event(resp):
+    fields = {}
+    while True:
+        line = resp.fp.readline().decode().rstrip("\n")
+        if not line:
+            if fields:
+                return fields
+            continue
+        if line.startswith(":"):
+            continue
+        key, _, value = line.partition(": ")
+        fields[key] = value
+
+
+def test_stream_pushes_updates_for_named_collectors(make_daemon, serve_daemon):
+    daemon = make_daemon(collectors=['null', 'host'], validate=False, stream_heartbeat=0.2)
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/metadata/stream?collectors=null")
+    resp = conn.getresponse()
+    assert resp.getheader("Content-Type") == "text/event-stream"
+
+    first = _read_event(resp)
+    assert first["event"] == "snapshot"
+    assert list(json.loads(first["data"])["collectors"]) == ["null"]
+    assert "host" not in json.loads(first["data"])
+
+    # A change to a collector outside the filter produces no event
+    daemon._on_section("host", {"meta": {"collector_name": "host"}, "data": {"changed": 1}})
+    started = time.monotonic()
+    daemon._on_section("null", {"meta": {"collector_name": "null"}, "data": {"changed": 2}})
+    event = _read_event(resp)
+    assert time.monotonic() - started < 1
+    assert event["event"] == "update"
+    assert int(event["id"]) == daemon.snapshot.version
+    assert json.loads(event["data"])["collectors"] == {"null": daemon.sections["null"]}
+    conn.close()
+
+
+def test_streams_have_their_own_limit(make_daemon, serve_daemon):
+    daemon = make_daemon(max_connections=1, max_streams=1, stream_heartbeat=0.2)
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/metadata/stream")
+    resp = conn.getresponse()
+    assert _read_event(resp)["event"] == "snapshot"
+    try:
+        # The subscriber does not use up the connection limit...
+        assert _get(port, "/healthz")[0].status == 200
+        # ...but a second one is over the stream limit
+        deadline = time.monotonic() + 2
+        while daemon.httpd.active_connections and time.monotonic() < deadline:
+            time.sleep(0.01)
+        resp, body = _get(port, "/metadata/stream")
+        assert resp.status == 503
+        assert resp.getheader("Retry-After") == "1"
+        assert json.loads(body)["error"] == "too many streams"
+    finally:
+        conn.close()
+
+
+def test_single_mode_refuses_streams(make_daemon, serve_daemon):
+    daemon = make_daemon(server_mode='single')
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    started = time.monotonic()
+    resp, body = _get(port, "/metadata/stream")
+    assert resp.status == 501
+    assert "threaded" in json.loads(body)["error"]
+    assert _get(port, "/healthz")[0].status == 200
+    assert time.monotonic() - started < 2
+
+
+def test_collectors_endpoint_lists_loaded_collectors(make_daemon, serve_daemon):
+    daemon = make_daemon(collectors=['null'])
+    port = serve_daemon(daemon)
+
+    resp, body = _get(port, "/collectors")
+    listing = {c["name"]: c for c in json.loads(body)["collectors"]}
+    assert resp.status == 200
+    assert listing["null"]["configured"] is True
+    assert listing["null"]["source"] == "builtin"
+    assert listing["null"]["version"]
+    assert listing["host"]["configured"] is False
+
+
+def test_start_serves_before_the_first_collection_finishes(tmp_path, make_daemon):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "slow_start_plugin.py").write_text(
+        "import time\n"
+        "from dwellir_harvester.collector_base import GenericCollector\n"
+        "class SlowStart(GenericCollector):\n"
+        "    NAME = 'slow_start'\n"
+        "    VERSION = '1.0.0'\n"
+        "    def collect(self):\n"
+        "        time.sleep(1)\n"
+        "        return {'data': {'ok': True}}\n"
+    )
+    daemon = make_daemon(collectors=['slow_start'], collector_paths=[str(plugin_dir)], host='127.0.0.1', port=0)
+    threading.Thread(target=daemon.start, daemon=True).start()
+    try:
+        started = time.monotonic()
+        while daemon.httpd is None:
+            time.sleep(0.01)
+        resp, _ = _get(daemon.httpd.server_address[1], "/healthz")
+        assert resp.status == 200
+        assert time.monotonic() - started < 0.5
+    finally:
+        daemon.stop()
+
+
+REFRESH_PLUGIN = (
+    "import time\n"
+    "from dwellir_harvester.collector_base import GenericCollector\n"
+    "RUNS = []\n"
+    "class Counted(GenericCollector):\n"
+    "    NAME = 'counted'\n"
+    "    VERSION = '1.0.0'\n"
+    "    def collect(self):\n"
+    "        RUNS.append(1)\n"
+    "        time.sleep(0.3)\n"
+    "        return {'runs': len(RUNS)}\n"
+)
+
+
+def _post(port, path, token=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("POST", path, headers={"Authorization": f"Bearer {token}"} if token else {})
+    resp = conn.getresponse()
+    body = json.loads(resp.read())
+    conn.close()
+    return resp.status, body
+
+
+def test_collect_endpoint_refreshes_and_coalesces(make_daemon, serve_daemon, tmp_path):
+    (tmp_path / "counted_plugin.py").write_text(REFRESH_PLUGIN)
+    daemon = make_daemon(collectors=['null', 'counted'], collector_paths=[str(tmp_path)],
+                         auth_tokens=["ops"], refresh_min_interval=0.5, cache_ttl=3600)
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    assert _post(port, "/collect")[0] == 401
+    assert _post(port, "/collect?collectors=nope", "ops")[0] == 400
+
+    time.sleep(0.5)
+    replies = []
+    threads = [threading.Thread(target=lambda: replies.append(_post(port, "/collect?collectors=counted&wait=true", "ops")))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    states = [body["runs"]["counted"] for _, body in replies]
+    assert states.count("started") == 1
+    assert "running" in states
+    for status, body in replies:
+        assert status == 200
+        assert body["collectors"]["counted"]["data"]["runs"] == 2
+    assert daemon.metrics.refresh_runs.value(result="started") == 1
+
+    # Within --refresh-min-interval the last result stands
+    status, body = _post(port, "/collect?collectors=counted", "ops")
+    assert (status, body["runs"]) == (202, {"counted": "recent"})
+    assert daemon.cache.fresh("counted") is not None
+
+    time.sleep(0.5)
+    status, body = _post(port, "/collect?wait=true", "ops")
+    assert body["runs"] == {"null": "started", "counted": "started"}
+    assert body["collectors"]["counted"]["data"]["runs"] == 3
+    assert body["version"] == daemon.snapshot.version
+
+
+def test_collect_endpoint_needs_auth(make_daemon, serve_daemon):
+    daemon = make_daemon()
+    port = serve_daemon(daemon)
+    assert _post(port, "/collect")[0] == 403
+    resp, _ = _get(port, "/collect")
+    assert resp.status == 405
+
+
+def _raw_post(port, path, headers, body=b""):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=2)
+    head = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    sock.sendall(f"POST {path} HTTP/1.1\r\nHost: x\r\n{head}\r\n".encode() + body)
+    reply = b""
+    try:
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            reply += chunk
+    except socket.timeout:
+        pass
+    sock.close()
+    return reply
+
+
+def test_collect_endpoint_rejects_bad_bodies(make_daemon, serve_daemon):
+    daemon = make_daemon(auth_tokens=["ops"])
+    port = serve_daemon(daemon)
+    auth = {"Authorization": "Bearer ops"}
+
+    for length in ("abc", "-1"):
+        started = time.monotonic()
+        reply = _raw_post(port, "/collect", dict(auth, **{"Content-Length": length}))
+        assert reply.startswith(b"HTTP/1.1 400")
+        assert time.monotonic() - started < 1
+
+    # The body of a rejected request is not read and the connection is closed
+    for headers, status in (({}, b"401"), (auth, b"413")):
+        started = time.monotonic()
+        reply = _raw_post(port, "/collect", dict(headers, **{"Content-Length": "100000"}), b"x" * 10)
+        assert reply.startswith(b"HTTP/1.1 " + status)
+        assert time.monotonic() - started < 1
+
+    # A small body is read and the connection stays usable
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    for _ in range(2):
+        conn.request("POST", "/collect?collectors=null", body=b"{}", headers=auth)
+        resp = conn.getresponse()
+        resp.read()
+        assert resp.status == 202
+    conn.close()
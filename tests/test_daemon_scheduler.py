@@ -0,0 +1,158 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.scheduler import CollectorJob, CollectorScheduler, parse_overrides
+
+
+def _section(name):
+    return {"meta": {"collector_name": name}, "data": {"ok": True}}
+
+
+def test_slow_collector_does_not_delay_fast_one():
+    results = {}
+    fast_done = threading.Event()
+
+    def run_job(name):
+        if name == "slow":
+            time.sleep(0.5)
+        return _section(name)
+
+    def on_result(name, section):
+        results[name] = (time.monotonic(), section)
+        if name == "fast":
+            fast_done.set()
+
+    scheduler = CollectorScheduler(
+        [CollectorJob("slow", interval=60, timeout=5), CollectorJob("fast", interval=60, timeout=5)],
+        run_job=run_job,
+        on_result=on_result,
+        max_workers=2,
+    )
+    try:
+        started = time.monotonic()
+        scheduler.run_now(wait=False)
+        assert fast_done.wait(0.3)
+        assert results["fast"][0] - started < 0.3
+        scheduler.run_now(["slow"])
+        assert results["slow"][1]["data"]["ok"] is True
+    finally:
+        scheduler.stop()
+
+
+def test_timeout_reports_failure_and_discards_late_result():
+    results = []
+    release = threading.Event()
+
+    def run_job(name):
+        release.wait(2)
+        return _section(name)
+
+    scheduler = CollectorScheduler(
+        [CollectorJob("hung", interval=60, timeout=0.1)],
+        run_job=run_job,
+        on_result=lambda name, section: results.append(section),
+    )
+    try:
+        scheduler.run_now()
+        assert len(results) == 1
+        assert results[0]["meta"]["status"] == "failed"
+        assert "timed out" in results[0]["meta"]["errors"][0]
+
+        # A second trigger while the hung run is in flight does not start another one
+        first = scheduler.jobs["hung"].future
+        assert scheduler.run_now(wait=False)["hung"] is first
+
+        release.set()
+        first.result(timeout=2)
+        assert len(results) == 1
+    finally:
+        scheduler.stop()
+
+
+def test_timeout_counts_from_start_not_from_queueing():
+    results = {}
+
+    def run_job(name):
+        time.sleep(0.3)
+        return _section(name)
+
+    scheduler = CollectorScheduler(
+        [CollectorJob(f"c{i}", interval=60, timeout=0.5) for i in range(4)],
+        run_job=run_job,
+        on_result=lambda name, section: results.__setitem__(name, section),
+        max_workers=2,
+    )
+    try:
+        # c2 and c3 wait ~0.3s for a worker, then run well within their own timeout
+        scheduler.run_now()
+        assert sorted(results) == ["c0", "c1", "c2", "c3"]
+        assert all(section["data"]["ok"] is True for section in results.values())
+        assert not any(job.timed_out for job in scheduler.jobs.values())
+    finally:
+        scheduler.stop()
+
+
+def test_scheduler_loop_reruns_on_interval():
+    runs = []
+    scheduler = CollectorScheduler(
+        [CollectorJob("tick", interval=0.05, timeout=1)],
+        run_job=lambda name: runs.append(name) or _section(name),
+        on_result=lambda name, section: None,
+        jitter=0,
+    )
+    scheduler.start()
+    try:
+        time.sleep(0.3)
+    finally:
+        scheduler.stop()
+    assert len(runs) >= 3
+
+
+def test_parse_overrides():
+    assert parse_overrides(["host=30", "null=1.5"]) == {"host": 30.0, "null": 1.5}
+    with pytest.raises(ValueError):
+        parse_overrides(["host"])
+    with pytest.raises(ValueError):
+        parse_overrides(["host=soon"])
+
+
+def test_daemon_run_collectors_merges_sections(make_daemon, tmp_path: Path):
+    daemon = make_daemon(output_file=str(tmp_path / "out.json"), validate=True)
+    result = daemon.run_collectors()
+
+    assert result["harvester"]["collectors_used"] == ["null"]
+    assert "null" in result["collectors"]
+    assert "validation_error" not in result["harvester"]
+    assert (tmp_path / "out.json").exists()
+
+
+def test_refresh_joins_running_jobs_and_spaces_runs():
+    release = threading.Event()
+    runs = []
+
+    def run_job(name):
+        runs.append(name)
+        release.wait(2)
+        return _section(name)
+
+    scheduler = CollectorScheduler([CollectorJob("a", interval=60, timeout=5)], run_job=run_job, on_result=lambda n, s: None)
+    started = []
+    try:
+        state, future = scheduler.refresh(["a", "missing"], before_start=started.append)["a"]
+        assert state == "started"
+        assert scheduler.refresh(["a"], before_start=started.append) == {"a": ("running", future)}
+        assert started == ["a"]
+        assert scheduler.wait({"a": future}, timeout=0.05) is False
+        release.set()
+        assert scheduler.wait({"a": future}, timeout=1) is True
+        assert scheduler.refresh(["a"], min_spacing=60)["a"] == ("recent", future)
+        state, future = scheduler.refresh(["a"], min_spacing=0)["a"]
+        assert state == "started"
+        assert scheduler.jobs["a"].next_run > time.monotonic() + 50
+        assert scheduler.wait({"a": future}, timeout=1) is True
+        assert runs == ["a", "a"]
+    finally:
+        scheduler.stop()
@@ -0,0 +1,26 @@
+import pytest
+
+from dwellir_harvester_app.delta import PatchNotRepresentable, apply_merge_patch, merge_patch
+
+
+def test_merge_patch_round_trip():
+    old = {"harvester": {"collection_time": "t1"}, "collectors": {"a": {"data": {"v": 1}}, "b": {"data": {}}}}
+    new = {"harvester": {"collection_time": "t2"}, "collectors": {"a": {"data": {"v": 2, "w": [1]}}}}
+    patch = merge_patch(old, new)
+    assert patch == {
+        "harvester": {"collection_time": "t2"},
+        "collectors": {"a": {"data": {"v": 2, "w": [1]}}, "b": None},
+    }
+    assert apply_merge_patch(old, patch) == new
+
+
+def test_merge_patch_of_equal_documents_is_empty():
+    doc = {"a": {"b": [1, 2]}}
+    assert merge_patch(doc, dict(doc)) == {}
+
+
+def test_merge_patch_rejects_null_members():
+    with pytest.raises(PatchNotRepresentable):
+        merge_patch({"a": 1}, {"a": None})
+    with pytest.raises(PatchNotRepresentable):
+        merge_patch({}, {"a": {"b": None}})
@@ -0,0 +1,93 @@
+import json
+import urllib.request
+from pathlib import Path
+
+from dwellir_harvester_app.history import HistoryStore, parse_time
+
+
+def _result(peers, version="1.0", syncing=False):
+    return {
+        "harvester": {"collection_time": "t"},
+        "host": {"hostname": "node-1"},
+        "collectors": {
+            "polkadot": {
+                "meta": {"status": "success", "collection_time": f"t{peers}"},
+                "data": {"peers": peers, "client": {"version": version, "syncing": syncing}},
+            }
+        },
+    }
+
+
+def test_records_only_changed_fields_and_answers_ranges(tmp_path: Path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    assert store.record(_result(10), version=1, ts=100) == 5
+    assert store.record(_result(10), version=2, ts=130) == 0
+    assert store.record(_result(12), version=3, ts=160) == 1
+    assert store.record(_result(12, version="1.1"), version=4, ts=190) == 1
+    store.close()
+
+    # Reopening continues diffing against the last recorded values
+    store = HistoryStore(str(tmp_path / "history.db"))
+    assert store.record(_result(12, version="1.1"), version=5, ts=220) == 0
+    assert "data.client.syncing" in store.fields()["polkadot"]
+
+    peers = store.query("polkadot", "data.peers", start=150, end=300)["fields"]["data.peers"]
+    assert peers["initial"]["value"] == 10
+    assert [(p["ts"], p["value"]) for p in peers["changes"]] == [(160, 12)]
+
+    client = store.query("polkadot", "data.client")
+    assert sorted(client["fields"]) == ["data.client.syncing", "data.client.version"]
+    assert [p["value"] for p in client["fields"]["data.client.version"]["changes"]] == ["1.0", "1.1"]
+
+    limited = store.query("polkadot", limit=2)
+    assert limited["truncated"] is True
+    assert sum(len(f["changes"]) for f in limited["fields"].values()) == 2
+
+    # A vanished section is recorded as removed
+    gone = {"harvester": {}, "host": {"hostname": "node-1"}, "collectors": {}}
+    assert store.record(gone, version=6, ts=250) == 4
+    assert store.query("polkadot", "data.peers")["fields"]["data.peers"]["changes"][-1]["removed"] is True
+    store.close()
+
+
+def test_size_retention_keeps_a_baseline_per_field(tmp_path: Path):
+    store = HistoryStore(str(tmp_path / "history.db"), max_bytes=64 * 1024)
+    for i in range(3000):
+        store.record(_result(i), version=i, ts=1000 + i * 30)
+    assert store.size() <= 64 * 1024 + 16 * 4096
+
+    assert store.query("polkadot", "data.peers", start=1000)["fields"]["data.peers"]["initial"] is None
+    pruned = store.query("polkadot", "data.peers")["fields"]["data.peers"]["changes"]
+    assert pruned[0]["value"] > 0
+    recent = store.query("polkadot", "data.peers", start=1000 + 2990 * 30)["fields"]["data.peers"]
+    assert recent["initial"]["value"] == 2989
+    assert recent["changes"][-1]["value"] == 2999
+    # Fields that never changed keep their first value
+    version = store.query("polkadot", "data.client.version")["fields"]["data.client.version"]["changes"]
+    assert [p["value"] for p in version] == ["1.0"]
+    store.close()
+
+
+def test_parse_time():
+    assert parse_time("1700000000") == 1700000000
+    assert parse_time("2023-11-14T22:13:20Z") == 1700000000
+    assert parse_time("2023-11-14T22:13:20") == 1700000000
+
+
+def test_history_endpoint(tmp_path: Path, make_daemon, serve_daemon):
+    daemon = make_daemon(history_file=str(tmp_path / "history.db"))
+    daemon.run_collectors()
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/history") as resp:
+        listing = json.loads(resp.read())
+    assert "data.data.number" in listing["collectors"]["null"]
+    assert not any(field.endswith("collection_time") for field in listing["collectors"]["null"])
+
+    url = f"http://127.0.0.1:{port}/history?collector=null&field=data.data&from=2000-01-01T00:00:00Z"
+    with urllib.request.urlopen(url) as resp:
+        body = json.loads(resp.read())
+    number = body["fields"]["data.data.number"]
+    assert number["initial"] is None
+    assert [p["value"] for p in number["changes"]] == [42]
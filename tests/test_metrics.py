@@ -0,0 +1,83 @@
+import http.client
+
+import pytest
+
+from dwellir_harvester_app.metrics import Counter, Histogram, MetricsRegistry
+
+
+def _get(port, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def test_text_exposition_format():
+    registry = MetricsRegistry()
+    runs = registry.register(Counter("runs_total", "Runs.", ["collector"]))
+    duration = registry.register(Histogram("run_seconds", "Duration.", ["collector"], buckets=(0.1, 1)))
+    runs.inc(collector='a"b')
+    duration.observe(0.05, collector="a")
+    duration.observe(0.5, collector="a")
+    duration.observe(5, collector="a")
+
+    text = registry.render().decode()
+    assert "# TYPE runs_total counter" in text
+    assert 'runs_total{collector="a\\"b"} 1' in text
+    assert 'run_seconds_bucket{collector="a",le="0.1"} 1' in text
+    assert 'run_seconds_bucket{collector="a",le="1"} 2' in text
+    assert 'run_seconds_bucket{collector="a",le="+Inf"} 3' in text
+    assert 'run_seconds_count{collector="a"} 3' in text
+    assert text.endswith("\n")
+
+
+def test_labels_must_match():
+    counter = Counter("c", "C.", ["a"])
+    with pytest.raises(ValueError):
+        counter.inc(b="x")
+
+
+def test_metrics_endpoint_reports_collectors_http_and_auth(make_daemon, serve_daemon):
+    daemon = make_daemon(collectors=['null'], auth_tokens=["secret"])
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    auth = {"Authorization": "Bearer secret"}
+    _get(port, "/metadata", auth)
+    _get(port, "/metadata")
+
+    resp, body = _get(port, "/metrics", auth)
+    text = body.decode()
+    assert resp.status == 200
+    assert resp.getheader("Content-Type").startswith("text/plain; version=0.0.4")
+    assert 'dwellir_harvester_collector_run_duration_seconds_count{collector="null"} 1' in text
+    assert 'dwellir_harvester_collector_runs_total{collector="null",status="success"} 1' in text
+    assert 'dwellir_harvester_collector_last_success_timestamp_seconds{collector="null"}' in text
+    assert "dwellir_harvester_validation_duration_seconds_count 1" in text
+    assert "dwellir_harvester_serialization_duration_seconds_count 1" in text
+    assert 'dwellir_harvester_output_writes_total{result="written"} 1' in text
+    assert 'dwellir_harvester_http_request_duration_seconds_count{path="/metadata",status="200"} 1' in text
+    assert 'dwellir_harvester_auth_rejections_total{reason="missing_token"} 1' in text
+
+
+def test_late_runs_are_not_counted_as_successes(make_daemon, tmp_path):
+    (tmp_path / "sluggish_plugin.py").write_text(
+        "import time\n"
+        "from dwellir_harvester.collector_base import GenericCollector\n"
+        "class Sluggish(GenericCollector):\n"
+        "    NAME = 'sluggish'\n"
+        "    VERSION = '1.0.0'\n"
+        "    def collect(self):\n"
+        "        time.sleep(0.4)\n"
+        "        return {}\n"
+    )
+    daemon = make_daemon(collectors=['sluggish'], collector_paths=[str(tmp_path)], collector_timeout=0.1)
+    daemon.run_collectors()
+    daemon.scheduler.jobs['sluggish'].future.result(timeout=5)
+
+    assert daemon.metrics.collector_runs.value(collector="sluggish", status="timeout") == 1
+    assert daemon.metrics.collector_runs.value(collector="sluggish", status="success") == 0
+    assert daemon.metrics.collector_duration.count(collector="sluggish") == 0
+    assert daemon.metrics.collector_last_success.value(collector="sluggish") == 0
@@ -0,0 +1,130 @@
+import io
+import json
+import threading
+import time
+
+from dwellir_harvester.core import bundled_schema_path
+
+from dwellir_harvester_app.harvest import collect_section
+from dwellir_harvester_app.ndjson import document_lines, stream_harvest, update_lines
+from dwellir_harvester_app.persist import OutputWriter
+
+
+def _lines(out):
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_stream_harvest_writes_sections_as_they_finish():
+    out = io.BytesIO()
+    written_before_slow_finished = []
+
+    def run_job(name):
+        if name == "dummychain":
+            time.sleep(0.3)
+            written_before_slow_finished.extend(_lines(out))
+        return collect_section(name)
+
+    envelope = stream_harvest(out, ["dummychain", "null", "host"], run_job, schema_path=bundled_schema_path(), max_workers=3)
+    lines = _lines(out)
+
+    # Fast collectors are written out while the slow one is still running
+    assert {line["type"] for line in written_before_slow_finished} == {"collector", "host"}
+    assert [line["type"] for line in lines] == ["collector", "host", "collector", "harvester"]
+    assert [lines[0]["name"], lines[2]["name"]] == ["null", "dummychain"]
+    assert lines[-1]["harvester"]["collectors_used"] == ["dummychain", "null", "host"]
+    assert "validation_error" not in lines[-1]["harvester"]
+    assert lines[-1]["harvester"] == envelope["harvester"]
+
+
+def test_stream_harvest_reports_invalid_section_in_envelope():
+    out = io.BytesIO()
+    stream_harvest(out, ["broken"], lambda name: {"meta": {}, "data": {}}, schema_path=bundled_schema_path())
+    envelope = _lines(out)[-1]
+    assert "collector_type" in envelope["harvester"]["validation_error"]
+
+
+def test_document_and_update_lines(tmp_path):
+    old = {
+        "harvester": {"collectors_used": ["a", "b"]},
+        "host": {"hostname": "x"},
+        "collectors": {"a": {"meta": {}, "data": {"v": 1}}, "b": {"meta": {}, "data": {"v": 1}}},
+        "system": {},
+    }
+    new = dict(old, collectors={"a": old["collectors"]["a"], "b": {"meta": {}, "data": {"v": 2}}})
+
+    assert [json.loads(line)["type"] for line in document_lines(old, version=3)] == ["host", "collector", "collector", "harvester"]
+    assert [json.loads(line).get("name") for line in document_lines(old, {"b"})] == ["b", None]
+
+    changed = [json.loads(line) for line in update_lines(old, new, version=4)]
+    assert [line.get("name") for line in changed] == ["b", None]
+    assert changed[-1]["version"] == 4
+    assert update_lines(old, new, {"a"}) == []
+
+    writer = OutputWriter(str(tmp_path / "out.ndjson"), output_format="ndjson")
+    assert writer.write(new)
+    assert (tmp_path / "out.ndjson").read_bytes() == b"".join(document_lines(new))
+
+
+def test_daemon_ndjson_endpoint_follows_updates(make_daemon, serve_daemon):
+    import http.client
+
+    daemon = make_daemon(collectors=['null', 'dummychain'], stream_heartbeat=0.2)
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/metadata/ndjson?collectors=null&follow=true")
+    response = conn.getresponse()
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/x-ndjson"
+
+    first = [json.loads(response.readline()) for _ in range(2)]
+    assert [line["type"] for line in first] == ["collector", "harvester"]
+    assert first[0]["name"] == "null"
+
+    # A republish with new collection times sends the null section and an envelope
+    threading.Thread(target=daemon.run_collectors, daemon=True).start()
+    line = b"\n"
+    while line == b"\n":
+        line = response.readline()
+    update = [json.loads(line), json.loads(response.readline())]
+    assert [entry["type"] for entry in update] == ["collector", "harvester"]
+    assert update[0]["name"] == "null"
+    assert update[1]["version"] > first[1]["version"]
+    conn.close()
+
+
+def test_followed_ndjson_counts_as_a_stream(make_daemon, serve_daemon):
+    import http.client
+
+    daemon = make_daemon(max_streams=1, stream_heartbeat=0.2)
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    def get(path):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return conn, response
+
+    held, response = get("/metadata/ndjson?follow=true")
+    assert response.status == 200
+    response.readline()
+    try:
+        conn, response = get("/metadata/ndjson?follow=true")
+        assert response.status == 503
+        conn.close()
+        # A one-shot snapshot is an ordinary request
+        conn, response = get("/metadata/ndjson")
+        assert response.status == 200
+        response.read()
+        conn.close()
+    finally:
+        held.close()
+
+    single = make_daemon(server_mode='single')
+    single.run_collectors()
+    port = serve_daemon(single)
+    conn, response = get("/metadata/ndjson?follow=true")
+    assert response.status == 501
+    conn.close()
@@ -0,0 +1,91 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.persist import OutputWriter, atomic_write_bytes, content_fingerprint, load_output
+
+
+def _result(value, collection_time="t1", uptime=1.0):
+    return {
+        "harvester": {"collection_time": collection_time},
+        "collectors": {"a": {"meta": {"collection_time": collection_time}, "data": {"v": value}}},
+        "system": {"uptime": uptime},
+    }
+
+
+def test_atomic_write_replaces_file_and_leaves_no_temp_files(tmp_path: Path):
+    target = tmp_path / "out.json"
+    target.write_text("old")
+    os.chmod(target, 0o640)
+
+    atomic_write_bytes(str(target), b"new", fsync="full")
+
+    assert target.read_bytes() == b"new"
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert [p.name for p in tmp_path.iterdir()] == ["out.json"]
+
+
+def test_atomic_write_rejects_unknown_fsync_mode(tmp_path: Path):
+    with pytest.raises(ValueError):
+        atomic_write_bytes(str(tmp_path / "out.json"), b"", fsync="sometimes")
+
+
+def test_fingerprint_ignores_volatile_fields():
+    assert content_fingerprint(_result(1, "t1", 1.0)) == content_fingerprint(_result(1, "t2", 2.0))
+    assert content_fingerprint(_result(1)) != content_fingerprint(_result(2))
+
+
+def test_writer_skips_unchanged_content(tmp_path: Path):
+    target = tmp_path / "out.json"
+    writer = OutputWriter(str(target), fsync="none", output_format="compact")
+
+    assert writer.write(_result(1, "t1")) is True
+    assert writer.write(_result(1, "t2")) is False
+    assert json.loads(target.read_text())["harvester"]["collection_time"] == "t1"
+
+    assert writer.write(_result(2, "t3")) is True
+    assert json.loads(target.read_text())["collectors"]["a"]["data"]["v"] == 2
+
+
+def test_writer_refreshes_unchanged_content_after_refresh_interval(tmp_path: Path):
+    writer = OutputWriter(str(tmp_path / "out.json"), fsync="none", refresh=0)
+    assert writer.write(_result(1)) is True
+    assert writer.write(_result(1)) is True
+
+
+@pytest.mark.parametrize("output_format", ["indent", "compact", "ndjson"])
+def test_load_output_reads_every_format(tmp_path: Path, output_format):
+    target = tmp_path / "out.json"
+    result = dict(_result(1), host={"hostname": "node-1"})
+    OutputWriter(str(target), fsync="none", output_format=output_format).write(result)
+
+    document, mtime = load_output(str(target))
+
+    assert document["collectors"] == result["collectors"]
+    assert document["host"] == {"hostname": "node-1"}
+    assert mtime == target.stat().st_mtime
+
+
+def test_daemon_serves_restored_snapshot_until_refreshed(tmp_path: Path, make_daemon):
+    output = tmp_path / "harvested-data.json"
+    first = make_daemon(collectors=['null'], output_file=str(output))
+    first.run_collectors()
+    old = os.stat(output).st_mtime - 120
+    os.utime(output, (old, old))
+
+    daemon = make_daemon(collectors=['null', 'host'], output_file=str(output))
+    assert daemon.restore_snapshot()
+
+    served = daemon.latest_results
+    assert served["collectors"]["null"]["meta"]["stale"] is True
+    assert served["collectors"]["null"]["meta"]["age_seconds"] >= 120
+    assert served["harvester"]["restored"]["collectors"] == ["null"]
+    assert "validation_error" not in served["harvester"]
+    # Restoring does not rewrite the file
+    assert os.stat(output).st_mtime == old
+
+    daemon.run_collectors()
+    assert "stale" not in daemon.latest_results["collectors"]["null"]["meta"]
+    assert "restored" not in daemon.latest_results["harvester"]
@@ -0,0 +1,70 @@
+import http.client
+import json
+
+import pytest
+
+from dwellir_harvester_app.projection import compile_projection
+
+RESULT = {
+    "harvester": {"collection_time": "2026-01-01T00:00:00Z", "collectors_used": ["host", "polkadot", "kusama"]},
+    "host": {"hostname": "node-1"},
+    "collectors": {
+        "polkadot": {"meta": {"status": "success"}, "data": {"version": "1.2.0", "peers": 12}},
+        "kusama": {"meta": {"status": "success"}, "data": {"version": "1.3.0", "peers": 8}},
+        "null": {"meta": {"status": "success"}, "data": {"number": 42}},
+    },
+}
+
+
+def test_fields_select_paths_with_wildcards():
+    projection = compile_projection(fields=["collectors.*.data.version", "harvester.collection_time", "collectors.kusama.meta"])
+    assert projection.apply(RESULT) == {
+        "harvester": {"collection_time": "2026-01-01T00:00:00Z"},
+        "collectors": {
+            "polkadot": {"data": {"version": "1.2.0"}},
+            "kusama": {"data": {"version": "1.3.0"}, "meta": {"status": "success"}},
+        },
+    }
+    # Missing paths and paths through leaves are left out
+    assert compile_projection(fields=["collectors.*.data.number.x", "nope"]).apply(RESULT) == {}
+
+
+def test_collectors_and_fields_combine_and_compile_once():
+    projection = compile_projection(collectors=["polkadot", "host"], fields=["collectors.*.data.peers", "host"])
+    assert projection.apply(RESULT) == {"host": {"hostname": "node-1"}, "collectors": {"polkadot": {"data": {"peers": 12}}}}
+    assert compile_projection(collectors=["host", "polkadot"], fields=["host", "collectors.*.data.peers"]) is projection
+    assert compile_projection() is None
+    with pytest.raises(ValueError):
+        compile_projection(fields=["collectors..data"])
+
+
+def test_metadata_projection_endpoint(make_daemon, serve_daemon):
+    daemon = make_daemon()
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+    path = "/metadata?collectors=null&fields=collectors.*.data,harvester.collectors_used"
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    body = json.loads(resp.read())
+    assert resp.status == 200
+    assert body == {
+        "harvester": {"collectors_used": ["null"]},
+        "collectors": {"null": {"data": daemon.latest_results["collectors"]["null"]["data"]}},
+    }
+    [view] = daemon.snapshot.projections.values()
+    assert resp.getheader("ETag") == view.etag != daemon.snapshot.etag
+
+    # Repeated queries reuse the projected snapshot and revalidate against its ETag
+    conn.request("GET", path, headers={"If-None-Match": view.etag})
+    resp = conn.getresponse()
+    resp.read()
+    assert resp.status == 304
+    assert len(daemon.snapshot.projections) == 1
+
+    conn.request("GET", "/metadata?fields=a..b")
+    resp = conn.getresponse()
+    assert resp.status == 400
+    assert "Invalid field path" in json.loads(resp.read())["error"]
+    conn.close()
@@ -0,0 +1,176 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.delta import apply_merge_patch
+from dwellir_harvester_app.push import Pusher, Spool
+from dwellir_harvester_app.snapshot import Snapshot
+
+
+class Ingest:
+    """Stand-in for the central ingestion service."""
+
+    def __init__(self):
+        self.batches = []
+        self.connections = set()
+        self.status = 204
+        ingest = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                status = ingest.status
+                if status < 300:
+                    assert self.headers["Content-Encoding"] == "gzip"
+                    assert self.headers["Authorization"] == "Bearer push-secret"
+                    ingest.connections.add(self.client_address)
+                    ingest.batches.append([json.loads(line) for line in gzip.decompress(body).splitlines()])
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ingest"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def records(self):
+        return [record for batch in self.batches for record in batch]
+
+    def wait_for(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while len(self.records()) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.records()
+
+
+@pytest.fixture
+def ingest():
+    server = Ingest()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def _rebuild(records):
+    document, version = None, None
+    for record in records:
+        if record["type"] == "full":
+            document = record["document"]
+        elif record["since"] == version:
+            document = apply_merge_patch(document, record["patch"])
+        version = record["version"]
+    return document
+
+
+def test_batches_deltas_over_one_connection(ingest, tmp_path: Path):
+    pusher = Pusher(ingest.url, Spool(str(tmp_path / "spool")), batch_size=3, batch_delay=0.2, token="push-secret")
+    pusher.start()
+    try:
+        for version in range(1, 8):
+            pusher.enqueue(Snapshot({"peers": version, "client": "1.0"}, version=version))
+        records = ingest.wait_for(7)
+    finally:
+        pusher.stop()
+
+    assert [len(batch) for batch in ingest.batches] == [3, 3, 1]
+    assert len(ingest.connections) == 1
+    assert [r["type"] for r in records] == ["full"] + ["merge-patch"] * 6
+    assert records[1]["patch"] == {"peers": 2}
+    assert _rebuild(records) == {"peers": 7, "client": "1.0"}
+    assert not list((tmp_path / "spool").iterdir())
+
+
+def test_spool_survives_outage_and_restart(ingest, tmp_path: Path):
+    spool_dir = str(tmp_path / "spool")
+    ingest.status = 503
+    results = []
+    pusher = Pusher(ingest.url, Spool(spool_dir), batch_size=10, batch_delay=0, token="push-secret",
+                    backoff=0.05, on_records=lambda result, count: results.append(result))
+    pusher.start()
+    for version in range(1, 4):
+        pusher.enqueue(Snapshot({"peers": version}, version=version))
+    time.sleep(0.3)
+    pusher.stop()
+    assert "failed" in results and "sent" not in results
+    assert len(list(Path(spool_dir).iterdir())) == 3
+
+    # A new process picks up the spooled records; its first own record is full
+    ingest.status = 204
+    pusher = Pusher(ingest.url, Spool(spool_dir), batch_size=10, batch_delay=0, token="push-secret", backoff=0.05)
+    pusher.start()
+    try:
+        pusher.enqueue(Snapshot({"peers": 4}, version=10))
+        records = ingest.wait_for(4)
+    finally:
+        pusher.stop()
+    assert [r["version"] for r in records] == [1, 2, 3, 10]
+    assert records[-1]["type"] == "full"
+
+
+def test_full_spool_drops_oldest_and_restarts_the_chain():
+    dropped = []
+    spool = Spool(max_bytes=300)
+    pusher = Pusher("http://127.0.0.1:9/", spool, on_records=lambda result, count: dropped.append(count))
+    version = 0
+    while not dropped:
+        version += 1
+        pusher.enqueue(Snapshot({"peers": version, "pad": "x" * 40}, version=version))
+    pusher.enqueue(Snapshot({"peers": 0, "pad": "x" * 40}, version=version + 1))
+
+    records = [json.loads(data) for _, data in spool.peek(100)]
+    assert records[0]["version"] == 1 + dropped[0]
+    assert records[-1]["type"] == "full"
+    assert sum(len(data) for _, data in spool.peek(100)) <= 300
+
+
+def test_daemon_pushes_each_publish(ingest, make_daemon):
+    daemon = make_daemon(push_url=ingest.url, push_token="push-secret", push_delay=0)
+    try:
+        daemon.run_collectors()
+        daemon.run_collectors()
+        records = ingest.wait_for(2)
+        assert records[0]["version"] == daemon.snapshot.version - 1
+        assert _rebuild(records)["collectors"]["null"] == daemon.latest_results["collectors"]["null"]
+    finally:
+        daemon.stop()
+    assert daemon.metrics.push_records.value(result="sent") == 2
+
+
+def test_client_error_drops_the_batch_and_restarts_the_chain(ingest):
+    results = []
+    ingest.status = 413
+    pusher = Pusher(ingest.url, Spool(), batch_size=10, batch_delay=0, token="push-secret",
+                    on_records=lambda result, count: results.append((result, count)))
+    pusher.enqueue(Snapshot({"peers": 1}, version=1))
+    pusher.enqueue(Snapshot({"peers": 2}, version=2))
+    assert pusher.flush()
+    assert results == [("rejected", 2)]
+    assert len(pusher.spool) == 0
+
+    ingest.status = 429
+    pusher.enqueue(Snapshot({"peers": 3}, version=3))
+    assert not pusher.flush()
+    assert len(pusher.spool) == 1
+
+    ingest.status = 204
+    assert pusher.flush()
+    assert [r["type"] for r in ingest.records()] == ["full"]
+    pusher.stop()
+
+
+def test_daemon_rejects_bad_push_url(capsys):
+    from dwellir_harvester_app.daemon import parse_args
+
+    with pytest.raises(SystemExit):
+        parse_args(['--push-url', 'ftp://bad'])
+    assert "Push URL must be an http(s) URL" in capsys.readouterr().err
@@ -0,0 +1,122 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from dwellir_harvester_app.coalesce import SingleFlight
+from dwellir_harvester_app.daemon import build_config, parse_args
+from dwellir_harvester_app.ratelimit import RateLimiter, parse_rate_limits
+
+
+def _get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits(["/metadata=1/5", "*=20", "/healthz=0"]) == {
+        "/metadata": (1.0, 5.0), "*": (20.0, 20.0), "/healthz": (0.0, 0.0),
+    }
+    for bad in ["/metadata", "/metadata=fast", "/metadata=-1"]:
+        with pytest.raises(ValueError):
+            parse_rate_limits([bad])
+
+    config = build_config(parse_args(["--rate-limit", "/metadata=2"]))
+    assert config["rate_limits"] == {"/metadata": (2.0, 2.0)}
+    with pytest.raises(SystemExit):
+        parse_args(["--rate-limit", "/nope=2"])
+
+
+def test_rate_limiter_drops_idle_buckets():
+    limiter = RateLimiter(max_buckets=2)
+    limiter.check("a", 1000, 1)
+    limiter.check("b", 0.001, 1)
+    time.sleep(0.01)
+    limiter.check("c", 0.001, 1)
+    # "a" refilled and was dropped, "b" is still empty and kept
+    assert len(limiter) == 2
+    assert limiter.check("b", 0.001, 1) > 0
+
+
+def test_single_flight_shares_one_build():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def build():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return b"body"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", build)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", build))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.2)  # let the followers reach the in-flight call
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [(b"body", False)] + [(b"body", True)] * 3
+    # Failures reach every caller and are not cached
+    with pytest.raises(RuntimeError):
+        flight.do("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert flight.do("k", lambda: 1) == (1, False)
+
+
+def test_endpoint_rate_limits_by_client_ip(make_daemon, serve_daemon):
+    daemon = make_daemon(rate_limits={"/metadata": (0.01, 2), "*": (0.01, 1), "/healthz": (0, 0)})
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    assert _get(port, "/metadata")[0].status == 200
+    assert _get(port, "/metadata")[0].status == 200
+    resp, body = _get(port, "/metadata")
+    assert resp.status == 429
+    assert int(resp.getheader("Retry-After")) >= 1
+    assert json.loads(body)["error"] == "rate_limited"
+
+    # Each endpoint has its own bucket; /healthz is unlimited
+    assert _get(port, "/collectors")[0].status == 200
+    assert _get(port, "/collectors")[0].status == 429
+    for _ in range(5):
+        assert _get(port, "/healthz")[0].status == 200
+    assert daemon.metrics.http_rate_limited.value(path="/metadata") == 1
+
+
+def test_failed_auth_is_limited_by_client_ip(make_daemon, serve_daemon):
+    daemon = make_daemon(auth_tokens=["secret"], rate_limits={"unauthorized": (0.01, 2)})
+    daemon.run_collectors()
+    port = serve_daemon(daemon)
+
+    def status(token=None):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", "/healthz", headers={"Authorization": f"Bearer {token}"} if token else {})
+        resp = conn.getresponse()
+        resp.read()
+        conn.close()
+        return resp.status
+
+    assert status("secret") == 200
+    assert [status(), status("wrong")] == [401, 401]
+    # Over its failure budget the address is refused before any token is checked
+    lookups = []
+    original = daemon.auth_tokens.lookup
+    daemon.auth_tokens.lookup = lambda token: lookups.append(token) or original(token)
+    assert [status("wrong"), status("secret")] == [429, 429]
+    assert lookups == []
+    assert daemon.metrics.auth_rejections.value(reason="too_many_failures") == 2
+
+    config = build_config(parse_args(["--rate-limit", "unauthorized=0"]))
+    assert config["rate_limits"] == {"unauthorized": (0.0, 0.0)}
@@ -0,0 +1,59 @@
+import os
+from pathlib import Path
+
+from dwellir_harvester_app.harvest import collect_section
+from dwellir_harvester_app.registry import CollectorRegistry
+
+PLUGIN = (
+    "from dwellir_harvester.collector_base import GenericCollector\n"
+    "class Reloadable(GenericCollector):\n"
+    "    NAME='reloadable_plugin'\n"
+    "    VERSION='{version}'\n"
+    "    def collect(self):\n"
+    "        return {{'version': '{version}'}}\n"
+)
+
+
+def _write_plugin(path: Path, version: str, mtime_offset: int = 0):
+    path.write_text(PLUGIN.format(version=version))
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + mtime_offset))
+
+
+def test_registry_resolves_without_rediscovery(tmp_path: Path, monkeypatch):
+    registry = CollectorRegistry()
+    registry.load()
+
+    import dwellir_harvester_app.registry as registry_module
+
+    def fail(*args, **kwargs):
+        raise AssertionError("load_collectors called again")
+
+    monkeypatch.setattr(registry_module, "load_collectors", fail)
+    section = collect_section("null", registry=registry)
+    assert section["data"]["data"]["foo"] == "bar"
+
+    missing = collect_section("no-such-collector", registry=registry)
+    assert missing["meta"]["status"] == "failed"
+
+
+def test_registry_hot_reloads_changed_plugin_file(tmp_path: Path):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    plugin_file = plugin_dir / "reloadable_plugin_mod.py"
+    _write_plugin(plugin_file, "1.0.0")
+
+    registry = CollectorRegistry([str(plugin_dir)], watch_interval=0)
+    registry.load()
+    assert registry.get("reloadable_plugin").VERSION == "1.0.0"
+    assert registry.refresh_if_changed() is False
+
+    _write_plugin(plugin_file, "2.0.0", mtime_offset=5)
+    assert registry.refresh_if_changed() is True
+    cls = registry.get("reloadable_plugin")
+    assert cls.VERSION == "2.0.0"
+    assert collect_section("reloadable_plugin", registry=registry)["data"]["version"] == "2.0.0"
+
+    entry = next(e for e in registry.describe() if e["name"] == "reloadable_plugin")
+    assert entry["source"] == "filesystem"
+    assert entry["version"] == "2.0.0"
@@ -0,0 +1,92 @@
+import json
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.targets import load_targets, parse_target_params, parse_targets, split_job_key
+
+PLUGIN = (
+    "from dwellir_harvester.collector_base import GenericCollector\n"
+    "class ParamEcho(GenericCollector):\n"
+    "    NAME = 'param_echo'\n"
+    "    VERSION = '1.0.0'\n"
+    "    def __init__(self, port=0):\n"
+    "        super().__init__()\n"
+    "        self.port = port\n"
+    "    @classmethod\n"
+    "    def create(cls, **kwargs):\n"
+    "        return cls(**kwargs)\n"
+    "    def collect(self):\n"
+    "        return {'data': {'port': self.port}}\n"
+)
+
+
+@pytest.fixture
+def target_daemon(tmp_path: Path, make_daemon):
+    plugin_dir = tmp_path / "plugins"
+    plugin_dir.mkdir()
+    (plugin_dir / "param_echo_plugin.py").write_text(PLUGIN)
+    return make_daemon(
+        collectors=['null'],
+        collector_paths=[str(plugin_dir)],
+        targets={
+            'relay': {'collectors': ['param_echo', 'null'], 'params': {'param_echo': {'port': 9944}}},
+            'para-1000': {'collectors': ['param_echo'], 'params': {'param_echo': {'port': 9945}}},
+        },
+        collector_intervals={'para-1000/param_echo': 30, 'param_echo': 60},
+    )
+
+
+def test_targets_share_one_pool_and_snapshot(target_daemon):
+    result = target_daemon.run_collectors()
+
+    assert sorted(target_daemon.scheduler.jobs) == ['null', 'para-1000/param_echo', 'relay/null', 'relay/param_echo']
+    assert target_daemon.scheduler.jobs['relay/param_echo'].interval == 60
+    assert target_daemon.scheduler.jobs['para-1000/param_echo'].interval == 30
+    assert result["collectors"]["relay/param_echo"]["data"]["data"]["port"] == 9944
+    assert result["collectors"]["para-1000/param_echo"]["data"]["data"]["port"] == 9945
+    assert "validation_error" not in result["harvester"]
+
+    view = target_daemon.target_snapshot('relay')
+    assert view is target_daemon.target_snapshot('relay')
+    assert view.version == target_daemon.snapshot.version
+    assert sorted(view.result["collectors"]) == ["null", "param_echo"]
+    assert view.result["harvester"]["collectors_used"] == ["param_echo", "null"]
+    assert view.result["harvester"]["target"] == "relay"
+
+
+def test_target_metadata_endpoint(target_daemon, serve_daemon):
+    target_daemon.run_collectors()
+    port = serve_daemon(target_daemon)
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metadata/para-1000", timeout=5) as response:
+        body = json.loads(response.read())
+        assert response.headers["X-Snapshot-Version"] == str(target_daemon.snapshot.version)
+    assert list(body["collectors"]) == ["param_echo"]
+    assert body["collectors"]["param_echo"]["data"]["data"]["port"] == 9945
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/metadata/nope", timeout=5)
+    assert excinfo.value.code == 404
+    assert "/metadata/relay" in json.loads(excinfo.value.read())["targets"]
+
+
+def test_target_option_parsing():
+    assert parse_targets(["relay=polkadot,host", "relay=null"]) == {"relay": ["polkadot", "host", "null"]}
+    assert parse_target_params(["relay.polkadot.rpc_url=http://127.0.0.1:9944", "relay.polkadot.retries=3"]) == {
+        "relay": {"polkadot": {"rpc_url": "http://127.0.0.1:9944", "retries": 3}}
+    }
+    assert split_job_key("relay/polkadot") == ("relay", "polkadot")
+    assert split_job_key("host") == (None, "host")
+
+    for bad in (["relay"], ["relay="]):
+        with pytest.raises(ValueError):
+            parse_targets(bad)
+    with pytest.raises(ValueError):
+        parse_target_params(["relay.polkadot=1"])
+    with pytest.raises(ValueError):
+        load_targets({"stream": {"collectors": ["null"]}})
+    with pytest.raises(ValueError):
+        load_targets({"relay": {"collectors": ["null"], "params": {"polkadot": {}}}})
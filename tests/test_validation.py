@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+import dwellir_harvester.lib as lib
+from dwellir_harvester_app.validation import SchemaValidator, get_validator
+
+
+def _section(name, version="1.0.0"):
+    return {
+        "meta": {
+            "collector_type": "generic",
+            "collector_name": name,
+            "collector_version": version,
+            "collection_time": "2025-01-01T00:00:00+00:00",
+        },
+        "data": {},
+    }
+
+
+def _document(collectors):
+    return {
+        "harvester": {"harvester-version": "0", "collection_time": "2025-01-01T00:00:00+00:00", "collectors_used": []},
+        "host": {},
+        "collectors": collectors,
+    }
+
+
+@pytest.fixture
+def schema_file(tmp_path: Path) -> Path:
+    path = tmp_path / "schema.json"
+    shutil.copy(lib.bundled_schema_path(), path)
+    return path
+
+
+def test_unchanged_sections_are_not_revalidated(schema_file):
+    validator = SchemaValidator(str(schema_file))
+    a, b = _section("a"), _section("b")
+
+    validator.validate(_document({"a": a, "b": b}))
+    assert validator.last_stats["sections_validated"] == 2
+
+    validator.validate(_document({"a": a, "b": _section("b", "2.0.0")}))
+    assert validator.last_stats["sections_validated"] == 1
+    assert validator.last_stats["sections_skipped"] == 1
+
+
+def test_invalid_section_reports_document_path(schema_file):
+    validator = SchemaValidator(str(schema_file))
+    broken = _section("a")
+    del broken["meta"]["collector_version"]
+
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        validator.validate(_document({"a": broken}))
+    assert list(excinfo.value.path) == ["collectors", "a", "meta"]
+
+    # A failed section is not cached as valid
+    with pytest.raises(jsonschema.ValidationError):
+        validator.validate(_document({"a": broken}))
+
+
+def test_schema_is_recompiled_when_file_changes(schema_file):
+    validator = SchemaValidator(str(schema_file))
+    doc = _document({"a": _section("a")})
+    validator.validate(doc)
+
+    schema = json.loads(schema_file.read_text())
+    schema["required"].append("extra")
+    schema_file.write_text(json.dumps(schema))
+    stat = schema_file.stat()
+    os.utime(schema_file, (stat.st_atime, stat.st_mtime + 10))
+
+    with pytest.raises(jsonschema.ValidationError):
+        validator.validate(doc)
+
+
+def test_schema_without_section_structure_is_validated_whole(tmp_path: Path):
+    path = tmp_path / "custom.json"
+    path.write_text(json.dumps({"type": "object", "anyOf": [{"required": ["collectors"]}]}))
+    validator = SchemaValidator(str(path))
+    validator.validate(_document({"a": _section("a")}))
+    assert validator.last_stats["sections_skipped"] == 0
+    with pytest.raises(jsonschema.ValidationError):
+        validator.validate({"host": {}})
+
+
+def test_get_validator_is_cached_per_path(schema_file):
+    assert get_validator(str(schema_file)) is get_validator(str(schema_file))
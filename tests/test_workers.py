@@ -0,0 +1,93 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from dwellir_harvester_app.workers import MIB, WorkerPool, resource
+
+PLUGIN = (
+    "import os\n"
+    "import time\n"
+    "from dwellir_harvester.collector_base import GenericCollector\n"
+    "class Hog(GenericCollector):\n"
+    "    NAME='hog'\n"
+    "    VERSION='1'\n"
+    "    def collect(self):\n"
+    "        self.blob = bytearray(512 * 1024 * 1024)\n"
+    "        return {'size': len(self.blob)}\n"
+    "class Spin(GenericCollector):\n"
+    "    NAME='spin'\n"
+    "    VERSION='1'\n"
+    "    def collect(self):\n"
+    "        while True:\n"
+    "            pass\n"
+    "class Hang(GenericCollector):\n"
+    "    NAME='hang'\n"
+    "    VERSION='1'\n"
+    "    def collect(self):\n"
+    "        time.sleep(60)\n"
+    "class Pid(GenericCollector):\n"
+    "    NAME='pid'\n"
+    "    VERSION='1'\n"
+    "    def collect(self):\n"
+    "        return {'pid': os.getpid()}\n"
+)
+
+
+@pytest.fixture
+def plugin_dir(tmp_path: Path) -> Path:
+    (tmp_path / "worker_test_plugins.py").write_text(PLUGIN)
+    return tmp_path
+
+
+@pytest.mark.skipif(resource is None, reason="needs rlimits")
+def test_worker_limits_fail_the_run_not_the_worker(plugin_dir: Path):
+    pool = WorkerPool(1, plugin_paths=[str(plugin_dir)])
+    try:
+        pid = pool.run("pid")["data"]["pid"]
+        assert pool.run("hog", memory_limit=256 * MIB)["meta"]["status"] == "failed"
+        spin = pool.run("spin", cpu_limit=1)
+        assert spin["meta"]["status"] == "failed"
+        assert "CPU time limit" in spin["meta"]["errors"][0]
+        # Limits apply per run and the worker survives them
+        assert pool.run("hog")["data"]["size"] == 512 * MIB
+        assert pool.run("pid")["data"]["pid"] == pid
+    finally:
+        pool.close()
+
+
+def test_workers_are_recycled_and_cancelled(plugin_dir: Path):
+    reasons = []
+    pool = WorkerPool(1, plugin_paths=[str(plugin_dir)], max_runs=2, on_recycle=reasons.append)
+    try:
+        first = pool.run("pid")["data"]["pid"]
+        assert pool.run("pid")["data"]["pid"] == first
+        assert pool.run("pid")["data"]["pid"] != first
+
+        threading.Timer(0.3, pool.cancel, args=("relay/hang",)).start()
+        hung = pool.run("hang", job="relay/hang")
+        assert "exited with code" in hung["meta"]["errors"][0]
+        assert pool.run("pid")["meta"].get("status") != "failed"
+        assert reasons == ["runs", "exited"]
+    finally:
+        pool.close()
+
+
+def test_daemon_runs_collectors_in_worker_processes(plugin_dir: Path, make_daemon):
+    import os
+
+    daemon = make_daemon(collectors=['null', 'pid', 'hang'], isolation='process', max_workers=2,
+                         collector_paths=[str(plugin_dir)], collector_timeouts={'hang': 0.5})
+    try:
+        pids = daemon.workers.pids()
+        daemon.run_collectors()
+        collectors = daemon.latest_results['collectors']
+        assert collectors['null']['data']['data']['number'] == 42
+        assert collectors['pid']['data']['pid'] in pids
+        assert collectors['pid']['data']['pid'] != os.getpid()
+        assert collectors['hang']['meta']['status'] == 'failed'
+
+        daemon.reload_config(dict(daemon.config, isolation='thread'))
+        assert daemon.workers is None
+    finally:
+        daemon.stop()